@@ -367,57 +367,75 @@ class ListFilterMixin(FilterMixin):
             return default_queryset
 
     def param_queryset(self, query_params, default_queryset):
-        """filters default queryset based on query parameters"""
+        """filters default queryset based on query parameters
+
+        All filter groups are compiled into predicates up front and applied in a single pass over
+        the default queryset, so the original ordering of the queryset is preserved.
+        """
         filters = self.parse_query_params(query_params)
-        queryset = set(default_queryset)
-        if filters:
-            for field_name, params in filters.iteritems():
-                for group in params:
-                    queryset = queryset.intersection(set(self.get_filtered_queryset(field_name, group, default_queryset)))
-        return list(queryset)
+        predicates = [
+            self.get_filter_predicate(field_name, group)
+            for field_name, params in filters.iteritems()
+            for group in params
+        ]
+        return [
+            item for item in default_queryset
+            if all(predicate(item) for predicate in predicates)
+        ]
 
     def get_filtered_queryset(self, field_name, params, default_queryset):
         """filters default queryset based on the serializer field type"""
+        predicate = self.get_filter_predicate(field_name, params)
+        return [item for item in default_queryset if predicate(item)]
+
+    def get_filter_predicate(self, field_name, params):
+        """Compile a single filter group into a callable that takes an item and returns whether it matches.
+
+        Everything that does not depend on the item (field type checks, lowercasing of the filter value,
+        serializer method lookup) is resolved once here rather than once per item.
+        """
         field = self.serializer_class._declared_fields[field_name]
         source_field_name = params['source_field_name']
 
         if isinstance(field, ser.SerializerMethodField):
-            return_val = [
-                item for item in default_queryset
-                if self.FILTERS[params['op']](self.get_serializer_method(field_name)(item), params['value'])
-            ]
+            compare = self.FILTERS[params['op']]
+            serializer_method = self.get_serializer_method(field_name)
+            value = params['value']
+
+            def predicate(item):
+                return compare(serializer_method(item), value)
         elif isinstance(field, ser.CharField):
             if source_field_name in ('_id', 'root'):
                 # Param parser treats certain ID fields as bulk queries: a list of options, instead of just one
                 # Respect special-case behavior, and enforce exact match for these list fields.
                 options = set(item.lower() for item in params['value'])
-                return_val = [
-                    item for item in default_queryset
-                    if getattr(item, source_field_name, '') in options
-                ]
+
+                def predicate(item):
+                    return getattr(item, source_field_name, '') in options
             else:
                 # TODO: What is {}.lower()? Possible bug
-                return_val = [
-                    item for item in default_queryset
-                    if params['value'].lower() in getattr(item, source_field_name, {}).lower()
-                ]
+                value = params['value'].lower()
+
+                def predicate(item):
+                    return value in getattr(item, source_field_name, {}).lower()
         elif isinstance(field, ser.ListField):
-            return_val = [
-                item for item in default_queryset
-                if params['value'].lower() in [
+            value = params['value'].lower()
+
+            def predicate(item):
+                return value in [
                     lowercase(i.lower) for i in getattr(item, source_field_name, [])
                 ]
-            ]
         else:
-            try:
-                return_val = [
-                    item for item in default_queryset
-                    if self.FILTERS[params['op']](getattr(item, source_field_name, None), params['value'])
-                ]
-            except TypeError:
-                raise InvalidFilterValue(detail='Could not apply filter to specified field')
+            compare = self.FILTERS[params['op']]
+            value = params['value']
+
+            def predicate(item):
+                try:
+                    return compare(getattr(item, source_field_name, None), value)
+                except TypeError:
+                    raise InvalidFilterValue(detail='Could not apply filter to specified field')
 
-        return return_val
+        return predicate
 
     def get_serializer_method(self, field_name):
         """
@@ -1,3 +1,5 @@
+import base64
+import json
 from django.utils import six
 from collections import OrderedDict
 from django.core.urlresolvers import reverse
@@ -9,7 +11,14 @@ from rest_framework.response import Response
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param
 )
+from dateutil import parser as date_parser
+from modularodm import Q
+from modularodm.query import queryset as modularodm_queryset
+
+from api.base.exceptions import InvalidQueryStringError
+from api.base.filters import ODMOrderingFilter
 from api.base.serializers import is_anonymized
+from api.base.utils import is_truthy
 from api.base.settings import MAX_PAGE_SIZE
 
 from framework.guid.model import Guid
@@ -22,11 +31,23 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
     Properly handles pagination of embedded objects.
 
+    Views that set `cursor_pagination = True` also support keyset pagination: passing `page[cursor]`
+    (empty for the first page) pages through the results by the view's ordering fields rather than by
+    page number, so deep pages cost the same as the first one. The cursor condition is added to
+    `get_query_from_request`, so a view may only opt in if its queryset is exactly
+    `<schema>.find(self.get_query_from_request())`; other views ignore `page[cursor]`.
+    The total count is only computed in cursor mode if `page[total]` is truthy.
+
     """
 
     page_size_query_param = 'page[size]'
     max_page_size = MAX_PAGE_SIZE
 
+    cursor_query_param = 'page[cursor]'
+    cursor_total_query_param = 'page[total]'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_mode = False
+
     def page_number_query(self, url, page_number):
         """
         Builds uri and adds page param.
@@ -62,7 +83,32 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         page_number = self.page.next_page_number()
         return self.page_number_query(url, page_number)
 
+    def cursor_query(self, url, cursor):
+        """
+        Builds uri and adds cursor param.
+        """
+        url = remove_query_param(self.request.build_absolute_uri(url), '_')
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor or '')
+
+    def get_cursor_response_dict(self, data, url):
+        return OrderedDict([
+            ('data', data),
+            ('links', OrderedDict([
+                ('first', self.cursor_query(url, None) if self.previous_cursor else None),
+                ('last', None),
+                ('prev', self.cursor_query(url, self.previous_cursor) if self.previous_cursor else None),
+                ('next', self.cursor_query(url, self.next_cursor) if self.next_cursor else None),
+                ('meta', OrderedDict([
+                    ('total', self.cursor_total),
+                    ('per_page', self.cursor_page_size),
+                ]))
+            ])),
+        ])
+
     def get_response_dict(self, data, url):
+        if self.cursor_mode:
+            return self.get_cursor_response_dict(data, url)
         return OrderedDict([
             ('data', data),
             ('links', OrderedDict([
@@ -124,9 +170,114 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             self.request = request
             return list(self.page)
 
+        elif self.cursor_query_param in request.query_params and self.supports_cursor(queryset, view):
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+
         else:
             return super(JSONAPIPagination, self).paginate_queryset(queryset, request, view=None)
 
+    def supports_cursor(self, queryset, view):
+        return getattr(view, 'cursor_pagination', False) and isinstance(queryset, modularodm_queryset.BaseQuerySet)
+
+    def get_cursor_ordering(self, request, queryset, view):
+        """Ordering of the view, with `_id` appended as a tiebreaker so that every cursor position is unique."""
+        ordering = list(ODMOrderingFilter().get_ordering(request, queryset, view) or [])
+        if '_id' not in [field.lstrip('-') for field in ordering]:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-_id' if descending else '_id')
+        return ordering
+
+    def encode_cursor(self, obj, ordering, direction):
+        values = []
+        for field in ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = {'$date': value.isoformat()}
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps({'v': values, 'd': direction}))
+
+    def decode_cursor(self, encoded):
+        """Returns `(values, direction)` for the encoded cursor, or `None` for the first page.
+
+        :raises InvalidQueryStringError: If the cursor cannot be decoded
+        """
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(str(encoded)))
+            values = [
+                date_parser.parse(value['$date']) if isinstance(value, dict) else value
+                for value in cursor['v']
+            ]
+            direction = cursor['d']
+        except (TypeError, ValueError, KeyError):
+            raise InvalidQueryStringError(detail=self.invalid_cursor_message, parameter=self.cursor_query_param)
+        if direction not in ('next', 'prev'):
+            raise InvalidQueryStringError(detail=self.invalid_cursor_message, parameter=self.cursor_query_param)
+        return values, direction
+
+    def get_cursor_query(self, ordering, values, reverse):
+        """Build the keyset condition selecting every record strictly after (or before, if `reverse`)
+        the cursor position, i.e. `(a > x) | (a == x & b > y) | ...` for ordering `(a, b, ...)`.
+        """
+        if len(values) != len(ordering):
+            raise InvalidQueryStringError(detail=self.invalid_cursor_message, parameter=self.cursor_query_param)
+        query = None
+        equal = None
+        for field, value in zip(ordering, values):
+            descending = field.startswith('-')
+            field = field.lstrip('-')
+            op = 'gt' if descending == reverse else 'lt'
+            clause = Q(field, op, value)
+            if equal is not None:
+                clause = equal & clause
+            query = clause if query is None else query | clause
+            equal_clause = Q(field, 'eq', value)
+            equal = equal_clause if equal is None else equal & equal_clause
+        return query
+
+    def paginate_queryset_by_cursor(self, queryset, request, view):
+        """
+        Keyset pagination of an ODM queryset. Rather than skipping over the preceding pages, the
+        query for the view is narrowed to the records after (or before) the cursor position.
+        """
+        self.request = request
+        self.cursor_mode = True
+        self.cursor_page_size = self.get_page_size(request)
+        ordering = self.get_cursor_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request.query_params[self.cursor_query_param])
+        reverse = cursor is not None and cursor[1] == 'prev'
+
+        query = view.get_query_from_request()
+        if cursor is not None:
+            cursor_query = self.get_cursor_query(ordering, cursor[0], reverse)
+            query = query & cursor_query if query else cursor_query
+
+        sort = ordering
+        if reverse:
+            sort = [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+        results = list(queryset.schema.find(query).sort(*sort).limit(self.cursor_page_size + 1))
+        has_more = len(results) > self.cursor_page_size
+        results = results[:self.cursor_page_size]
+        if reverse:
+            results.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = cursor is not None, has_more
+
+        self.previous_cursor = None
+        self.next_cursor = None
+        if results and has_previous:
+            self.previous_cursor = self.encode_cursor(results[0], ordering, 'prev')
+        if results and has_next:
+            self.next_cursor = self.encode_cursor(results[-1], ordering, 'next')
+
+        self.cursor_total = None
+        if is_truthy(request.query_params.get(self.cursor_total_query_param, False)):
+            self.cursor_total = queryset.count()
+        return results
+
 
 class CommentPagination(JSONAPIPagination):
 
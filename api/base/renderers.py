@@ -1,17 +1,86 @@
-import re
+import uuid
+
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, StaticHTMLRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ESIInclude(object):
+    """
+    An ESI include, emitted by serializers in place of an embedded representation. Rendered
+    as a raw `<esi:include>` tag rather than as a JSON string.
+    """
+
+    def __init__(self, src):
+        self.src = src
+
+    def __str__(self):
+        return '<esi:include src="{}"/>'.format(self.src)
+
+    def __repr__(self):
+        return '<ESIInclude({!r})>'.format(self.src)
+
+    def __eq__(self, other):
+        return isinstance(other, ESIInclude) and other.src == self.src
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class ESIJSONEncoder(JSONEncoder):
+    """
+    Encodes each ESI include as a placeholder string and keeps track of the includes, so they
+    can be spliced into the output in a single pass once it has been encoded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ESIJSONEncoder, self).__init__(*args, **kwargs)
+        self.includes = []
+        # Unique per response, so that no string in the data can be mistaken for a placeholder
+        self.placeholder = '__esi_{}_'.format(uuid.uuid4().hex)
+
+    def default(self, obj):
+        if isinstance(obj, ESIInclude):
+            self.includes.append(obj)
+            return '{}{}'.format(self.placeholder, len(self.includes) - 1)
+        return super(ESIJSONEncoder, self).default(obj)
+
+    def splice(self, encoded):
+        """Replace the quoted placeholders in `encoded` with the raw include tags."""
+        pieces = encoded.split('"{}'.format(self.placeholder))
+        spliced = [pieces[0]]
+        for piece in pieces[1:]:
+            index, rest = piece.split('"', 1)
+            spliced.append(str(self.includes[int(index)]))
+            spliced.append(rest)
+        return ''.join(spliced)
 
 
 class JSONRendererWithESISupport(JSONRenderer):
     format = 'json'
     media_type = 'application/json'
+    encoder_class = ESIJSONEncoder
+    # ASCII output is already bytes and can't contain U+2028/U+2029, so it needs neither the
+    # escaping nor the re-encoding pass that unicode output goes through.
+    ensure_ascii = True
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        #  TODO: There should be a way to do this that is conditional on esi being requested and
-        #  TODO: In such a way that it doesn't use regex unless there's absolutely no other way.
-        initial_rendering = super(JSONRendererWithESISupport, self).render(data, accepted_media_type, renderer_context)
-        augmented_rendering = re.sub(r'"<esi:include src=\\"(.*?)\\"\/>"', r'<esi:include src="\1"/>', initial_rendering)
-        return augmented_rendering
+        if data is None:
+            return bytes()
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is None:
+            separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        else:
+            separators = INDENT_SEPARATORS
+
+        encoder = self.encoder_class(indent=indent, ensure_ascii=self.ensure_ascii, separators=separators)
+        ret = encoder.encode(data)
+        # Only responses that the serializers actually put ESI includes in need splicing
+        if encoder.includes:
+            ret = encoder.splice(ret)
+        return ret
 
 
 class JSONAPIRenderer(JSONRendererWithESISupport):
@@ -16,6 +16,7 @@ from api.base.exceptions import Conflict
 from api.base.exceptions import JSONAPIException
 from api.base.exceptions import TargetNotSupportedError
 from api.base.exceptions import RelationshipPostMakesNoChanges
+from api.base.renderers import ESIInclude
 from api.base.settings import BULK_SETTINGS
 from api.base.utils import absolute_reverse, extend_querystring_params
 from framework.auth import core as auth_core
@@ -535,7 +536,7 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 if 'view_only' in self.parent.context['request'].query_params.keys():
                     query_dict.update(view_only=[self.parent.context['request'].query_params['view_only']])
                 esi_url = extend_querystring_params(href, query_dict)
-                return '<esi:include src="{}"/>'.format(esi_url)
+                return ESIInclude(esi_url)
 
     def format_filter(self, obj):
         qd = QueryDict(mutable=True)
@@ -671,7 +672,7 @@ class TargetField(ser.Field):
 
         if href:
             esi_url = extend_querystring_params(href, dict(envelope=[envelope, ], format=['jsonapi', ]))
-            return '<esi:include src="{}"/>'.format(esi_url)
+            return ESIInclude(esi_url)
         return self.to_representation(value)
 
     def to_representation(self, value):
@@ -956,7 +957,7 @@ class JSONAPISerializer(ser.Serializer):
         if href and href != '{}':
             esi_url = furl.furl(href).add(args=dict(self.context['request'].query_params)).remove(
                 args=query_params_blacklist).remove(args=['envelope']).add(args={'envelope': envelope}).url
-            return '<esi:include src="{}"/>'.format(esi_url)
+            return ESIInclude(esi_url)
         # failsafe, let python do it if something bad happened in the ESI construction
         return super(JSONAPISerializer, self).to_representation(data)
 
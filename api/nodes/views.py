@@ -259,6 +259,7 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
     view_name = 'node-list'
 
     ordering = ('-date_modified', )  # default ordering
+    cursor_pagination = True  # get_queryset is Node.find(self.get_query_from_request()) for GET
 
     # overrides ODMFilterMixin
     def get_default_odm_query(self):
@@ -2443,6 +2444,7 @@ class NodeLogList(JSONAPIBaseView, generics.ListAPIView, NodeMixin, ODMFilterMix
     log_lookup_url_kwarg = 'node_id'
 
     ordering = ('-date', )
+    cursor_pagination = True  # get_queryset is NodeLog.find(self.get_query_from_request())
 
     permission_classes = (
         drf_permissions.IsAuthenticatedOrReadOnly,
@@ -2456,6 +2458,14 @@ class NodeLogList(JSONAPIBaseView, generics.ListAPIView, NodeMixin, ODMFilterMix
         query = self.get_node().get_aggregate_logs_query(auth)
         return query
 
+    # overrides ODMFilterMixin
+    def get_query_from_request(self):
+        # Both get_queryset and cursor pagination need the query, and building the aggregate logs
+        # query walks the node's tree, so build it once per request
+        if getattr(self, '_query', None) is None:
+            self._query = super(NodeLogList, self).get_query_from_request()
+        return self._query
+
     def get_queryset(self):
         queryset = NodeLog.find(self.get_query_from_request())
         return queryset
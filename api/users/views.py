@@ -491,6 +491,7 @@ class UserNodes(JSONAPIBaseView, generics.ListAPIView, UserMixin, ODMFilterMixin
     view_name = 'user-nodes'
 
     ordering = ('-date_modified',)
+    cursor_pagination = True  # get_queryset is Node.find(self.get_query_from_request())
 
     # overrides ODMFilterMixin
     def get_default_odm_query(self):
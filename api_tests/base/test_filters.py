@@ -68,6 +68,24 @@ class FakeListView(ListFilterMixin):
 
     serializer_class = FakeSerializer
 
+class FakeMethodSerializer(ser.Serializer):
+
+    filterable_fields = ('method_field', )
+
+    method_field = ser.SerializerMethodField()
+
+    def get_method_field(self, obj):
+        return str(obj.int_field)
+
+class FakeMethodListView(ListFilterMixin):
+
+    serializer_class = FakeMethodSerializer
+    serializer_calls = 0
+
+    def get_serializer(self):
+        self.serializer_calls += 1
+        return self.serializer_class()
+
 
 class TestFilterMixin(ApiTestCase):
 
@@ -329,6 +347,35 @@ class TestListFilterMixin(ApiTestCase):
         assert_equal(parsed_field ['value'], False)
         assert_equal(parsed_field ['op'], 'eq')
 
+    def test_param_queryset_preserves_order_of_default_queryset(self):
+        query_params = {
+            'filter[string_field]': 'foo',
+            'filter[bool_field]': 'true',
+        }
+        default_queryset = [
+            FakeRecord(_id=5, string_field='foobaz'),
+            FakeRecord(_id=3, string_field='bar'),
+            FakeRecord(_id=4, string_field='Foo', foobar=False),
+            FakeRecord(_id=1, string_field='FOO'),
+            FakeRecord(_id=2, string_field='afoo'),
+        ]
+        filtered = self.view.param_queryset(query_params, default_queryset)
+        assert_equal([record._id for record in filtered], [5, 1, 2])
+
+    def test_param_queryset_resolves_serializer_method_once(self):
+        view = FakeMethodListView()
+        query_params = {
+            'filter[method_field]': '42',
+        }
+        default_queryset = [
+            FakeRecord(_id=1, int_field=42),
+            FakeRecord(_id=2, int_field=41),
+            FakeRecord(_id=3, int_field=42),
+        ]
+        filtered = view.param_queryset(query_params, default_queryset)
+        assert_equal([record._id for record in filtered], [1, 3])
+        assert_equal(view.serializer_calls, 1)
+
 
 class TestODMOrderingFilter(ApiTestCase):
     class query:
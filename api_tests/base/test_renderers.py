@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+
+from nose.tools import *  # flake8: noqa
+
+from api.base.renderers import ESIInclude, JSONAPIRenderer
+
+from tests.base import ApiTestCase
+
+
+class TestJSONAPIRenderer(ApiTestCase):
+
+    def setUp(self):
+        super(TestJSONAPIRenderer, self).setUp()
+        self.renderer = JSONAPIRenderer()
+
+    def test_render_without_includes(self):
+        data = {'data': [{'id': 'abcde', 'attributes': {'title': u'Ünïcode \u2028'}}]}
+        rendered = self.renderer.render(data)
+        assert_true(isinstance(rendered, bytes))
+        assert_not_in(u'\u2028'.encode('utf-8'), rendered)
+        assert_equal(json.loads(rendered), data)
+
+    def test_render_splices_includes(self):
+        data = {
+            'data': [
+                ESIInclude('/v2/nodes/abcde/?envelope=&format=jsonapi'),
+                {'embeds': {'children': ESIInclude('/v2/nodes/fghij/children/')}},
+            ]
+        }
+        rendered = self.renderer.render(data)
+        assert_equal(
+            rendered,
+            '{"data":[<esi:include src="/v2/nodes/abcde/?envelope=&format=jsonapi"/>,'
+            '{"embeds":{"children":<esi:include src="/v2/nodes/fghij/children/"/>}}]}'
+        )
+
+    def test_render_leaves_lookalike_strings(self):
+        data = {'data': {'title': '<esi:include src="/v2/nodes/abcde/"/>'}, 'meta': ESIInclude('/v2/')}
+        rendered = self.renderer.render(data, renderer_context={})
+        assert_in('"title":"<esi:include src=\\"/v2/nodes/abcde/\\"/>"', rendered)
+        assert_in('"meta":<esi:include src="/v2/"/>', rendered)
+
+    def test_render_none(self):
+        assert_equal(self.renderer.render(None), b'')
@@ -42,3 +42,12 @@ class TestInstitutionNodeList(ApiTestCase):
         assert_in(self.node1._id, ids)
         assert_not_in(self.node2._id, ids)
         assert_not_in(self.node3._id, ids)
+
+    def test_cursor_is_ignored(self):
+        res = self.app.get('{}?page[cursor]='.format(self.institution_node_url))
+
+        assert_equal(res.status_code, 200)
+        ids = [each['id'] for each in res.json['data']]
+
+        assert_equal(ids, [self.node1._id])
+        assert_equal(res.json['links']['meta']['total'], 1)
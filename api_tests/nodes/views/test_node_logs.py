@@ -1,10 +1,11 @@
 import urlparse
 
+import mock
 from nose.tools import *  # flake8: noqa
 from dateutil.parser import parse as parse_date
 
 from framework.auth.core import Auth
-from website.models import NodeLog
+from website.models import Node, NodeLog
 from api.base.settings.defaults import API_BASE
 
 from tests.base import ApiTestCase, assert_datetime_equal
@@ -147,3 +148,52 @@ class TestNodeLogFiltering(TestNodeLogList):
         assert_equal(res.status_code, 200)
         assert_equal(len(res.json['data']), 1)
         assert_equal(res.json['data'][0]['attributes']['action'], 'project_created')
+
+
+class TestNodeLogCursorPagination(TestNodeLogList):
+
+    def setUp(self):
+        super(TestNodeLogCursorPagination, self).setUp()
+        for i in range(4):
+            self.public_project.add_tag('tag{}'.format(i), auth=self.user_auth)
+        self.expected_ids = [log._id for log in reversed(self.public_project.logs)]
+
+    def test_cursor_pages_cover_all_logs_in_order(self):
+        url = '{}?page[size]=2&page[cursor]='.format(self.public_url)
+        seen = []
+        while url:
+            res = self.app.get(url, auth=self.user.auth)
+            assert_equal(res.status_code, 200)
+            assert_is_none(res.json['links']['meta']['total'])
+            seen.extend(log['id'] for log in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(seen, self.expected_ids)
+
+    def test_cursor_prev_link_returns_previous_page(self):
+        url = '{}?page[size]=2&page[cursor]='.format(self.public_url)
+        first = self.app.get(url, auth=self.user.auth)
+        assert_is_none(first.json['links']['prev'])
+        second = self.app.get(first.json['links']['next'], auth=self.user.auth)
+        res = self.app.get(second.json['links']['prev'], auth=self.user.auth)
+        assert_equal(
+            [log['id'] for log in res.json['data']],
+            [log['id'] for log in first.json['data']]
+        )
+
+    def test_cursor_total_is_optional(self):
+        url = '{}?page[size]=2&page[cursor]=&page[total]=true'.format(self.public_url)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.json['links']['meta']['total'], len(self.expected_ids))
+
+    def test_aggregate_logs_query_built_once(self):
+        url = '{}?page[size]=2&page[cursor]='.format(self.public_url)
+        original = Node.get_aggregate_logs_query
+        with mock.patch.object(Node, 'get_aggregate_logs_query', autospec=True, side_effect=original) as mock_query:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(mock_query.call_count, 1)
+
+    def test_invalid_cursor(self):
+        url = '{}?page[cursor]=notacursor'.format(self.public_url)
+        res = self.app.get(url, auth=self.user.auth, expect_errors=True)
+        assert_equal(res.status_code, 400)
@@ -6,35 +6,26 @@ from datetime import datetime
 
 from dateutil import parser
 
+from framework.analytics.counters import BloomFilter, counter_buffer
 from framework.mongo import database
 from framework.postcommit_tasks.handlers import run_postcommit
 from framework.sessions import session
-from framework.celery_tasks import app
 
 from flask import request
 
 collection = database['pagecounters']
 
-@run_postcommit(once_per_request=False, celery=True)
-@app.task(max_retries=5, default_retry_delay=60)
+@run_postcommit(once_per_request=False)
 def increment_user_activity_counters(user_id, action, date_string, db=None):
     db = db or database  # default to local proxy
-    collection = database['useractivitycounters']
+    collection = db['useractivitycounters']
     date = parser.parse(date_string).strftime('%Y/%m/%d')
-    query = {
-        '$inc': {
-            'total': 1,
-            'date.{0}.total'.format(date): 1,
-            'action.{0}.total'.format(action): 1,
-            'action.{0}.date.{1}'.format(action, date): 1,
-        }
-    }
-    collection.update(
-        {'_id': user_id},
-        query,
-        upsert=True,
-        manipulate=False,
-    )
+    counter_buffer.increment(collection, user_id, {
+        'total': 1,
+        'date.{0}.total'.format(date): 1,
+        'action.{0}.total'.format(action): 1,
+        'action.{0}.date.{1}'.format(action, date): 1,
+    })
     return True
 
 
@@ -44,9 +35,10 @@ def get_total_activity_count(user_id, db=None):
     result = collection.find_one(
         {'_id': user_id}, {'total': 1}
     )
+    pending = counter_buffer.pending(collection, user_id).get('total', 0)
     if result and 'total' in result:
-        return result['total']
-    return 0
+        return result['total'] + pending
+    return pending
 
 
 def clean_page(page):
@@ -75,8 +67,20 @@ def build_page(rex, kwargs):
     except KeyError:
         return None
 
+def load_visited(value):
+    """Load a Bloom filter of visited pages from session data. A full filter is replaced by an
+    empty one: a page visited before may then be counted as unique again, whereas a filter kept
+    past its capacity would report more and more new pages as visited.
+    """
+    visited = BloomFilter.deserialize(value)
+    return BloomFilter() if visited.is_full else visited
+
+
 def update_counter(page, db=None):
-    """Update counters for page.
+    """Update counters for page. Increments are buffered; see `counter_buffer`.
+
+    Pages visited by the current session are remembered in Bloom filters, so a session's
+    data stays the same size however many pages it visits.
 
     :param str page: Colon-delimited page key in analytics collection
     :param db: MongoDB database or `None`
@@ -89,35 +93,26 @@ def update_counter(page, db=None):
 
     page = clean_page(page)
 
-    d = {'$inc': {}}
-
-    visited_by_date = session.data.get('visited_by_date')
-    if not visited_by_date:
-        visited_by_date = {'date': date, 'pages': []}
+    increments = {
+        'total': 1,
+        'date.%s.total' % date: 1,
+    }
 
-    if date == visited_by_date['date']:
-        if page not in visited_by_date['pages']:
-            d['$inc']['date.%s.unique' % date] = 1
-            visited_by_date['pages'].append(page)
-            session.data['visited_by_date'] = visited_by_date
+    visited_by_date = session.data.get('visited_by_date') or {}
+    if visited_by_date.get('date') == date:
+        pages = load_visited(visited_by_date['pages'])
     else:
-        visited_by_date['date'] = date
-        visited_by_date['pages'] = []
-        d['$inc']['date.%s.unique' % date] = 1
-        visited_by_date['pages'].append(page)
-        session.data['visited_by_date'] = visited_by_date
+        pages = BloomFilter()
+    if pages.add(page):
+        increments['date.%s.unique' % date] = 1
+        session.data['visited_by_date'] = {'date': date, 'pages': pages.serialize()}
 
-    d['$inc']['date.%s.total' % date] = 1
+    visited = load_visited(session.data.get('visited'))
+    if visited.add(page):
+        increments['unique'] = 1
+        session.data['visited'] = visited.serialize()
 
-    visited = session.data.get('visited')  # '/project/x/, project/y/'
-    if not visited:
-        visited = []
-    if page not in visited:
-        d['$inc']['unique'] = 1
-        visited.append(page)
-        session.data['visited'] = visited
-    d['$inc']['total'] = 1
-    collection.update({'_id': page}, d, True, False)
+    counter_buffer.increment(collection, page, increments)
 
 
 def update_counters(rex, db=None):
@@ -149,11 +144,29 @@ def get_basic_counters(page, db=None):
         {'_id': clean_page(page)},
         {'total': 1, 'unique': 1}
     )
-    if result:
-        if 'unique' in result:
-            unique = result['unique']
-        if 'total' in result:
-            total = result['total']
+    pending = counter_buffer.pending(collection, clean_page(page))
+    if result or pending:
+        result = result or {}
+        unique = result.get('unique', 0) + pending.get('unique', 0)
+        total = result.get('total', 0) + pending.get('total', 0)
         return unique, total
     else:
         return None, None
+
+
+def get_total_counters(pages, db=None):
+    """Like `get_basic_counters`, for many pages at once.
+
+    :return: Dictionary of page to total count, with 0 for pages without a counter
+    """
+    db = db or database
+    collection = db['pagecounters']
+    cleaned = {page: clean_page(page) for page in pages}
+    totals = {
+        result['_id']: result.get('total', 0)
+        for result in collection.find({'_id': {'$in': list(set(cleaned.values()))}}, {'total': 1})
+    }
+    return {
+        page: totals.get(_id, 0) + counter_buffer.pending(collection, _id).get('total', 0)
+        for page, _id in cleaned.items()
+    }
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""In-process aggregation of analytics counters."""
+
+import math
+import base64
+import atexit
+import struct
+import hashlib
+import logging
+import threading
+import collections
+
+from framework.mongo.handlers import CLIENT_POOL
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer(object):
+    """Aggregate `$inc` updates in process, per collection and document. A thread of the buffer
+    writes them out every `interval` seconds, or as soon as `max_keys` documents have pending
+    increments, with a database client of its own: the writes are never part of a request's
+    transaction, so a request that fails does not take the increments of others with it.
+
+    Buffered increments are flushed when the process exits; those held by a process that dies
+    are lost.
+    """
+
+    def __init__(self, interval, max_keys):
+        self.interval = interval
+        self.max_keys = max_keys
+        self._pending = {}
+        # Increments taken by a flush and not yet written, which reads still have to count
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._due = threading.Event()
+        self._thread = None
+
+    def increment(self, collection, _id, increments):
+        """Add `increments`, a dict of field name to amount, to the document `_id` of `collection`."""
+        key = (collection.database.name, collection.name, _id)
+        with self._lock:
+            self._pending.setdefault(key, collections.Counter()).update(increments)
+            due = len(self._pending) >= self.max_keys
+            # Started on first use, so that each process forked after import gets its own
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        if due:
+            self._due.set()
+
+    def _run(self):
+        while True:
+            self._due.wait(self.interval)
+            self._due.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush counters')
+
+    def pending(self, collection, _id):
+        """Return the increments not yet written to the document `_id` of `collection`."""
+        key = (collection.database.name, collection.name, _id)
+        with self._lock:
+            counts = collections.Counter(self._pending.get(key))
+            counts.update(self._in_flight.get(key) or {})
+            return dict(counts)
+
+    def flush(self):
+        """Write out all pending increments with one upsert per document.
+
+        :return: Number of documents updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for key, counts in pending.iteritems():
+                self._in_flight.setdefault(key, collections.Counter()).update(counts)
+        if not pending:
+            return 0
+        # Keyed apart from the client of the current thread, which may be in a request transaction
+        client_id = (self.__class__.__name__, threading.current_thread().ident)
+        client = CLIENT_POOL.acquire(client_id)
+        try:
+            for key, counts in pending.iteritems():
+                db_name, collection_name, _id = key
+                try:
+                    client[db_name][collection_name].update({'_id': _id}, {'$inc': dict(counts)}, upsert=True, manipulate=False)
+                except Exception:
+                    logger.exception('Could not flush counters of {}'.format(_id))
+                finally:
+                    with self._lock:
+                        self._in_flight[key].subtract(counts)
+                        if not any(self._in_flight[key].values()):
+                            del self._in_flight[key]
+        finally:
+            CLIENT_POOL.release(client_id)
+        return len(pending)
+
+
+class BloomFilter(object):
+    """A set of strings that may report false positives but never false negatives. It is sized for
+    `capacity` items at a false positive rate of `error_rate`; once `is_full`, more items would
+    push the rate above it. Serializes to a short string, so it can be kept in session data.
+    """
+
+    def __init__(self, value=None, capacity=500, error_rate=0.01):
+        self.capacity = capacity
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(float(self.size) / capacity * math.log(2))))
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+        # Filters of another size, e.g. serialized before it changed, are dropped
+        if value and len(value) == 4 + len(self.bits):
+            self.count = struct.unpack_from('<I', value)[0]
+            self.bits = bytearray(value[4:])
+
+    def _positions(self, item):
+        if isinstance(item, unicode):
+            item = item.encode('utf-8')
+        first, second = struct.unpack_from('<QQ', hashlib.md5(item).digest())
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << position % 8) for position in self._positions(item))
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def add(self, item):
+        """Add `item`; return False if it was (probably) already present."""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << position % 8
+            if not self.bits[position // 8] & mask:
+                self.bits[position // 8] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def serialize(self):
+        return base64.b64encode(struct.pack('<I', self.count) + bytes(self.bits))
+
+    @classmethod
+    def deserialize(cls, value):
+        """Load a serialized filter. Lists of pages, as stored by earlier versions, are converted."""
+        if isinstance(value, list):
+            bloom = cls()
+            for item in value:
+                bloom.add(item)
+            return bloom
+        return cls(base64.b64decode(value)) if value else cls()
+
+
+counter_buffer = CounterBuffer(settings.ANALYTICS_FLUSH_INTERVAL, settings.ANALYTICS_FLUSH_MAX_KEYS)
+atexit.register(counter_buffer.flush)
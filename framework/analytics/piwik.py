@@ -189,12 +189,13 @@ def _provision_node(node_id):
 
 class PiwikClient(object):
     def __init__(self, url,
-                 auth_token=None, site_id=None, period=None, date=None):
+                 auth_token=None, site_id=None, period=None, date=None, timeout=None):
         self.url = url
         self.auth_token = auth_token
         self.site_id = site_id
         self.period = period
         self.date = date
+        self.timeout = timeout
 
     @property
     def custom_variables(self):
@@ -229,7 +230,7 @@ class PiwikClient(object):
         }
         params.update(kwargs)
 
-        return requests.get(self.url, params=params).json()
+        return requests.get(self.url, params=params, timeout=self.timeout).json()
 
 
 class CustomVariableField(object):
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import datetime as dt
-import itertools
 import logging
 import re
 import urlparse
@@ -1184,8 +1183,7 @@ class User(GuidStoredObject, AddonModelMixin):
         self.username = self.username.lower().strip() if self.username else None
         ret = super(User, self).save(*args, **kwargs)
         if self.SEARCH_UPDATE_FIELDS.intersection(ret) and self.is_confirmed:
-            self.update_search()
-            self.update_search_nodes_contributors()
+            self.schedule_search_update()
         if settings.PIWIK_HOST and not self.piwik_token:
             piwik_tasks.update_user(self._id)
         return ret
@@ -1198,6 +1196,17 @@ class User(GuidStoredObject, AddonModelMixin):
             logger.exception(e)
             log_exception()
 
+    def schedule_search_update(self):
+        """Re-index this user and the contributor lists of their nodes in the background,
+        coalescing repeated saves into one update.
+        """
+        from website import search
+        try:
+            search.search.schedule_user_update(self)
+        except search.exceptions.SearchUnavailableError as e:
+            logger.exception(e)
+            log_exception()
+
     @classmethod
     def find_by_email(cls, email):
         try:
@@ -1250,6 +1259,8 @@ class User(GuidStoredObject, AddonModelMixin):
                     each.__class__.remove_one(each)
                     self.watched.remove(each)
                     self.save()
+                from website.project.counts import invalidate_node_counts  # Avoid circular import
+                invalidate_node_counts(watch_config.node._id)
                 return None
         raise ValueError('Node not being watched.')
 
@@ -1258,31 +1269,46 @@ class User(GuidStoredObject, AddonModelMixin):
         watched_node_ids = set([config.node._id for config in self.watched])
         return node._id in watched_node_ids
 
-    def get_recent_log_ids(self, since=None):
-        '''Return a generator of recent logs' ids.
+    def get_recent_log_ids(self, since=None, before=None, limit=None):
+        '''Return a generator of recent logs' ids, newest first.
+
+        The logs of all watched nodes are read with a single query on the
+        (node, _id) index, filtering by the creation time encoded in log ids.
 
         :param since: A datetime specifying the oldest time to retrieve logs
         from. If ``None``, defaults to 60 days before today. Must be a tz-aware
         datetime because PyMongo's generation times are tz-aware.
+        :param str before: Only return logs older than the log with this id,
+        e.g. the last one of the previous page
+        :param int limit: Maximum number of ids to return
 
         :rtype: generator of log ids (strings)
         '''
-        log_ids = []
+        from website.models import WatchConfig  # Avoid circular import
         # Default since to 60 days before today if since is None
         # timezone aware utcnow
         utcnow = dt.datetime.utcnow().replace(tzinfo=pytz.utc)
         since_date = since or (utcnow - dt.timedelta(days=60))
-        for config in self.watched:
-            # Extract the timestamps for each log from the log_id (fast!)
-            # The first 4 bytes of Mongo's ObjectId encodes time
-            # This prevents having to load each Log Object and access their
-            # date fields
-            node_log_ids = [log.pk for log in config.node.logs
-                                   if bson.ObjectId(log.pk).generation_time > since_date and
-                                   log.pk not in log_ids]
-            # Log ids in reverse chronological order
-            log_ids = _merge_into_reversed(log_ids, node_log_ids)
-        return (l_id for l_id in log_ids)
+        watched_ids = self.watched._to_primary_keys()
+        node_ids = list(set(
+            config.to_storage()['node']
+            for config in WatchConfig.find(Q('_id', 'in', watched_ids))
+        )) if watched_ids else []
+        if not node_ids:
+            return (l_id for l_id in [])
+        # The first 4 bytes of Mongo's ObjectId encodes time, so log ids
+        # sort chronologically and can be filtered by date without loading
+        # the logs themselves
+        id_range = {'$gte': str(bson.ObjectId.from_datetime(since_date))}
+        if before:
+            id_range['$lt'] = before
+        logs = framework.mongo.database['nodelog'].find(
+            {'node': {'$in': node_ids}, '_id': id_range},
+            {'_id': True},
+        ).sort('_id', -1)
+        if limit:
+            logs = logs.limit(limit)
+        return (log['_id'] for log in logs)
 
     def get_daily_digest_log_ids(self):
         '''Return a generator of log ids generated in the past day
@@ -1505,9 +1531,3 @@ class User(GuidStoredObject, AddonModelMixin):
         """
         default_timestamp = dt.datetime(1970, 1, 1, 12, 0, 0)
         return self.comments_viewed_timestamp.get(target_id, default_timestamp)
-
-
-def _merge_into_reversed(*iterables):
-    '''Merge multiple sorted inputs into a single output in reverse order.
-    '''
-    return sorted(itertools.chain(*iterables), reverse=True)
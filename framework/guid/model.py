@@ -1,14 +1,9 @@
 # -*- coding: utf-8 -*-
-import random
-
 import pymongo
 from modularodm import fields
 
 from framework.mongo import StoredObject
-
-from modularodm.storage.base import KeyExistsException
-
-ALPHABET = '23456789abcdefghjkmnpqrstuvwxyz'
+from framework.guid.pool import ALPHABET, get_guid_pool  # noqa
 
 
 class BlacklistGuid(StoredObject):
@@ -27,24 +22,11 @@ class Guid(StoredObject):
     referent = fields.AbstractForeignField()
 
     @classmethod
-    def generate(self, referent=None, min_length=5):
-        while True:
-            # Create GUID
-            guid_id = ''.join(random.sample(ALPHABET, min_length))
-
-            # Check GUID against blacklist
-            blacklist_guid = BlacklistGuid.load(guid_id)
-            if not blacklist_guid:
-                try:
-                    guid = Guid(_id=guid_id)
-                    guid.save()
-                    break
-                except KeyExistsException:
-                    pass
-        if referent:
-            guid.referent = referent
-            guid.save()
-        return guid
+    def generate(cls, referent=None, min_length=5):
+        """Create a GUID with an id taken from the pool of reserved ids of length `min_length`."""
+        referent = (referent._primary_key, referent._name) if referent else None
+        guid_id = get_guid_pool(min_length).allocate(referent)
+        return cls.load(guid_id, data={'_id': guid_id, 'referent': referent})
 
     def __repr__(self):
         return '<id:{0}, referent:({1}, {2})>'.format(self._id, self.referent._primary_key, self.referent._name)
@@ -82,13 +64,11 @@ class GuidStoredObject(StoredObject):
             )
             guid.save()
 
-        # Else create GUID optimistically
+        # Else take a reserved GUID and point it to self
         else:
-            guid = Guid.generate(min_length=self.__guid_min_length__)
-            guid.referent = (guid._primary_key, self._name)
-            guid.save()
+            pool = get_guid_pool(self.__guid_min_length__)
             # Set primary key to GUID key
-            self._primary_key = guid._primary_key
+            self._primary_key = pool.allocate(referent_name=self._name)
 
     def save(self, *args, **kwargs):
         """Ensure GUID on save."""
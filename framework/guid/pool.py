@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""In-process pools of reserved GUIDs.
+
+Ids are reserved in batches: random candidates are checked against the blacklist and existing
+GUIDs with one query each, then inserted without a referent. Inserted ids belong to the pool that
+inserted them, so handing one out only takes the write that points it at its referent. Pools are
+refilled in the background when they run low, with a client of their own so that the batch is not
+part of any request's transaction. When a pool runs out, the one id the caller needs is reserved
+synchronously.
+
+Reserved ids that are never handed out, e.g. because the process exits, are left in the database
+without a referent, like GUIDs whose referent was removed.
+"""
+import random
+import logging
+import threading
+import collections
+
+from pymongo.errors import DuplicateKeyError
+
+from framework.mongo import database
+from framework.mongo.handlers import CLIENT_POOL
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = '23456789abcdefghjkmnpqrstuvwxyz'
+
+
+class GuidPool(object):
+
+    def __init__(self, length, batch_size, low_water):
+        self.length = length
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self._ids = collections.deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        # Number of candidate ids tried, and of those already taken or blacklisted
+        self.candidates = 0
+        self.collisions = 0
+
+    def generate_candidates(self, count):
+        return set(''.join(random.sample(ALPHABET, self.length)) for _ in range(count))
+
+    def reserve_ids(self, count, db=None):
+        """Reserve up to `count` new ids.
+
+        :param db: Database to reserve them in; defaults to the one of the current thread
+        :return: The reserved ids
+        """
+        db = db if db is not None else database
+        candidates = self.generate_candidates(count)
+        unavailable = set(
+            each['_id'] for each in db['blacklistguid'].find({'_id': {'$in': list(candidates)}}, {'_id': 1})
+        )
+        unavailable.update(
+            each['_id'] for each in db['guid'].find({'_id': {'$in': list(candidates)}}, {'_id': 1})
+        )
+        reserved = []
+        for guid_id in candidates - unavailable:
+            try:
+                db['guid'].insert({'_id': guid_id, 'referent': None})
+            except DuplicateKeyError:
+                # Reserved by another process since it was checked
+                unavailable.add(guid_id)
+            else:
+                reserved.append(guid_id)
+        with self._lock:
+            self.candidates += len(candidates)
+            self.collisions += len(unavailable)
+        return reserved
+
+    def reserve(self, count, db=None):
+        """Reserve up to `count` new ids and add them to the pool.
+
+        :return: Number of ids reserved
+        """
+        reserved = self.reserve_ids(count, db=db)
+        with self._lock:
+            self._ids.extend(reserved)
+        logger.debug('Reserved {} GUIDs of length {}; {}'.format(len(reserved), self.length, self.stats()))
+        return len(reserved)
+
+    def _refill(self):
+        try:
+            # Threads get no client from the request handlers; take one and give it back, so
+            # that neither the client nor its slot in the pool is leaked
+            client = CLIENT_POOL.acquire()
+            try:
+                self.reserve(self.batch_size, db=client[settings.DB_NAME])
+            finally:
+                CLIENT_POOL.release()
+        except Exception:
+            logger.exception('Could not refill GUID pool')
+        finally:
+            self._refilling = False
+
+    def _refill_in_background(self):
+        thread = threading.Thread(target=self._refill)
+        thread.daemon = True
+        thread.start()
+
+    def take(self):
+        """Remove an id from the pool, or reserve a single one if it is empty."""
+        while True:
+            with self._lock:
+                guid_id = self._ids.popleft() if self._ids else None
+                refill = (guid_id is None or len(self._ids) < self.low_water) and not self._refilling
+                if refill:
+                    self._refilling = True
+            if refill:
+                self._refill_in_background()
+            if guid_id is None:
+                reserved = self.reserve_ids(1)
+                if not reserved:
+                    continue
+                guid_id = reserved[0]
+            return guid_id
+
+    def allocate(self, referent=None, referent_name=None):
+        """Hand out an id and point it at its referent, with a single write.
+
+        :param tuple referent: `(primary key, collection name)` of the referent
+        :param str referent_name: Collection name of a referent that takes the id as primary key
+        :return: The id
+        """
+        while True:
+            guid_id = self.take()
+            if referent_name:
+                referent = (guid_id, referent_name)
+            value = list(referent) if referent else None
+            result = database['guid'].update({'_id': guid_id, 'referent': None}, {'$set': {'referent': value}})
+            # The reservation is gone if the insert that made it was rolled back
+            if result['n']:
+                return guid_id
+
+    def stats(self):
+        return {
+            'depth': len(self._ids),
+            'candidates': self.candidates,
+            'collisions': self.collisions,
+            'collision_rate': float(self.collisions) / self.candidates if self.candidates else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+guid_pools = {}
+guid_pools_lock = threading.Lock()
+
+
+def get_guid_pool(length):
+    with guid_pools_lock:
+        if length not in guid_pools:
+            guid_pools[length] = GuidPool(length, settings.GUID_POOL_BATCH_SIZE, settings.GUID_POOL_LOW_WATER)
+        return guid_pools[length]
+
+
+def clear_guid_pools():
+    """Drop all reserved ids held in process, e.g. after the database was reset."""
+    for pool in guid_pools.values():
+        pool.clear()
@@ -16,7 +16,8 @@ from werkzeug.local import LocalProxy
 from framework.flask import redirect
 from framework.mongo import database
 from framework.sessions.model import Session
-from framework.sessions.utils import remove_session
+from framework.sessions.store import ExpiringLRUCache
+from framework.sessions.utils import load_session, remove_session
 from website import settings
 
 
@@ -106,8 +107,17 @@ def create_session(response, data=None):
         return response
 
 
+def update_date_last_login(user_id):
+    """Record that a user is active, at most once every `DATE_LAST_LOGIN_THROTTLE` seconds."""
+    if last_login_updates.get(user_id):
+        return
+    last_login_updates.set(user_id, True)
+    database['user'].update({'_id': user_id}, {'$set': {'date_last_login': datetime.utcnow()}}, w=0)
+
+
 sessions = WeakKeyDictionary()
 session = LocalProxy(get_session)
+last_login_updates = ExpiringLRUCache(settings.SESSION_CACHE_MAX_SIZE, settings.DATE_LAST_LOGIN_THROTTLE)
 
 
 # Request callbacks
@@ -156,19 +166,19 @@ def before_request():
     if cookie:
         try:
             session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
-            user_session = Session.load(session_id) or Session(_id=session_id)
+            user_session = load_session(session_id) or Session(_id=session_id)
         except itsdangerous.BadData:
             return
         if not util_time.throttle_period_expired(user_session.date_created, settings.OSF_SESSION_TIMEOUT):
             if user_session.data.get('auth_user_id') and 'api' not in request.url:
-                database['user'].update({'_id': user_session.data.get('auth_user_id')}, {'$set': {'date_last_login': datetime.utcnow()}}, w=0)
+                update_date_last_login(user_session.data.get('auth_user_id'))
             set_session(user_session)
         else:
             remove_session(user_session)
 
 
 def after_request(response):
-    if session.data.get('auth_user_id'):
+    if session.data.get('auth_user_id') and session.is_dirty:
         session.save()
     # Disallow embedding in frames
     response.headers['X-Frame-Options'] = 'SAMEORIGIN'
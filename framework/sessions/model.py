@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import copy
 
 from bson import ObjectId
 from modularodm import fields
 
 from framework.mongo import StoredObject
+from framework.sessions.store import get_session_store
 
 
 class Session(StoredObject):
@@ -13,6 +15,21 @@ class Session(StoredObject):
     date_modified = fields.DateTimeField(auto_now=True)
     data = fields.DictionaryField()
 
+    def __init__(self, *args, **kwargs):
+        super(Session, self).__init__(*args, **kwargs)
+        self._stored_data = copy.deepcopy(self.data) if self._is_loaded else None
+
+    @property
+    def is_dirty(self):
+        """Whether `data` has changed since the session was loaded or last saved."""
+        return not self._is_loaded or self.data != self._stored_data
+
+    def save(self, *args, **kwargs):
+        ret = super(Session, self).save(*args, **kwargs)
+        self._stored_data = copy.deepcopy(self.data)
+        get_session_store().set(self._id, self.to_storage())
+        return ret
+
     @property
     def is_authenticated(self):
         return 'auth_user_id' in self.data
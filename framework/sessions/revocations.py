@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Markers of removed sessions, in the `sessionrevocation` collection.
+
+Sessions are cached in each process (see `framework.sessions.store`), so removing a session from
+the database does not remove it from the caches of other processes. Removing a session, or every
+session of a user, also records a marker, which every process reads, at most once every
+`SESSION_REVOCATION_CHECK_INTERVAL` seconds, to evict the sessions from its own cache. Cached
+sessions expire after `SESSION_CACHE_TTL` seconds, so markers are only needed for as long; a TTL
+index on `date_created` deletes them afterwards.
+"""
+import datetime
+
+from framework.mongo import database
+
+from website import settings
+
+COLLECTION = 'sessionrevocation'
+
+
+def get_collection():
+    collection = database[COLLECTION]
+    # `ensure_index` is a no-op while pymongo remembers creating the index
+    collection.ensure_index('date_created', expireAfterSeconds=settings.SESSION_CACHE_TTL)
+    return collection
+
+
+def revoke_session(session_id):
+    get_collection().insert({'session': session_id, 'date_created': datetime.datetime.utcnow()})
+
+
+def revoke_user_sessions(user_id):
+    get_collection().insert({'user': user_id, 'date_created': datetime.datetime.utcnow()})
+
+
+def get_revocations():
+    """Return the markers that are not expired yet, as dicts with either a `session` or a `user` id."""
+    return list(get_collection().find({}, {'session': 1, 'user': 1}))
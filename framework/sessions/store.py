@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Caches of stored session data, so that requests bearing a session cookie do not need to
+read the session from the database each time.
+
+Session data is cached by value (as returned by `Session.to_storage`), never as `Session`
+instances, since those are bound to the ODM cache of the request that loaded them.
+"""
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from framework.sessions import revocations
+from website import settings
+
+
+class ExpiringLRUCache(object):
+    """A thread-safe mapping whose entries expire after `ttl` seconds, or never if `ttl` is None,
+    and that evicts its least recently used entries once it holds more than `max_size` of them.
+    """
+
+    def __init__(self, max_size, ttl, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._entries.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= self.clock():
+                return default
+            self._entries[key] = (expires, value)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self.clock() + self.ttl if self.ttl is not None else None, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Delete every entry whose value satisfies `predicate`."""
+        with self._lock:
+            for key, (_, value) in self._entries.items():
+                if predicate(value):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SessionStore(object):
+    """Interface for session caches. Implementations must hand out copies of the data they
+    hold, as callers are free to modify it.
+    """
+
+    def get(self, session_id):
+        """Return the stored data of a session, or None if it is not cached."""
+        raise NotImplementedError
+
+    def set(self, session_id, data):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def delete_for_user(self, user_id):
+        """Drop every cached session authenticated as the given user."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocalSessionStore(SessionStore):
+    """Per-process session cache.
+
+    Other processes are not told when a session is changed, so `ttl` bounds for how long a process
+    may use outdated session data. Removed sessions are evicted sooner: if given,
+    `get_revocations` returns the markers of `framework.sessions.revocations`, which are read
+    before cached sessions are handed out, at most once every `revocation_interval` seconds.
+    """
+
+    def __init__(self, max_size, ttl, clock=time.time, get_revocations=None, revocation_interval=0):
+        self.cache = ExpiringLRUCache(max_size, ttl, clock=clock)
+        self.clock = clock
+        self.get_revocations = get_revocations
+        self.revocation_interval = revocation_interval
+        self._revocations_checked = None
+        # Ids of the markers already applied, so that each marker is applied once
+        self._applied_revocations = set()
+
+    def get(self, session_id):
+        self._evict_revoked()
+        return copy.deepcopy(self.cache.get(session_id))
+
+    def _evict_revoked(self):
+        if self.get_revocations is None:
+            return
+        now = self.clock()
+        if self._revocations_checked is not None and now - self._revocations_checked < self.revocation_interval:
+            return
+        self._revocations_checked = now
+        markers = self.get_revocations()
+        revoked_user_ids = set()
+        for marker in markers:
+            if marker['_id'] in self._applied_revocations:
+                continue
+            if marker.get('session'):
+                self.cache.delete(marker['session'])
+            if marker.get('user'):
+                revoked_user_ids.add(marker['user'])
+        if revoked_user_ids:
+            self.cache.delete_where(lambda data: (data.get('data') or {}).get('auth_user_id') in revoked_user_ids)
+        # Expired markers are no longer returned, and need not be remembered either
+        self._applied_revocations = set(marker['_id'] for marker in markers)
+
+    def set(self, session_id, data):
+        self.cache.set(session_id, copy.deepcopy(data))
+
+    def delete(self, session_id):
+        self.cache.delete(session_id)
+
+    def delete_for_user(self, user_id):
+        self.cache.delete_where(lambda data: (data.get('data') or {}).get('auth_user_id') == user_id)
+
+    def clear(self):
+        self.cache.clear()
+
+
+session_store = LocalSessionStore(
+    settings.SESSION_CACHE_MAX_SIZE,
+    settings.SESSION_CACHE_TTL,
+    get_revocations=revocations.get_revocations,
+    revocation_interval=settings.SESSION_REVOCATION_CHECK_INTERVAL,
+)
+
+
+def get_session_store():
+    return session_store
+
+
+def set_session_store(store):
+    """Replace the session cache, e.g. with a store shared between processes."""
+    global session_store
+    session_store = store
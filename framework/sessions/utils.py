@@ -2,7 +2,9 @@
 
 from modularodm import Q
 
+from framework.sessions import revocations
 from framework.sessions.model import Session
+from framework.sessions.store import get_session_store
 
 
 def remove_sessions_for_user(user):
@@ -14,6 +16,9 @@ def remove_sessions_for_user(user):
     """
 
     Session.remove(Q('data.auth_user_id', 'eq', user._id))
+    get_session_store().delete_for_user(user._id)
+    # Other processes may still have the sessions cached
+    revocations.revoke_user_sessions(user._id)
 
 
 def remove_session(session):
@@ -25,3 +30,23 @@ def remove_session(session):
     """
 
     Session.remove(Q('_id', 'eq', session._id))
+    get_session_store().delete(session._id)
+    revocations.revoke_session(session._id)
+
+
+def load_session(session_id):
+    """
+    Load a session from the session cache, falling back on the DB
+
+    :param session_id: Session primary key
+    :return: Session or None
+    """
+
+    store = get_session_store()
+    data = store.get(session_id)
+    if data is not None:
+        return Session.load(session_id, data=data)
+    session = Session.load(session_id)
+    if session is not None:
+        store.set(session_id, session.to_storage())
+    return session
@@ -2,25 +2,18 @@
 # encoding: utf-8
 
 import os
-import datetime
 import collections
 
 import tabulate
 from modularodm import Q
 from dateutil.relativedelta import relativedelta
 
-from framework.analytics import get_basic_counters
-from framework.mongo.utils import paginated
-
 from website import settings
 from website.app import init_app
-from website.files.models import OsfStorageFile
-from website.files.models import StoredFileNode, TrashedFileNode
-from website.models import User, Node, PrivateLink, NodeLog
+from website.models import User, Node, PrivateLink
 from website.project.utils import CONTENT_NODE_QUERY
-from website.addons.dropbox.model import DropboxUserSettings
 
-from scripts.analytics import profile, tabulate_emails, tabulate_logs
+from scripts.analytics import metrics, profile, tabulate_emails, tabulate_logs
 
 
 def get_active_users(extra=None):
@@ -35,26 +28,6 @@ def get_active_users(extra=None):
     return User.find(query)
 
 
-def get_dropbox_metrics():
-    queryset = DropboxUserSettings.find(Q('deleted', 'eq', False))
-    num_enabled = 0     # of users w/ 1+ DB account connected
-    num_authorized = 0  # of users w/ 1+ DB account connected to 1+ node
-    num_linked = 0      # of users w/ 1+ DB account connected to 1+ node w/ a folder linked
-    for user_settings in queryset:
-        if user_settings.has_auth:
-            num_enabled += 1
-            node_settings_list = [Node.load(guid).get_addon('dropbox') for guid in user_settings.oauth_grants.keys()]
-            if any([ns.has_auth for ns in node_settings_list if ns]):
-                num_authorized += 1
-                if any([(ns.complete and ns.folder) for ns in node_settings_list if ns]):
-                    num_linked += 1
-    return {
-        'enabled': num_enabled,
-        'authorized': num_authorized,
-        'linked': num_linked
-    }
-
-
 def get_private_links():
     return PrivateLink.find(
         Q('is_deleted', 'ne', True)
@@ -69,51 +42,6 @@ def get_folders():
     )
 
 
-def count_user_nodes(users=None):
-    users = users or get_active_users()
-    return [
-        Node.find_for_user(
-            user,
-            subquery=CONTENT_NODE_QUERY
-        ).count()
-        for user in users
-        ]
-
-
-def count_user_logs(user, query=None):
-    if query:
-        query &= Q('user', 'eq', user._id)
-    else:
-        query = Q('user', 'eq', user._id)
-    return NodeLog.find(query).count()
-
-
-def count_users_logs(users=None, query=None):
-    users = users or get_active_users()
-    return [
-        count_user_logs(user, query)
-        for user in users
-    ]
-
-
-def count_at_least(counts, at_least):
-    return len([
-        count for count in counts
-        if count >= at_least
-    ])
-
-
-def count_file_downloads():
-    downloads_unique, downloads_total = 0, 0
-    for record in paginated(OsfStorageFile):
-        page = ':'.join(['download', record.node._id, record._id])
-        unique, total = get_basic_counters(page)
-        downloads_unique += unique or 0
-        downloads_total += total or 0
-        clear_modm_cache()
-    return downloads_unique, downloads_total
-
-
 LogCounter = collections.namedtuple('LogCounter', ['label', 'delta'])
 
 log_counters = [
@@ -127,19 +55,12 @@ log_counters = [
 log_thresholds = [1, 11]
 
 
-def get_log_counts(users):
+def get_log_counts(user_ids):
+    counts = metrics.count_user_logs(user_ids, dict(log_counters))
     rows = []
     for counter in log_counters:
-        counts = count_users_logs(
-            users,
-            (
-                Q('date', 'gte', datetime.datetime.utcnow() - counter.delta)
-                if counter.delta
-                else None
-            ),
-        )
         for threshold in log_thresholds:
-            thresholded = count_at_least(counts, threshold)
+            thresholded = metrics.count_at_least(counts[counter.label], threshold)
             rows.append([
                 'logs-gte-{0}-{1}'.format(threshold, counter.label),
                 thresholded,
@@ -180,41 +101,6 @@ def get_projects_public():
     return projects_public
 
 
-def get_number_downloads_unique_and_total(projects=None):
-    number_downloads_unique = 0
-    number_downloads_total = 0
-
-    projects = projects or get_projects()
-
-    for project in projects:
-        for filenode in OsfStorageFile.find(Q('node', 'eq', project)):
-            for idx, version in enumerate(filenode.versions):
-                page = ':'.join(['download', project._id, filenode._id, str(idx)])
-                unique, total = get_basic_counters(page)
-                number_downloads_unique += unique or 0
-                number_downloads_total += total or 0
-
-        for filenode in TrashedFileNode.find(Q('provider', 'eq', 'osfstorage') & Q('node', 'eq', project) & Q('is_file', 'eq', True)):
-            for idx, version in enumerate(filenode.versions):
-                page = ':'.join(['download', project._id, filenode._id, str(idx)])
-                unique, total = get_basic_counters(page)
-                number_downloads_total += total or 0
-                number_downloads_unique += unique or 0
-
-        clear_modm_cache()
-
-    return number_downloads_unique, number_downloads_total
-
-
-def clear_modm_cache():
-    StoredFileNode._cache.data.clear()
-    StoredFileNode._object_cache.data.clear()
-    TrashedFileNode._cache.data.clear()
-    TrashedFileNode._object_cache.data.clear()
-    Node._cache.data.clear()
-    Node._object_cache.data.clear()
-
-
 def main():
 
     number_users = User.find().count()
@@ -230,19 +116,21 @@ def main():
 
     number_projects_registered = projects_registered.count()
 
-    number_downloads_unique, number_downloads_total = get_number_downloads_unique_and_total(projects=projects)
+    downloads = metrics.count_downloads()
+    number_downloads_unique, number_downloads_total = downloads['project_versions']
+    downloads_unique, downloads_total = downloads['files']
 
     active_users = get_active_users()
     active_users_invited = get_active_users(Q('is_invited', 'eq', True))
-    dropbox_metrics = get_dropbox_metrics()
+    dropbox_metrics = metrics.get_dropbox_metrics()
     extended_profile_counts = profile.get_profile_counts()
     private_links = get_private_links()
     folders = get_folders()
-    downloads_unique, downloads_total = count_file_downloads()
 
-    node_counts = count_user_nodes(active_users)
-    nodes_at_least_1 = count_at_least(node_counts, 1)
-    nodes_at_least_3 = count_at_least(node_counts, 3)
+    active_user_ids = metrics.get_active_user_ids()
+    node_counts = metrics.count_user_nodes(active_user_ids)
+    nodes_at_least_1 = metrics.count_at_least(node_counts, 1)
+    nodes_at_least_3 = metrics.count_at_least(node_counts, 3)
 
     rows = [
         ['number_users', number_users],
@@ -266,7 +154,7 @@ def main():
         ['nodes-gte-3', nodes_at_least_3],
     ]
 
-    rows.extend(get_log_counts(active_users))
+    rows.extend(get_log_counts(active_user_ids))
 
     table = tabulate.tabulate(
         rows,
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Shared engine for analytics metrics.
+
+Metrics are computed with server-side aggregations or a single streamed pass over a collection,
+rather than with a query or a model load per user or per node. Counts of records per day are
+cached in `settings.METRICS_DAILY_COLLECTION`, so that reruns only aggregate the days that were
+added since the last run. Records are bucketed by the day their ObjectId was generated, which
+makes each day a range of the primary key; only complete days are counted and cached.
+"""
+import re
+import datetime
+import collections
+
+from bson import ObjectId
+
+from framework.mongo import database
+
+from scripts.analytics import settings
+
+
+ACTIVE_USER_QUERY = {
+    'is_registered': True,
+    'password': {'$ne': None},
+    'merged_by': None,
+    'date_confirmed': {'$ne': None},
+    'date_disabled': None,
+}
+
+CONTENT_NODE_QUERY = {
+    'is_collection': {'$ne': True},
+    'is_deleted': False,
+}
+
+ONE_DAY = datetime.timedelta(days=1)
+
+DOWNLOAD_PAGE_PATTERN = re.compile(r'^download:')
+
+
+def get_active_user_ids(extra=None):
+    query = dict(ACTIVE_USER_QUERY, **(extra or {}))
+    return [each['_id'] for each in database['user'].find(query, {'_id': True})]
+
+
+def count_user_nodes(user_ids):
+    """Number of content nodes each user contributes to, in the order of `user_ids`."""
+    result = database['node'].aggregate([
+        {'$match': CONTENT_NODE_QUERY},
+        {'$project': {'contributors': True}},
+        {'$unwind': '$contributors'},
+        {'$group': {'_id': '$contributors', 'count': {'$sum': 1}}},
+    ])
+    counts = {row['_id']: row['count'] for row in result['result']}
+    return [counts.get(user_id, 0) for user_id in user_ids]
+
+
+def count_at_least(counts, at_least):
+    return len([count for count in counts if count >= at_least])
+
+
+def start_of_day(date):
+    return datetime.datetime(date.year, date.month, date.day)
+
+
+def id_range(start, end):
+    return {'$gte': str(ObjectId.from_datetime(start)), '$lt': str(ObjectId.from_datetime(end))}
+
+
+def count_by_day(collection, key, day, query=None):
+    """Count the records of `collection` created on `day`, grouped by the value of `key`."""
+    match = dict(query or {}, _id=id_range(day, day + ONE_DAY))
+    result = database[collection].aggregate([
+        {'$match': match},
+        {'$group': {'_id': '${}'.format(key), 'count': {'$sum': 1}}},
+    ])
+    return {
+        row['_id']: row['count']
+        for row in result['result']
+        if row['_id'] is not None
+    }
+
+
+def get_first_day(collection, query=None):
+    first = list(database[collection].find(query or {}, {'_id': True}).sort('_id', 1).limit(1))
+    if not first:
+        return None
+    return start_of_day(ObjectId(first[0]['_id']).generation_time.replace(tzinfo=None))
+
+
+def get_daily_counts(metric, collection, key, query=None, until=None):
+    """Counts of the records of `collection` grouped by `key`, for each complete day up to
+    `until`. Days that were counted by a previous run are read from the cache; the others are
+    aggregated and cached.
+
+    :param str metric: Name the counts are cached under
+    :return: List of `(day, {value of key: count})`, oldest first
+    """
+    cache = database[settings.METRICS_DAILY_COLLECTION]
+    until = start_of_day(until or datetime.datetime.utcnow())
+    days = [
+        (each['date'], each['counts'])
+        for each in cache.find({'metric': metric, 'date': {'$lt': until}}).sort('date', 1)
+    ]
+    day = days[-1][0] + ONE_DAY if days else get_first_day(collection, query)
+    while day is not None and day < until:
+        counts = count_by_day(collection, key, day, query)
+        cache.update(
+            {'_id': '{}:{:%Y-%m-%d}'.format(metric, day)},
+            {'metric': metric, 'date': day, 'counts': counts},
+            upsert=True,
+        )
+        days.append((day, counts))
+        day += ONE_DAY
+    return days
+
+
+def sum_daily_counts(days, windows, until=None):
+    """Sum daily counts over each of `windows`.
+
+    :param list days: `(day, counts)` pairs, as returned by `get_daily_counts`
+    :param dict windows: Labels mapped to a `relativedelta`, or to None for all days
+    :return: Labels mapped to a `Counter` of the summed counts
+    """
+    until = start_of_day(until or datetime.datetime.utcnow())
+    starts = {label: until - delta if delta else None for label, delta in windows.items()}
+    totals = {label: collections.Counter() for label in windows}
+    for day, counts in days:
+        for label, start in starts.items():
+            if start is None or day >= start:
+                totals[label].update(counts)
+    return totals
+
+
+def count_user_logs(user_ids, windows, until=None):
+    """Number of logs written by each user within each of `windows`, in the order of `user_ids`.
+
+    :return: Labels mapped to a list of counts
+    """
+    days = get_daily_counts('user-logs', 'nodelog', 'user', until=until)
+    totals = sum_daily_counts(days, windows, until=until)
+    return {
+        label: [counts.get(user_id, 0) for user_id in user_ids]
+        for label, counts in totals.items()
+    }
+
+
+def get_dropbox_metrics():
+    """Count Dropbox users with an account connected, with that account authorized on a node, and
+    with a folder linked on such a node, in one pass over the Dropbox settings.
+    """
+    account_ids = [
+        each['_id'] for each in database['externalaccount'].find({'provider': 'dropbox'}, {'_id': True})
+    ]
+    authorized_users = set(
+        each['_id'] for each in database['user'].find({'external_accounts': {'$in': account_ids}}, {'_id': True})
+    )
+
+    user_settings = {
+        each['_id']: each
+        for each in database['dropboxusersettings'].find({}, {'owner': True, 'deleted': True, 'oauth_grants': True})
+    }
+
+    # Whether each node's Dropbox settings are authorized, and whether they have a folder linked
+    node_status = {}
+    for node_settings in database['dropboxnodesettings'].find(
+            {'deleted': False},
+            {'owner': True, 'user_settings': True, 'external_account': True, 'folder': True}):
+        granted_by = user_settings.get((node_settings.get('user_settings') or [None])[0])
+        has_auth = bool(
+            granted_by and
+            granted_by['owner'] in authorized_users and
+            node_settings.get('external_account') and
+            node_settings['external_account'] in (granted_by.get('oauth_grants') or {}).get(node_settings['owner'], {})
+        )
+        node_status[node_settings['owner']] = (has_auth, has_auth and bool(node_settings.get('folder')))
+
+    num_enabled = 0     # of users w/ 1+ DB account connected
+    num_authorized = 0  # of users w/ 1+ DB account connected to 1+ node
+    num_linked = 0      # of users w/ 1+ DB account connected to 1+ node w/ a folder linked
+    for each in user_settings.values():
+        if each.get('deleted') or each['owner'] not in authorized_users:
+            continue
+        num_enabled += 1
+        statuses = [node_status[node_id] for node_id in (each.get('oauth_grants') or {}) if node_id in node_status]
+        if any(has_auth for has_auth, _ in statuses):
+            num_authorized += 1
+            if any(linked for _, linked in statuses):
+                num_linked += 1
+    return {
+        'enabled': num_enabled,
+        'authorized': num_authorized,
+        'linked': num_linked,
+    }
+
+
+def count_downloads():
+    """Sum the download counters of OsfStorage files in one pass over the page counters.
+
+    :return: Dictionary with `(unique, total)` downloads of current files, counted per file, and of
+        the current and trashed files of top-level projects, counted per version
+    """
+    files = set(
+        each['_id']
+        for each in database['storedfilenode'].find({'provider': 'osfstorage', 'is_file': True}, {'_id': True})
+    )
+    trashed_files = set(
+        each['_id']
+        for each in database['trashedfilenode'].find({'provider': 'osfstorage', 'is_file': True}, {'_id': True})
+    )
+    projects = set(
+        each['_id']
+        for each in database['node'].find(dict(CONTENT_NODE_QUERY, parent_node=None), {'_id': True})
+    )
+    files_unique, files_total, versions_unique, versions_total = 0, 0, 0, 0
+    counters = database['pagecounters'].find(
+        {'_id': {'$regex': DOWNLOAD_PAGE_PATTERN}},
+        {'unique': True, 'total': True},
+    )
+    for counter in counters:
+        parts = counter['_id'].split(':')
+        if len(parts) == 3 and parts[2] in files:
+            files_unique += counter.get('unique', 0)
+            files_total += counter.get('total', 0)
+        elif len(parts) == 4 and parts[1] in projects and (parts[2] in files or parts[2] in trashed_files):
+            versions_unique += counter.get('unique', 0)
+            versions_total += counter.get('total', 0)
+    return {
+        'files': (files_unique, files_total),
+        'project_versions': (versions_unique, versions_total),
+    }
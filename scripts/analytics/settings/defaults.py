@@ -17,3 +17,6 @@ TABULATE_LOGS_USER_ID = ANALYTICS_LOGS_USER_ID  # Daily updates user
 TABULATE_LOGS_FILE_NAME = 'log-counts.csv'
 TABULATE_LOGS_CONTENT_TYPE = 'text/csv'
 TABULATE_LOGS_TIME_OFFSET = relativedelta(days=1)
+
+# Daily counts cached by `scripts.analytics.metrics`
+METRICS_DAILY_COLLECTION = 'dailymetrics'
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks for hot paths. Each benchmark builds its own fixture data inside a
+transaction that is rolled back once the timings have been taken, e.g.
+::
+
+    python -m scripts.benchmarks.notifications --depth 10 --subscribers 500
+
+"""
+import timeit
+import logging
+import contextlib
+
+from framework.transactions.context import TokuTransaction
+
+logger = logging.getLogger(__name__)
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def rolled_back():
+    """Run the block in a transaction and discard everything it wrote."""
+    try:
+        with TokuTransaction():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def report(name, func, repeat=5, number=10):
+    """Time ``func`` and log the best average seconds per call."""
+    best = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+    logger.info('{}: {:.6f}s per call (best of {})'.format(name, best, repeat))
+    return best
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Benchmark cloning the logs of a project with a long history, as forking and registering do,
+one saved clone at a time and with `NodeLog.clone_logs`.
+::
+
+    python -m scripts.benchmarks.node_logs --logs 10000
+
+"""
+import argparse
+import datetime
+import logging
+
+from framework.auth import Auth
+from website.app import init_app
+from website.models import NodeLog
+from tests.factories import UserFactory, ProjectFactory
+
+from scripts.benchmarks import rolled_back, report
+
+logger = logging.getLogger(__name__)
+
+
+def build_project(n_logs):
+    user = UserFactory()
+    project = ProjectFactory(creator=user)
+    start = datetime.datetime.utcnow() - datetime.timedelta(days=365)
+    for index in range(n_logs):
+        project.add_log(
+            NodeLog.TAG_ADDED,
+            params={'node': project._id, 'tag': 'tag{}'.format(index)},
+            auth=Auth(user),
+            log_date=start + datetime.timedelta(minutes=index),
+            save=False,
+        )
+    project.save()
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cloning node logs.')
+    parser.add_argument('--logs', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with rolled_back():
+        project = build_project(args.logs)
+        copy = ProjectFactory(creator=project.creator)
+
+        def one_by_one():
+            for log in project.logs:
+                log.clone_node_log(copy._id)
+
+        report('clone_node_log per log', one_by_one, repeat=args.repeat, number=1)
+        report('NodeLog.clone_logs', lambda: NodeLog.clone_logs(project, copy), repeat=args.repeat, number=1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = init_app(set_backends=True, routes=False)
+    with app.test_request_context():
+        main()
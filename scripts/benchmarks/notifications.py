@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Benchmark `compile_subscriptions` on a deep component tree with large subscriber lists.
+::
+
+    python -m scripts.benchmarks.notifications --depth 10 --subscribers 500
+
+"""
+import argparse
+import logging
+
+from website.app import init_app
+from website.notifications import emails
+from website.notifications.model import NotificationSubscription, clear_compiled_subscriptions_cache
+from tests.factories import UserFactory, ProjectFactory, NodeFactory
+
+from scripts.benchmarks import rolled_back, report
+
+logger = logging.getLogger(__name__)
+
+
+def build_tree(depth, n_subscribers):
+    creator = UserFactory()
+    subscribers = [UserFactory() for _ in range(n_subscribers)]
+    node = ProjectFactory(creator=creator)
+    for user in subscribers:
+        node.add_contributor(user, permissions=['read'], save=False)
+    node.save()
+    for level in range(depth):
+        subscription = NotificationSubscription(
+            _id=node._id + '_comments',
+            owner=node,
+            event_name='comments'
+        )
+        # Alternate the notification type of every level so each level overrides its parent
+        notification_type = ('email_transactional', 'email_digest', 'none')[level % 3]
+        getattr(subscription, notification_type).extend(subscribers)
+        subscription.save()
+        node = NodeFactory(parent=node, creator=creator)
+    return node
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notification subscription resolution.')
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with rolled_back():
+        leaf = build_tree(args.depth, args.subscribers)
+
+        def cold():
+            clear_compiled_subscriptions_cache()
+            emails.compile_subscriptions(leaf, 'comments')
+
+        report('compile_subscriptions (cold)', cold, repeat=args.repeat)
+        report('compile_subscriptions (cached)', lambda: emails.compile_subscriptions(leaf, 'comments'),
+               repeat=args.repeat)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = init_app(set_backends=True, routes=False)
+    with app.test_request_context():
+        main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Benchmark copying a synthetic osfstorage tree, as forking a project does, with the bulk copy of
+`website.files.utils.copy_files` and, with --compare, with a save per file node.
+::
+
+    python -m scripts.benchmarks.osfstorage_copy --files 50000 --breadth 50 --compare
+
+"""
+import argparse
+import logging
+
+import bson
+
+from framework.auth import Auth
+from framework.mongo import database
+
+from website.app import init_app
+from website.files import utils as files_utils
+from tests.factories import UserFactory, ProjectFactory
+
+from scripts.benchmarks import rolled_back, report
+
+logger = logging.getLogger(__name__)
+
+
+def build_tree(root, files, breadth):
+    """Insert `files` files below root, `breadth` to a folder and `breadth` folders to a level."""
+    documents = []
+
+    def make(parent_id, name, is_file):
+        document = {
+            '_id': str(bson.ObjectId()),
+            'node': root.node._id,
+            'parent': parent_id,
+            'copied_from': None,
+            'provider': 'osfstorage',
+            'is_file': is_file,
+            'name': name,
+            'path': '',
+            'materialized_path': '',
+            'history': [],
+            'versions': [],
+            'tags': [],
+            'checkout': None,
+            'last_touched': None,
+            '_version': 1,
+        }
+        documents.append(document)
+        return document['_id']
+
+    folders, created = [root._id], 0
+    while created < files:
+        next_folders = []
+        for folder_id in folders:
+            for index in range(min(breadth, files - created)):
+                make(folder_id, 'file{}'.format(index), True)
+                created += 1
+            next_folders.extend(make(folder_id, 'folder{}'.format(index), False) for index in range(breadth))
+            if created >= files:
+                break
+        folders = next_folders
+
+    database['storedfilenode'].insert(documents)
+    return len(documents)
+
+
+def copy_per_node(src, target_node, parent=None):
+    """Copy the way copy_files used to, saving each clone and querying the children of each folder."""
+    cloned = src.clone().wrapped()
+    cloned.parent = parent
+    cloned.node = target_node
+    cloned.copied_from = src
+    if src.is_file:
+        cloned.versions = src.versions
+    cloned.save()
+    if not src.is_file:
+        for child in src.children:
+            copy_per_node(child, target_node, parent=cloned)
+    return cloned
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark copying an osfstorage file tree.')
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--breadth', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--compare', action='store_true', help='Also time copying with a save per file node')
+    args = parser.parse_args()
+
+    with rolled_back():
+        user = UserFactory()
+        project = ProjectFactory(creator=user)
+        root = project.get_or_add_addon('osfstorage', auth=Auth(user)).get_root()
+        source = root.append_folder('source')
+        total = build_tree(source, args.files, args.breadth)
+        logger.info('Built a tree of {} files and folders'.format(total))
+
+        def bulk():
+            destination = root.append_folder('bulk-{}'.format(bson.ObjectId()))
+            files_utils.copy_files(source, project, parent=destination, batch_size=args.batch_size)
+
+        def per_node():
+            destination = root.append_folder('per-node-{}'.format(bson.ObjectId()))
+            copy_per_node(source, project, parent=destination)
+
+        report('copy {} file nodes in bulk'.format(total), bulk, repeat=3, number=1)
+        if args.compare:
+            report('copy {} file nodes one by one'.format(total), per_node, repeat=1, number=1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = init_app(set_backends=True, routes=True)
+    with app.test_request_context():
+        main()
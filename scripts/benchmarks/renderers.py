@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Benchmark rendering large JSON-API list responses with embeds, with and without ESI includes,
+using the previous regex-based renderer and `JSONAPIRenderer`.
+::
+
+    python -m scripts.benchmarks.renderers --nodes 100
+
+"""
+import re
+import argparse
+import logging
+
+from rest_framework.renderers import JSONRenderer
+
+from api.base.renderers import ESIInclude, JSONAPIRenderer
+from website.app import init_app
+
+from scripts.benchmarks import report
+
+logger = logging.getLogger(__name__)
+
+
+class RegexESIRenderer(JSONRenderer):
+    """Renders, then unescapes ESI includes with a regex pass over the whole body."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rendered = super(RegexESIRenderer, self).render(data, accepted_media_type, renderer_context)
+        return re.sub(r'"<esi:include src=\\"(.*?)\\"\/>"', r'<esi:include src="\1"/>', rendered)
+
+
+def build_node(index):
+    node_id = 'n{:04d}'.format(index)
+    url = 'http://localhost:8000/v2/nodes/{}/'.format(node_id)
+    relationship = lambda name: {'links': {'related': {'href': url + name + '/', 'meta': {}}}}
+    return {
+        'id': node_id,
+        'type': 'nodes',
+        'attributes': {
+            'title': u'Project {} – ünïcode title'.format(index),
+            'description': 'A description of the project. ' * 10,
+            'category': 'project',
+            'date_created': '2016-05-01T12:00:00.000000',
+            'date_modified': '2016-05-02T12:00:00.000000',
+            'tags': ['tag{}'.format(tag) for tag in range(10)],
+            'public': True,
+        },
+        'relationships': {
+            name: relationship(name)
+            for name in ('children', 'comments', 'contributors', 'files', 'node_links', 'parent', 'registrations')
+        },
+        'embeds': {
+            'contributors': {
+                'data': [
+                    {'id': '{}-user{}'.format(node_id, user), 'type': 'contributors',
+                     'attributes': {'bibliographic': True, 'permission': 'admin'}}
+                    for user in range(5)
+                ]
+            },
+        },
+        'links': {'self': url, 'html': 'http://localhost:5000/{}/'.format(node_id)},
+    }
+
+
+def build_esi_node(index, renderer):
+    node = build_node(index)
+    url = 'http://localhost:8000/v2/nodes/n{:04d}/contributors/?envelope=&format=jsonapi'.format(index)
+    if renderer is RegexESIRenderer:
+        node['embeds']['contributors'] = '<esi:include src="{}"/>'.format(url)
+    else:
+        node['embeds']['contributors'] = ESIInclude(url)
+    return node
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rendering JSON-API list responses.')
+    parser.add_argument('--nodes', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    for renderer_class in (RegexESIRenderer, JSONAPIRenderer):
+        renderer = renderer_class()
+        plain = {'data': [build_node(index) for index in range(args.nodes)]}
+        esi = {'data': [build_esi_node(index, renderer_class) for index in range(args.nodes)]}
+        report(
+            '{} without ESI'.format(renderer_class.__name__),
+            lambda: renderer.render(plain), repeat=args.repeat, number=args.number
+        )
+        report(
+            '{} with ESI'.format(renderer_class.__name__),
+            lambda: renderer.render(esi), repeat=args.repeat, number=args.number
+        )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    init_app(set_backends=False, routes=False)
+    main()
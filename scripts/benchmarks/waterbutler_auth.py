@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Benchmark a burst of `get_auth` requests for the same user, node and action, as a folder upload
+makes, with and without the WaterButler auth cache.
+::
+
+    python -m scripts.benchmarks.waterbutler_auth --files 1000 --depth 5
+
+"""
+import argparse
+import datetime
+import logging
+
+import jwe
+import jwt
+
+from website import settings
+from website.app import init_app
+from website.addons.base import auth_cache, views
+from website.util import api_url_for
+from tests.factories import UserFactory, ProjectFactory, NodeFactory
+
+from scripts.benchmarks import rolled_back, report
+
+logger = logging.getLogger(__name__)
+
+
+def build_node(depth):
+    user = UserFactory()
+    node = ProjectFactory(creator=user)
+    for _ in range(depth):
+        node = NodeFactory(parent=node, creator=user)
+    return user, node
+
+
+def build_url(user, node, action):
+    payload = jwe.encrypt(jwt.encode({
+        'data': {
+            'action': action,
+            'nid': node._id,
+            'provider': 'osfstorage',
+            'cookie': user.get_or_create_cookie(),
+        },
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.WATERBUTLER_JWT_EXPIRATION),
+    }, settings.WATERBUTLER_JWT_SECRET, algorithm=settings.WATERBUTLER_JWT_ALGORITHM), views.WATERBUTLER_JWE_KEY)
+    return api_url_for('get_auth', payload=payload)
+
+
+def main(app):
+    parser = argparse.ArgumentParser(description='Benchmark bursts of WaterButler auth requests.')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ttl = settings.WATERBUTLER_AUTH_CACHE_TTL
+
+    with rolled_back():
+        user, node = build_node(args.depth)
+
+        def burst():
+            # The user is authenticated by the cookie in the payload
+            for _ in range(args.files):
+                # WaterButler asks with a fresh payload for each file
+                url = build_url(user, node, 'upload')
+                with app.test_request_context(url):
+                    views.get_auth()
+
+        try:
+            settings.WATERBUTLER_AUTH_CACHE_TTL = 0
+            report('get_auth x {} without cache'.format(args.files), burst, repeat=args.repeat, number=1)
+        finally:
+            settings.WATERBUTLER_AUTH_CACHE_TTL = ttl
+        report('get_auth x {} with cache'.format(args.files), burst, repeat=args.repeat, number=1)
+        logger.info('Cache stats: {}'.format(auth_cache.get_stats()))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = init_app(set_backends=True, routes=True)
+    with app.test_request_context():
+        main(app)
@@ -86,6 +86,7 @@ def find_orphaned_children(filters=None, dryrun=False):
             if dryrun is False:
                 parent.nodes.append(child)
                 parent.save()
+                child.update_log_lineage()
                 msg = u'Fixed inconsistency: Parent {} ({}) does not point to child {} ({})\n'.format(
                     parent.title,
                     parent._primary_key,
@@ -121,6 +122,7 @@ def find_missing_children(filters=None, dryrun=False):
                 if dryrun is False:
                     child.node__parent.append(parent)
                     child.save()
+                    child.update_log_lineage()
                     msg = u'Fixed inconsistency: Child {} ({}) does not point to parent {} ({}).\n'.format(
                         child.title,
                         child._primary_key,
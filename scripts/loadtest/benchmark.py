@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Run the load-test scenarios one request at a time against a local stack seeded with
+`scripts.loadtest.seed`, and report latency percentiles and the number of Mongo operations each
+request made. Operations are counted with the Mongo profiler, so the stack should not be serving
+other traffic or running workers while the benchmark runs.
+::
+
+    python -m scripts.loadtest.benchmark --manifest loadtest.json --requests 50 --out results.json
+
+For throughput under concurrent load, run the same scenarios with locust instead::
+
+    LOADTEST_MANIFEST=loadtest.json locust -f scripts/loadtest/locustfile.py
+
+"""
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+
+import pymongo
+import requests
+import tabulate
+
+from website import settings
+from scripts.loadtest import scenarios
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class QueryCounter(object):
+    """Count the operations recorded by the Mongo profiler in a time window."""
+
+    def __init__(self, database):
+        self.database = database
+
+    def __enter__(self):
+        self.database.set_profiling_level(pymongo.ALL)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.database.set_profiling_level(pymongo.OFF)
+
+    def count(self, start, end):
+        return self.database['system.profile'].find({
+            'ts': {'$gte': start, '$lte': end},
+            'ns': {'$ne': '{}.system.profile'.format(self.database.name)},
+        }).count()
+
+
+def run_scenario(scenario, manifest, rng, count, counter=None):
+    session = requests.Session()
+    latencies, queries, errors = [], [], 0
+    for _ in range(count):
+        url = scenario.make_url(manifest, rng)
+        start = datetime.datetime.utcnow()
+        timer = time.time()
+        response = session.get(url, cookies=scenarios.choose_cookies(manifest, rng))
+        latencies.append(time.time() - timer)
+        if response.status_code >= 400:
+            errors += 1
+        if counter:
+            queries.append(counter.count(start, datetime.datetime.utcnow()))
+    return {
+        'scenario': scenario.name,
+        'requests': count,
+        'errors': errors,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies),
+        'queries_mean': float(sum(queries)) / len(queries) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+
+
+def run(manifest, count, names=None, profile=True, seed=0):
+    rng = random.Random(seed)
+    selected = [scenario for scenario in scenarios.SCENARIOS if not names or scenario.name in names]
+    database = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT)[settings.DB_NAME]
+    if not profile:
+        return [run_scenario(scenario, manifest, rng, count) for scenario in selected]
+    with QueryCounter(database) as counter:
+        return [run_scenario(scenario, manifest, rng, count, counter) for scenario in selected]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the load-test scenarios.')
+    parser.add_argument('--manifest', default='loadtest.json')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--scenario', action='append', dest='scenarios')
+    parser.add_argument('--no-profile', action='store_false', dest='profile')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='Also write the results as JSON, e.g. to compare runs')
+    args = parser.parse_args()
+
+    with open(args.manifest) as fp:
+        manifest = json.load(fp)
+    results = run(manifest, args.requests, names=args.scenarios, profile=args.profile, seed=args.seed)
+
+    keys = ['scenario', 'requests', 'errors', 'p50', 'p90', 'p99', 'max', 'queries_mean', 'queries_max']
+    print(tabulate.tabulate([[result[key] for key in keys] for result in results], headers=keys))
+    if args.out:
+        with open(args.out, 'w') as fp:
+            json.dump({'manifest': args.manifest, 'seed': args.seed, 'results': results}, fp, indent=2)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,8 +1,14 @@
 #!/usr/bin/env python
 # encoding: utf-8
-"""Load testing for file upload, listing, and download with OSF Storage.
+"""Load testing for file upload, listing, and download with OSF Storage, and for the scenarios
+in `scenarios.py` against data seeded with `scripts.loadtest.seed`. Pick the locust class to run::
+
+    locust -f scripts/loadtest/locustfile.py WebsiteUser
+    LOADTEST_MANIFEST=loadtest.json locust -f scripts/loadtest/locustfile.py ScenarioUser
+
 """
 
+import os
 import json
 import random
 import string
@@ -10,6 +16,8 @@ from cStringIO import StringIO
 
 from locust import HttpLocust, TaskSet, task
 
+import scenarios
+
 
 HOST = 'http://localhost:5000/'
 USERNAME = 'calici@cat.com'
@@ -111,3 +119,29 @@ class WebsiteUser(HttpLocust):
     task_set = UserBehavior
     min_wait = 5000
     max_wait = 10000
+
+
+class ScenarioBehavior(TaskSet):
+
+    def on_start(self):
+        with open(os.environ['LOADTEST_MANIFEST']) as fp:
+            self.manifest = json.load(fp)
+        self.rng = random.Random()
+        self.cookies = scenarios.choose_cookies(self.manifest, self.rng)
+
+    @task
+    def run_scenario(self):
+        scenario = scenarios.choose(self.rng)
+        self.client.get(
+            scenario.make_url(self.manifest, self.rng),
+            cookies=self.cookies,
+            verify=VERIFY,
+            name=scenario.name,
+        )
+
+
+class ScenarioUser(HttpLocust):
+    host = HOST
+    task_set = ScenarioBehavior
+    min_wait = 1000
+    max_wait = 5000
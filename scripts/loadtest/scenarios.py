@@ -0,0 +1,71 @@
+# encoding: utf-8
+"""Request scenarios for the load tests, built from the manifest written by
+`scripts.loadtest.seed`. Shared by the locustfile and the benchmark runner, so this module only
+depends on the standard library.
+"""
+
+import collections
+
+
+# Pages of logs in the API, at its default page size
+LOG_PAGE_SIZE = 10
+
+Scenario = collections.namedtuple('Scenario', ['name', 'weight', 'make_url'])
+
+
+def api_url(manifest, path):
+    return manifest['api_url'].rstrip('/') + path
+
+
+def web_url(manifest, path):
+    return manifest['web_url'].rstrip('/') + path
+
+
+def deep_log_page(manifest, rng):
+    pages = max(manifest['logs'] // LOG_PAGE_SIZE, 1)
+    # Skew towards the end of the history, where pagination is most expensive
+    page = pages - int(rng.random() ** 2 * pages)
+    return api_url(manifest, '/v2/nodes/{}/logs/?page={}'.format(manifest['root'], page))
+
+
+SCENARIOS = [
+    Scenario(
+        'api-nodes-embeds', 3,
+        lambda manifest, rng: api_url(manifest, '/v2/nodes/?embed=contributors&embed=children&page[size]=100'),
+    ),
+    Scenario('api-node-logs-deep', 2, deep_log_page),
+    Scenario(
+        'api-node-contributors', 2,
+        lambda manifest, rng: api_url(manifest, '/v2/nodes/{}/contributors/'.format(manifest['root'])),
+    ),
+    Scenario(
+        'api-node-children', 1,
+        lambda manifest, rng: api_url(
+            manifest, '/v2/nodes/{}/children/'.format(rng.choice([manifest['root']] + manifest['components']))
+        ),
+    ),
+    Scenario(
+        'web-search', 2,
+        lambda manifest, rng: web_url(manifest, '/api/v1/search/?q={}'.format(rng.choice(manifest['search_terms']))),
+    ),
+    Scenario(
+        'web-project-page', 3,
+        lambda manifest, rng: web_url(manifest, '/{}/'.format(rng.choice(manifest['projects']))),
+    ),
+]
+
+
+def choose(rng, scenarios=None):
+    """Pick a scenario at random, in proportion to the scenario weights."""
+    scenarios = scenarios or SCENARIOS
+    point = rng.random() * sum(scenario.weight for scenario in scenarios)
+    for scenario in scenarios:
+        point -= scenario.weight
+        if point < 0:
+            return scenario
+    return scenarios[-1]
+
+
+def choose_cookies(manifest, rng):
+    user = rng.choice(manifest['users'])
+    return {manifest['cookie_name']: user['cookie']}
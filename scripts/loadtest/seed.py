@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Seed a local database with synthetic data for the load tests: a project with a deep tree of
+components, many contributors and a long log history, plus a few smaller public projects. Data
+is generated from a random seed, so runs against the same seed are comparable. The ids and
+session cookies the scenarios need are written to a manifest.
+::
+
+    python -m scripts.loadtest.seed --seed 1 --out loadtest.json
+
+"""
+import json
+import random
+import logging
+import argparse
+import datetime
+
+from framework.auth import Auth
+from framework.transactions.context import TokuTransaction
+
+from website import settings
+from website.app import init_app
+from website.models import NodeLog
+from tests.factories import UserFactory, ProjectFactory, NodeFactory
+
+logger = logging.getLogger(__name__)
+
+WORDS = [
+    'analysis', 'behavior', 'cognition', 'data', 'effect', 'field', 'growth', 'habitat', 'imaging',
+    'judgment', 'kinetics', 'learning', 'memory', 'network', 'outcome', 'protein', 'replication',
+    'sample', 'theory', 'variance',
+]
+
+
+def make_title(rng, nwords=3):
+    return ' '.join(rng.choice(WORDS) for _ in range(nwords)).capitalize()
+
+
+def make_tree(rng, parent, creator, depth, breadth):
+    """Add `breadth` components to `parent`, down to `depth` levels. Only the first component on
+    each level has children, so the tree is deep without growing exponentially.
+
+    :return: Ids of the components, top-down
+    """
+    ids = []
+    for level in range(depth):
+        children = [
+            NodeFactory(parent=parent, creator=creator, title=make_title(rng), is_public=True)
+            for _ in range(breadth)
+        ]
+        ids.extend(child._id for child in children)
+        parent = children[0]
+    return ids
+
+
+def add_logs(rng, node, users, count):
+    start = datetime.datetime.utcnow() - datetime.timedelta(hours=count)
+    for index in range(count):
+        user = rng.choice(users)
+        node.add_log(
+            NodeLog.TAG_ADDED,
+            params={'node': node._id, 'tag': rng.choice(WORDS)},
+            auth=Auth(user),
+            log_date=start + datetime.timedelta(hours=index, minutes=rng.randint(0, 59)),
+            save=False,
+        )
+    node.save()
+
+
+def seed(seed=0, users=50, contributors=30, depth=8, breadth=3, logs=5000, projects=20):
+    """Generate the load-test data.
+
+    :param int seed: Seed for the titles, names, permissions and log histories
+    :return: Manifest of the generated data
+    """
+    rng = random.Random(seed)
+    people = [UserFactory(fullname='{} {}'.format(make_title(rng, 1), make_title(rng, 1))) for _ in range(users)]
+    creator = people[0]
+
+    root = ProjectFactory(creator=creator, title=make_title(rng), is_public=True)
+    root.add_contributors(
+        [
+            {'user': user, 'permissions': ['read', 'write'], 'visible': rng.random() < 0.8}
+            for user in people[1:contributors + 1]
+        ],
+        auth=Auth(creator),
+        save=True,
+    )
+    components = make_tree(rng, root, creator, depth, breadth)
+    add_logs(rng, root, people[:contributors + 1], logs)
+
+    others = [
+        ProjectFactory(creator=rng.choice(people), title=make_title(rng), is_public=True)
+        for _ in range(projects)
+    ]
+
+    return {
+        'seed': seed,
+        'cookie_name': settings.COOKIE_NAME,
+        'web_url': settings.DOMAIN,
+        'api_url': settings.API_DOMAIN,
+        'users': [{'_id': user._id, 'cookie': user.get_or_create_cookie()} for user in people],
+        'root': root._id,
+        'components': components,
+        'projects': [root._id] + [project._id for project in others],
+        'logs': logs,
+        'search_terms': WORDS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed synthetic data for load tests.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--contributors', type=int, default=30)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--breadth', type=int, default=3)
+    parser.add_argument('--logs', type=int, default=5000)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--out', default='loadtest.json')
+    args = parser.parse_args()
+
+    with TokuTransaction():
+        manifest = seed(
+            seed=args.seed, users=args.users, contributors=args.contributors, depth=args.depth,
+            breadth=args.breadth, logs=args.logs, projects=args.projects,
+        )
+    with open(args.out, 'w') as fp:
+        json.dump(manifest, fp, indent=2)
+    logger.info('Wrote manifest for project {} to {}'.format(manifest['root'], args.out))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = init_app(set_backends=True, routes=False)
+    with app.test_request_context():
+        main()
@@ -0,0 +1,42 @@
+"""
+This will build the index of conference submissions, in the `conferencesubmission` collection, for
+every conference and cache the number of submissions of each. Run it when deploying the index, so
+that meeting grids are not empty until the nightly rebuild.
+"""
+import sys
+import logging
+from website.app import init_app
+from website.conferences import submissions
+from website.conferences.model import Conference
+from scripts import utils as script_utils
+from framework.transactions.context import TokuTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def do_migration(dry=True):
+    conferences = Conference.find()
+    conference_count = conferences.count()
+    count = 0
+    for conference in conferences:
+        count += 1
+        if dry:
+            logger.info('{}/{} Would index the submissions to {}'.format(count, conference_count, conference.endpoint))
+            continue
+        with TokuTransaction():
+            num_submissions = submissions.rebuild_conference(conference)
+            conference.num_submissions = num_submissions
+            conference.save()
+        logger.info('{}/{} Indexed {} submissions to {}'.format(count, conference_count, num_submissions, conference.endpoint))
+
+
+def main(dry=True):
+    init_app(set_backends=True, routes=False)
+    do_migration(dry=dry)
+
+
+if __name__ == '__main__':
+    dry_run = 'dry' in sys.argv
+    if not dry_run:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry_run)
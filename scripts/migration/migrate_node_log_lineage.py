@@ -0,0 +1,39 @@
+"""
+This will add a lineage field to all node logs. Lineage is the primary keys of the log's node and each
+of its parents, and is used to fetch the aggregate logs of a node and its descendants with one query.
+"""
+import sys
+import logging
+from modularodm import Q
+from website.app import init_app
+from website import models
+from scripts import utils as script_utils
+from framework.transactions.context import TokuTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def do_migration(dry=True):
+    nodes = models.Node.find()
+    node_count = nodes.count()
+    count = 0
+    for node in nodes:
+        count += 1
+        lineage = node.get_lineage_ids()
+        query = Q('node', 'eq', node._id) & (Q('lineage', 'eq', None) | Q('lineage', 'exists', False))
+        with TokuTransaction():
+            if not dry:
+                models.NodeLog.update(query, data={'lineage': lineage})
+        logger.info('{}/{} Node {} logs stamped with lineage {}'.format(count, node_count, node._id, lineage))
+
+
+def main(dry=True):
+    init_app(set_backends=True, routes=False)
+    do_migration(dry=dry)
+
+
+if __name__ == '__main__':
+    dry_run = 'dry' in sys.argv
+    if not dry_run:
+        script_utils.add_file_logger(logger, __file__)
+    main(dry=dry_run)
@@ -0,0 +1,99 @@
+import datetime
+
+from bson import ObjectId
+from dateutil.relativedelta import relativedelta
+from nose.tools import *  # noqa
+
+from framework.mongo import database
+
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, UserFactory
+
+from scripts.analytics import metrics
+from scripts.analytics import settings
+
+
+def insert_log(user_id, created):
+    database['nodelog'].insert({'_id': str(ObjectId.from_datetime(created)), 'user': user_id})
+
+
+class TestAnalyticsMetrics(OsfTestCase):
+
+    def setUp(self):
+        super(TestAnalyticsMetrics, self).setUp()
+        self.today = datetime.datetime(2016, 6, 10)
+        self.user = UserFactory()
+        self.other = UserFactory()
+
+    def test_count_user_nodes(self):
+        project = ProjectFactory(creator=self.user)
+        project.add_contributor(self.other, save=True)
+        ProjectFactory(creator=self.user)
+        ProjectFactory(creator=self.user, is_deleted=True)
+        assert_equal(metrics.count_user_nodes([self.user._id, self.other._id, 'nobody']), [2, 1, 0])
+
+    def test_daily_counts_are_cached(self):
+        insert_log(self.user._id, datetime.datetime(2016, 6, 7, 12))
+        insert_log(self.user._id, datetime.datetime(2016, 6, 9, 1))
+        insert_log(self.other._id, datetime.datetime(2016, 6, 9, 23))
+        # Not a complete day yet
+        insert_log(self.other._id, datetime.datetime(2016, 6, 10, 1))
+
+        days = metrics.get_daily_counts('user-logs', 'nodelog', 'user', until=self.today)
+        assert_equal(days, [
+            (datetime.datetime(2016, 6, 7), {self.user._id: 1}),
+            (datetime.datetime(2016, 6, 8), {}),
+            (datetime.datetime(2016, 6, 9), {self.user._id: 1, self.other._id: 1}),
+        ])
+        assert_equal(database[settings.METRICS_DAILY_COLLECTION].find({'metric': 'user-logs'}).count(), 3)
+
+        # Cached days are not aggregated again
+        insert_log(self.user._id, datetime.datetime(2016, 6, 9, 2))
+        assert_equal(metrics.get_daily_counts('user-logs', 'nodelog', 'user', until=self.today), days)
+
+        days = metrics.get_daily_counts('user-logs', 'nodelog', 'user', until=self.today + metrics.ONE_DAY)
+        assert_equal(days[-1], (datetime.datetime(2016, 6, 10), {self.other._id: 1}))
+
+    def test_count_user_logs(self):
+        insert_log(self.user._id, datetime.datetime(2016, 5, 1))
+        insert_log(self.user._id, datetime.datetime(2016, 6, 9))
+        insert_log(self.other._id, datetime.datetime(2016, 6, 9))
+        windows = {'total': None, 'last-1w': relativedelta(weeks=1)}
+        counts = metrics.count_user_logs([self.user._id, self.other._id], windows, until=self.today)
+        assert_equal(counts, {'total': [2, 1], 'last-1w': [1, 1]})
+
+    def test_get_dropbox_metrics(self):
+        database['externalaccount'].insert({'_id': 'account', 'provider': 'dropbox'})
+        database['user'].update({'_id': self.user._id}, {'$set': {'external_accounts': ['account']}})
+        linked, authorized, ungranted = ProjectFactory(), ProjectFactory(), ProjectFactory()
+        database['dropboxusersettings'].insert({
+            '_id': 'settings',
+            'owner': self.user._id,
+            'deleted': False,
+            'oauth_grants': {linked._id: {'account': {}}, authorized._id: {'account': {}}},
+        })
+        database['dropboxnodesettings'].insert([
+            {'owner': linked._id, 'user_settings': ['settings', 'dropboxusersettings'],
+             'external_account': 'account', 'folder': '/data', 'deleted': False},
+            {'owner': authorized._id, 'user_settings': ['settings', 'dropboxusersettings'],
+             'external_account': 'account', 'folder': None, 'deleted': False},
+            {'owner': ungranted._id, 'user_settings': ['settings', 'dropboxusersettings'],
+             'external_account': 'account', 'folder': '/data', 'deleted': False},
+        ])
+        assert_equal(metrics.get_dropbox_metrics(), {'enabled': 1, 'authorized': 1, 'linked': 1})
+
+        database['dropboxnodesettings'].remove({'owner': linked._id})
+        assert_equal(metrics.get_dropbox_metrics(), {'enabled': 1, 'authorized': 1, 'linked': 0})
+
+    def test_count_downloads(self):
+        project = ProjectFactory()
+        database['storedfilenode'].insert({'_id': 'file', 'provider': 'osfstorage', 'is_file': True})
+        database['trashedfilenode'].insert({'_id': 'trashed', 'provider': 'osfstorage', 'is_file': True})
+        database['pagecounters'].insert([
+            {'_id': 'download:{}:file'.format(project._id), 'unique': 2, 'total': 5},
+            {'_id': 'download:{}:trashed'.format(project._id), 'unique': 1, 'total': 1},
+            {'_id': 'download:{}:file:0'.format(project._id), 'unique': 1, 'total': 3},
+            {'_id': 'download:{}:trashed:0'.format(project._id), 'unique': 1, 'total': 2},
+            {'_id': 'view:{}'.format(project._id), 'unique': 10, 'total': 10},
+        ])
+        assert_equal(metrics.count_downloads(), {'files': (2, 5), 'project_versions': (2, 5)})
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from nose.tools import *  # noqa
+
+from tests.base import OsfTestCase
+from tests.test_conferences import ConferenceFactory, create_fake_conference_nodes
+
+from website.conferences import submissions
+from scripts.migration.migrate_conference_submissions import do_migration
+
+
+class TestMigrateConferenceSubmissions(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateConferenceSubmissions, self).setUp()
+        self.conference = ConferenceFactory()
+        create_fake_conference_nodes(2, self.conference.endpoint)
+        submissions.get_collection().remove()
+
+    def test_dry_run(self):
+        do_migration(dry=True)
+        assert_equal(submissions.get_submissions(self.conference.endpoint), [])
+
+    def test_migration(self):
+        do_migration(dry=False)
+        self.conference.reload()
+        assert_equal(len(submissions.get_submissions(self.conference.endpoint)), 2)
+        assert_equal(self.conference.num_submissions, 2)
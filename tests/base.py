@@ -30,7 +30,9 @@ from framework.mongo import set_up_storage
 from framework.auth import User
 from framework.auth.core import Auth
 from framework.sessions.model import Session
+from framework.sessions.store import get_session_store
 from framework.guid.model import Guid
+from framework.guid.pool import clear_guid_pools
 from framework.mongo import client as client_proxy
 from framework.mongo import database as database_proxy
 from framework.transactions import commands, messages, utils
@@ -100,6 +102,8 @@ def teardown_database(client=None, database=None):
         if messages.NO_TRANSACTION_ERROR not in message:
             raise
     client.drop_database(database)
+    get_session_store().clear()
+    clear_guid_pools()
 
 
 class DbTestCase(unittest.TestCase):
@@ -3,7 +3,11 @@
 Unit tests for analytics logic in framework/analytics/__init__.py
 """
 
+import time
 import unittest
+import threading
+
+import mock
 
 from nose.tools import *  # flake8: noqa  (PEP8 asserts)
 from flask import Flask
@@ -11,6 +15,8 @@ from flask import Flask
 from datetime import datetime
 
 from framework import analytics, sessions
+from framework.mongo import client
+from framework.analytics.counters import BloomFilter, CounterBuffer, counter_buffer
 from framework.sessions import session
 
 from tests.base import OsfTestCase
@@ -75,9 +81,6 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, self.fid), db=self.db)
         assert_equal(count, (1, 1))
 
-        page = 'download:{0}:{1}'.format(self.node, self.fid)
-
-        session.data['visited'].append(page)
         download_file_(node=self.node, fid=self.fid)
 
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, self.fid), db=self.db)
@@ -96,9 +99,6 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid), db=self.db)
         assert_equal(count, (1, 1))
 
-        page = 'download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid)
-
-        session.data['visited'].append(page)
         download_file_version_(node=self.node, fid=self.fid, vid=self.vid)
 
         count = analytics.get_basic_counters('download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid), db=self.db)
@@ -116,6 +116,48 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters(page, db=self.db)
         assert_equal(count, (3, 5))
 
+    def test_update_counters_visited_kept_in_session(self):
+        @analytics.update_counters('download:{target_id}:{fid}', db=self.db)
+        def download_file_(**kwargs):
+            return kwargs.get('node') or kwargs.get('project')
+
+        download_file_(node=self.node, fid=self.fid)
+        visited = session.data['visited']
+        download_file_(node=self.node, fid=self.fid)
+        assert_equal(session.data['visited'], visited)
+        download_file_(node=self.node, fid='bar')
+        assert_equal(len(session.data['visited']), len(visited))
+        assert_in('download:{0}:bar'.format(self.node._id), BloomFilter.deserialize(session.data['visited']))
+
+    def test_update_counters_legacy_visited_list(self):
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        session.data['visited'] = [page]
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (0, 1))
+
+    def test_update_counters_full_visited_filter_started_over(self):
+        visited = BloomFilter()
+        index = 0
+        while not visited.is_full:
+            visited.add('node:{0}'.format(index))
+            index += 1
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        session.data['visited'] = visited.serialize()
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 1))
+        assert_equal(BloomFilter.deserialize(session.data['visited']).count, 1)
+
+    def test_update_counters_buffered(self):
+        counter_buffer.flush()
+        page = 'node:{0}'.format(self.node._id)
+        analytics.update_counter(page, db=self.db)
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 2))
+
+        counter_buffer.flush()
+        assert_equal(self.db['pagecounters'].find_one({'_id': page})['total'], 2)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 2))
+
     @unittest.skip('Reverted the fix for #2281. Unskip this once we use GUIDs for keys in the download counts collection')
     def test_update_counters_different_files(self):
         # Regression test for https://github.com/CenterForOpenScience/osf.io/issues/2281
@@ -133,9 +175,6 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, fid2), db=self.db)
         assert_equal(count, (None, None))
 
-        page = 'download:{0}:{1}'.format(self.node, fid1)
-
-        session.data['visited'].append(page)
         download_file_(node=self.node, fid=fid1)
         download_file_(node=self.node, fid=fid2)
 
@@ -143,3 +182,81 @@ class TestUpdateCounters(UpdateCountersTestCase):
         assert_equal(count, (1, 2))
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, fid2), db=self.db)
         assert_equal(count, (1, 1))
+
+
+class TestCounterBuffer(OsfTestCase):
+
+    def setUp(self):
+        super(TestCounterBuffer, self).setUp()
+        self.buffer = CounterBuffer(interval=60, max_keys=3)
+        self.collection = self.db['pagecounters']
+
+    def wait_for(self, condition):
+        for _ in range(100):
+            if condition():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def test_aggregates_increments(self):
+        self.buffer.increment(self.collection, 'node:abc12', {'total': 1, 'unique': 1})
+        self.buffer.increment(self.collection, 'node:abc12', {'total': 1})
+        assert_equal(self.buffer.pending(self.collection, 'node:abc12'), {'total': 2, 'unique': 1})
+        assert_equal(self.buffer.flush(), 1)
+        assert_equal(self.collection.find_one({'_id': 'node:abc12'}), {'_id': 'node:abc12', 'total': 2, 'unique': 1})
+        assert_equal(self.buffer.pending(self.collection, 'node:abc12'), {})
+
+    def test_flushes_after_interval(self):
+        self.buffer.interval = 0.05
+        self.buffer.increment(self.collection, 'node:abc12', {'total': 1})
+        assert_true(self.wait_for(lambda: self.collection.find_one({'_id': 'node:abc12'})))
+        assert_equal(self.collection.find_one({'_id': 'node:abc12'})['total'], 1)
+
+    def test_flushes_when_full(self):
+        for _id in ['node:abc12', 'node:def34', 'node:ghi56']:
+            self.buffer.increment(self.collection, _id, {'total': 1})
+        assert_true(self.wait_for(lambda: self.collection.find({'total': 1}).count() == 3))
+
+    @mock.patch('framework.analytics.counters.CLIENT_POOL')
+    def test_flush_uses_client_of_its_own(self, mock_client_pool):
+        mock_client_pool.acquire.return_value = client._get_current_object()
+        self.buffer.increment(self.collection, 'node:abc12', {'total': 1})
+        self.buffer.flush()
+        client_id = mock_client_pool.acquire.call_args[0][0]
+        assert_not_equal(client_id, threading.current_thread().ident)
+        mock_client_pool.release.assert_called_once_with(client_id)
+        assert_equal(self.collection.find_one({'_id': 'node:abc12'})['total'], 1)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_add(self):
+        bloom = BloomFilter()
+        assert_true(bloom.add('node:abc12'))
+        assert_false(bloom.add('node:abc12'))
+        assert_in('node:abc12', bloom)
+        assert_not_in('node:def34', bloom)
+
+    def test_serialize(self):
+        bloom = BloomFilter()
+        bloom.add(u'download:abc12:\u2603')
+        loaded = BloomFilter.deserialize(bloom.serialize())
+        assert_in(u'download:abc12:\u2603', loaded)
+        assert_not_in('node:def34', loaded)
+
+    def test_deserialize_empty(self):
+        assert_not_in('node:abc12', BloomFilter.deserialize(None))
+
+    def test_false_positive_rate_at_capacity(self):
+        bloom = BloomFilter(capacity=500, error_rate=0.01)
+        for index in range(500):
+            bloom.add('node:{0}'.format(index))
+        false_positives = sum('file:{0}'.format(index) in bloom for index in range(10000))
+        assert_less(false_positives, 200)
+
+    def test_deserialize_other_size(self):
+        bloom = BloomFilter(capacity=10)
+        bloom.add('node:abc12')
+        loaded = BloomFilter.deserialize(bloom.serialize())
+        assert_equal(loaded.count, 0)
+        assert_not_in('node:abc12', loaded)
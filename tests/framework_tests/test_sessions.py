@@ -1,6 +1,11 @@
+import unittest
+
+import mock
 from nose.tools import *
 
-from framework.sessions import utils
+from framework import sessions
+from framework.sessions import revocations, utils
+from framework.sessions.store import ExpiringLRUCache, LocalSessionStore, get_session_store
 from tests import factories
 from tests.base import DbTestCase
 from tests.factories import SessionFactory
@@ -49,3 +54,117 @@ class SessionUtilsTestCase(DbTestCase):
         assert_equal(1, Session.find().count())
         utils.remove_session(session)
         assert_equal(0, Session.find().count())
+
+    def test_remove_session_evicts_cached_session(self):
+        session = SessionFactory(user=self.user)
+        assert_is_not_none(get_session_store().get(session._id))
+        utils.remove_session(session)
+        assert_is_none(get_session_store().get(session._id))
+
+    def test_remove_sessions_for_user_evicts_cached_sessions(self):
+        session = SessionFactory(user=self.user)
+        other = SessionFactory()
+        utils.remove_sessions_for_user(self.user)
+        assert_is_none(get_session_store().get(session._id))
+        assert_is_not_none(get_session_store().get(other._id))
+
+    def test_other_store_rejects_removed_session(self):
+        session = SessionFactory(user=self.user)
+        other_store = LocalSessionStore(max_size=10, ttl=60, get_revocations=revocations.get_revocations)
+        other_store.set(session._id, session.to_storage())
+        assert_is_not_none(other_store.get(session._id))
+        utils.remove_session(session)
+        assert_is_none(other_store.get(session._id))
+
+    def test_other_store_rejects_removed_sessions_of_user(self):
+        session = SessionFactory(user=self.user)
+        other = SessionFactory()
+        other_store = LocalSessionStore(max_size=10, ttl=60, get_revocations=revocations.get_revocations)
+        other_store.set(session._id, session.to_storage())
+        other_store.set(other._id, other.to_storage())
+        utils.remove_sessions_for_user(self.user)
+        assert_is_none(other_store.get(session._id))
+        assert_is_not_none(other_store.get(other._id))
+
+    def test_revocations_are_read_once_per_interval(self):
+        now = [0]
+        get_revocations = mock.Mock(return_value=[])
+        store = LocalSessionStore(
+            max_size=10, ttl=60, clock=lambda: now[0],
+            get_revocations=get_revocations, revocation_interval=1,
+        )
+        store.get('abc')
+        store.get('abc')
+        assert_equal(get_revocations.call_count, 1)
+        now[0] = 1
+        store.get('abc')
+        assert_equal(get_revocations.call_count, 2)
+
+    def test_load_session_reads_cache(self):
+        session = SessionFactory(user=self.user)
+        with mock.patch.object(Session._storage[0], 'get') as mock_get:
+            loaded = utils.load_session(session._id)
+        assert_false(mock_get.called)
+        assert_equal(loaded.data, session.data)
+
+    def test_load_session_populates_cache(self):
+        session = SessionFactory(user=self.user)
+        get_session_store().clear()
+        assert_equal(utils.load_session(session._id)._id, session._id)
+        assert_equal(get_session_store().get(session._id)['data'], session.data)
+
+    def test_load_session_missing(self):
+        assert_is_none(utils.load_session('notasession'))
+
+    def test_session_is_dirty(self):
+        session = SessionFactory(user=self.user)
+        loaded = utils.load_session(session._id)
+        assert_false(loaded.is_dirty)
+        loaded.data['visited'] = ['abc12']
+        assert_true(loaded.is_dirty)
+        loaded.save()
+        assert_false(loaded.is_dirty)
+
+    @mock.patch('framework.sessions.database')
+    def test_update_date_last_login_is_throttled(self, mock_database):
+        sessions.last_login_updates.clear()
+        sessions.update_date_last_login(self.user._id)
+        sessions.update_date_last_login(self.user._id)
+        assert_equal(mock_database['user'].update.call_count, 1)
+
+
+class TestExpiringLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = ExpiringLRUCache(max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_expires(self):
+        self.cache.set('a', 1)
+        self.now = 9
+        assert_equal(self.cache.get('a'), 1)
+        self.now = 10
+        assert_is_none(self.cache.get('a'))
+
+    def test_never_expires_without_ttl(self):
+        cache = ExpiringLRUCache(max_size=2, ttl=None, clock=lambda: self.now)
+        cache.set('a', 1)
+        self.now = 10 ** 9
+        assert_equal(cache.get('a'), 1)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        assert_equal(self.cache.get('a'), 1)
+        assert_is_none(self.cache.get('b'))
+        assert_equal(len(self.cache), 2)
+
+    def test_local_session_store_copies_data(self):
+        store = LocalSessionStore(max_size=2, ttl=10)
+        data = {'_id': 'abc', 'data': {'visited': []}}
+        store.set('abc', data)
+        data['data']['visited'].append('x')
+        store.get('abc')['data']['visited'].append('y')
+        assert_equal(store.get('abc'), {'_id': 'abc', 'data': {'visited': []}})
@@ -13,13 +13,15 @@ from modularodm.exceptions import ValidationError
 
 from framework.auth import get_or_create_user
 from framework.auth.core import Auth
+from framework.mongo import database
 from framework.transactions import commands
 
 from website import settings
 from website.models import User, Node
 from website.conferences import views
 from website.conferences.model import Conference
-from website.conferences import utils, message
+from website.conferences import utils, message, submissions, tasks
+from website.files import utils as files_utils
 from website.util import api_url_for, web_url_for
 
 from tests.base import OsfTestCase, fake
@@ -444,6 +446,7 @@ class TestConferenceEmailViews(OsfTestCase):
 
     def test_conference_submissions(self):
         Node.remove()
+        submissions.get_collection().remove()
         conference1 = ConferenceFactory()
         conference2 = ConferenceFactory()
         # Create conference nodes
@@ -525,6 +528,61 @@ class TestConferenceEmailViews(OsfTestCase):
         assert_equal(res.status_code, 200)
 
 
+class TestConferenceSubmissions(OsfTestCase):
+
+    def setUp(self):
+        super(TestConferenceSubmissions, self).setUp()
+        self.conference = ConferenceFactory()
+        self.node = create_fake_conference_nodes(1, self.conference.endpoint)[0]
+
+    def test_node_is_indexed_when_tagged(self):
+        data = submissions.get_submissions(self.conference.endpoint)
+        assert_equal(len(data), 1)
+        assert_equal(data[0]['title'], self.node.title)
+        assert_equal(data[0]['confName'], self.conference.name)
+        assert_equal(data[0]['downloadUrl'], '')
+
+    def test_node_is_dropped_when_made_private(self):
+        self.node.set_privacy('private', auth=Auth(self.node.creator))
+        assert_equal(submissions.get_submissions(self.conference.endpoint), [])
+
+    def test_node_is_dropped_when_untagged(self):
+        self.node.remove_tag(self.conference.endpoint, auth=Auth(self.node.creator))
+        assert_equal(submissions.get_submissions(self.conference.endpoint), [])
+
+    def test_first_file_and_downloads(self):
+        record = self.node.get_addon('osfstorage').get_root().append_file('poster.pdf')
+        data = submissions.get_submissions(self.conference.endpoint)
+        assert_in(record._id, data[0]['downloadUrl'])
+        assert_equal(data[0]['download'], 0)
+
+        database['pagecounters'].insert({'_id': 'download:{}:{}'.format(self.node._id, record._id), 'total': 3})
+        assert_equal(submissions.get_submissions(self.conference.endpoint)[0]['download'], 3)
+
+        record.delete()
+        assert_equal(submissions.get_submissions(self.conference.endpoint)[0]['downloadUrl'], '')
+
+    def test_first_file_copied_in_bulk(self):
+        folder = ProjectFactory().get_addon('osfstorage').get_root().append_folder('posters')
+        folder.append_file('poster.pdf')
+        files_utils.copy_files(folder, self.node, parent=self.node.get_addon('osfstorage').get_root())
+        record = database['storedfilenode'].find_one({'node': self.node._id, 'is_file': True})
+        assert_in(record['_id'], submissions.get_submissions(self.conference.endpoint)[0]['downloadUrl'])
+
+    def test_refresh_conferences(self):
+        create_fake_conference_nodes(2, self.conference.endpoint)
+        tasks.refresh_conferences()
+        self.conference.reload()
+        assert_equal(self.conference.num_submissions, 3)
+
+    def test_refresh_conferences_rebuild(self):
+        submissions.get_collection().remove({'conference': self.conference.endpoint})
+        tasks.refresh_conferences(rebuild=True)
+        self.conference.reload()
+        assert_equal(self.conference.num_submissions, 1)
+        assert_equal(len(submissions.get_submissions(self.conference.endpoint)), 1)
+
+
 class TestConferenceModel(OsfTestCase):
 
     def test_endpoint_and_name_are_required(self):
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import mock
+import requests
+from nose.tools import *  # noqa
+
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory
+
+from website.discovery import feed
+
+
+def make_piwik_variable(*nodes):
+    values = [mock.Mock(value=node._id, actions=5, visits=2) for node in nodes]
+    return mock.Mock(label='Project ID', values=values)
+
+
+@mock.patch('website.discovery.feed.settings.PIWIK_HOST', 'http://piwik.test/')
+@mock.patch('website.discovery.feed.PiwikClient')
+class TestDiscoveryFeed(OsfTestCase):
+
+    def setUp(self):
+        super(TestDiscoveryFeed, self).setUp()
+        feed.clear_memory()
+        feed.get_collection().remove()
+        self.project = ProjectFactory(is_public=True)
+
+    def tearDown(self):
+        super(TestDiscoveryFeed, self).tearDown()
+        feed.clear_memory()
+
+    def test_refresh_feed(self, mock_client):
+        private = ProjectFactory()
+        mock_client.return_value.custom_variables = [make_piwik_variable(private, self.project)]
+        feed.refresh_feed()
+
+        stored = feed.get_collection().find_one({'_id': feed.FEED_ID})
+        assert_equal(stored['recent_public_projects'][0]['_id'], self.project._id)
+        assert_equal([node['_id'] for node in stored['popular_public_projects']], [self.project._id])
+        assert_equal(stored['hits'], {self.project._id: {'hits': 5, 'visits': 2}})
+
+    def test_refresh_feed_keeps_popular_lists_when_piwik_fails(self, mock_client):
+        mock_client.return_value.custom_variables = [make_piwik_variable(self.project)]
+        feed.refresh_feed()
+
+        newer = ProjectFactory(is_public=True)
+        type(mock_client.return_value).custom_variables = mock.PropertyMock(side_effect=requests.exceptions.Timeout)
+        feed.refresh_feed()
+
+        stored = feed.get_collection().find_one({'_id': feed.FEED_ID})
+        assert_equal(stored['recent_public_projects'][0]['_id'], newer._id)
+        assert_equal([node['_id'] for node in stored['popular_public_projects']], [self.project._id])
+
+    @mock.patch('website.discovery.feed.revalidate')
+    def test_get_feed_serves_stale_feed_and_revalidates(self, mock_revalidate, mock_client):
+        mock_client.return_value.custom_variables = [make_piwik_variable(self.project)]
+        feed.refresh_feed()
+        feed.get_collection().update({'_id': feed.FEED_ID}, {'$set': {'date_computed': datetime.datetime(2015, 1, 1)}})
+
+        served = feed.get_feed()
+        assert_equal(served['popular_public_projects'][0].title, self.project.title)
+        assert_true(mock_revalidate.called)
+
+    @mock.patch('website.discovery.feed.revalidate')
+    def test_get_feed_without_stored_feed(self, mock_revalidate, mock_client):
+        served = feed.get_feed()
+        assert_equal(served['recent_public_projects'][0]._id, self.project._id)
+        assert_equal(served['popular_public_projects'], [])
+        assert_true(mock_revalidate.called)
+        assert_false(mock_client.called)
+
+    def test_get_feed_from_memory(self, mock_client):
+        mock_client.return_value.custom_variables = []
+        feed.refresh_feed()
+        with mock.patch.object(feed, 'load_feed', wraps=feed.load_feed) as mock_load_feed:
+            served = feed.get_feed()
+            feed.get_collection().remove()
+            assert_equal(feed.get_feed()['recent_public_projects'][0]._id, served['recent_public_projects'][0]._id)
+            assert_equal(mock_load_feed.call_count, 1)
+            with mock.patch('website.discovery.feed.settings.DISCOVERY_FEED_MEMORY_TTL', 0):
+                with mock.patch('website.discovery.feed.revalidate'):
+                    feed.get_feed()
+            assert_equal(mock_load_feed.call_count, 2)
+
+    def test_get_feed_drops_private_and_deleted_nodes(self, mock_client):
+        private = ProjectFactory(is_public=True)
+        deleted = ProjectFactory(is_public=True)
+        mock_client.return_value.custom_variables = [make_piwik_variable(self.project, private, deleted)]
+        feed.refresh_feed()
+        assert_equal(len(feed.get_feed()['popular_public_projects']), 3)
+
+        private.is_public = False
+        private.save()
+        deleted.is_deleted = True
+        deleted.save()
+
+        served = feed.get_feed()
+        assert_equal([node._id for node in served['popular_public_projects']], [self.project._id])
+        assert_equal([node._id for node in served['recent_public_projects']], [self.project._id])
+
+    def test_activity_view(self, mock_client):
+        mock_client.return_value.custom_variables = [make_piwik_variable(self.project)]
+        feed.refresh_feed()
+
+        res = self.app.get('/explore/activity/')
+        assert_equal(res.status_code, 200)
+        assert_in(self.project.url, res.body)
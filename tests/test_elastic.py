@@ -12,6 +12,7 @@ from framework.auth.core import Auth
 from website import settings
 import website.search.search as search
 from website.search import elastic_search
+from website.search.exceptions import SearchException
 from website.search.util import build_query
 from website.search_migration.migrate import migrate
 from website.models import Retraction, NodeLicense, Tag
@@ -191,6 +192,50 @@ class TestUserUpdate(SearchTestCase):
         assert_true(all([user._id == doc[0]['id'] for doc in docs]))
 
 
+@requires_search
+class TestScheduleUserUpdate(OsfTestCase):
+
+    def setUp(self):
+        super(TestScheduleUserUpdate, self).setUp()
+        self.user = UserFactory()
+
+    def test_mark_update_pending_coalesces(self):
+        assert_true(elastic_search.mark_update_pending('user', self.user._id))
+        assert_false(elastic_search.mark_update_pending('user', self.user._id))
+        elastic_search.clear_update_pending('user', self.user._id)
+        assert_true(elastic_search.mark_update_pending('user', self.user._id))
+
+    def test_mark_update_pending_expires(self):
+        assert_true(elastic_search.mark_update_pending('user', self.user._id))
+        with mock.patch('website.search.elastic_search.time.time', return_value=time.time() + settings.SEARCH_UPDATE_PENDING_TIMEOUT + 1):
+            assert_true(elastic_search.mark_update_pending('user', self.user._id))
+
+    @mock.patch('website.search.search.enqueue_task')
+    def test_repeated_saves_schedule_one_update(self, mock_enqueue):
+        with mock.patch.object(settings, 'USE_CELERY', True):
+            self.user.fullname = 'Ziggy Stardust'
+            self.user.save()
+            self.user.fullname = 'Aladdin Sane'
+            self.user.save()
+        assert_equal(mock_enqueue.call_count, 1)
+        signature = mock_enqueue.call_args[0][0]
+        assert_equal(signature.kwargs['user_id'], self.user._id)
+        assert_equal(signature.options['countdown'], settings.SEARCH_UPDATE_DELAY)
+
+    @mock.patch('website.search.elastic_search.bulk_update_contributors')
+    @mock.patch('website.search.elastic_search.update_user')
+    def test_update_user_async_batches_nodes(self, mock_update_user, mock_bulk_update):
+        for _ in range(3):
+            ProjectFactory(creator=self.user)
+        elastic_search.mark_update_pending('user', self.user._id)
+        with mock.patch.object(settings, 'SEARCH_UPDATE_BATCH_SIZE', 2):
+            elastic_search.update_user_async(user_id=self.user._id)
+        assert_equal(mock_update_user.call_count, 1)
+        assert_equal([len(call[0][0]) for call in mock_bulk_update.call_args_list], [2, 1])
+        # The update is no longer pending
+        assert_true(elastic_search.mark_update_pending('user', self.user._id))
+
+
 @requires_search
 class TestProject(SearchTestCase):
 
@@ -427,6 +472,17 @@ class TestPublicNodes(SearchTestCase):
         docs = query('category:project AND ' + self.project.title)['results']
         assert_equal(len(docs), 1)
 
+    def test_change_description_does_not_reindex_files(self):
+        with mock.patch('website.search.elastic_search.update_file') as mock_update_file:
+            self.project.set_description('Bohemian Rhapsody', self.consolidate_auth, save=True)
+        assert_false(mock_update_file.called)
+
+    def test_change_title_reindexes_files(self):
+        self.project.get_addon('osfstorage').get_root().append_file('Innuendo')
+        with mock.patch('website.search.elastic_search.update_file') as mock_update_file:
+            self.project.set_title('Innuendo', self.consolidate_auth, save=True)
+        assert_true(mock_update_file.called)
+
     def test_add_tags(self):
 
         tags = ['stonecoldcrazy', 'just a poor boy', 'from-a-poor-family']
@@ -747,6 +803,49 @@ class TestUserSearchResults(SearchTestCase):
             assert_in(name, were_starfleet_names)
 
 
+class TestIndexBuffer(unittest.TestCase):
+
+    def test_actions_are_deduplicated_by_document(self):
+        buffer = elastic_search.IndexBuffer()
+        buffer.index(TEST_INDEX, 'file', 'abcde', {'name': 'first'})
+        buffer.index(TEST_INDEX, 'file', 'fghij', {'name': 'other'})
+        buffer.index(TEST_INDEX, 'file', 'abcde', {'name': 'second'})
+        assert_equal(len(buffer), 2)
+        assert_equal(buffer.actions[(TEST_INDEX, 'file', 'abcde')]['_source'], {'name': 'second'})
+
+        buffer.delete(TEST_INDEX, 'file', 'abcde')
+        assert_equal(len(buffer), 2)
+        assert_equal(buffer.actions[(TEST_INDEX, 'file', 'abcde')]['_op_type'], 'delete')
+
+    @mock.patch('website.search.elastic_search.helpers.bulk')
+    def test_nested_buffers_flush_once(self, mock_bulk):
+        mock_bulk.return_value = (2, [])
+        with elastic_search.index_buffer() as outer:
+            outer.index(TEST_INDEX, 'file', 'abcde', {})
+            with elastic_search.index_buffer() as inner:
+                assert_is(inner, outer)
+                inner.index(TEST_INDEX, 'file', 'fghij', {})
+            assert_false(mock_bulk.called)
+        assert_equal(mock_bulk.call_count, 1)
+        assert_equal(len(mock_bulk.call_args[0][1]), 2)
+
+    @mock.patch('website.search.elastic_search.helpers.bulk')
+    def test_flush_raises_on_failed_documents(self, mock_bulk):
+        mock_bulk.return_value = (0, [{'index': {'_id': 'abcde', 'status': 500}}])
+        buffer = elastic_search.IndexBuffer()
+        buffer.index(TEST_INDEX, 'file', 'abcde', {})
+        with assert_raises(SearchException):
+            buffer.flush()
+
+    @mock.patch('website.search.elastic_search.helpers.bulk')
+    def test_flush_ignores_deleting_missing_documents(self, mock_bulk):
+        mock_bulk.return_value = (0, [{'delete': {'_id': 'abcde', 'status': 404}}])
+        buffer = elastic_search.IndexBuffer()
+        buffer.delete(TEST_INDEX, 'file', 'abcde')
+        buffer.flush()
+        assert_false(mock_bulk.call_args[1]['raise_on_error'])
+
+
 class TestSearchExceptions(OsfTestCase):
     # Verify that the correct exception is thrown when the connection is lost
 
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+import mock
+import httpretty
+from nose.tools import *  # noqa
+
+from framework.auth import Auth
+from framework.exceptions import HTTPError
+from tests.base import OsfTestCase
+from tests.factories import AuthUserFactory, ProjectFactory
+
+from website.addons.base.file_tree import FileTreeWalker, TokenBucket
+from website.util import waterbutler_url_for
+
+
+def make_tree(depth, breadth, path='/'):
+    """Listings of a tree with `breadth` files and folders in each folder, by folder path."""
+    listings = {}
+    children = [
+        {'path': '{}file{}'.format(path, index), 'kind': 'file', 'size': 1}
+        for index in range(breadth)
+    ]
+    if depth:
+        for index in range(breadth):
+            folder_path = '{}folder{}/'.format(path, index)
+            children.append({'path': folder_path, 'kind': 'folder'})
+            listings.update(make_tree(depth - 1, breadth, folder_path))
+    listings[path] = children
+    return listings
+
+
+class FakeWaterButler(object):
+    """Serves folder listings from `listings`, answering the first `throttled` requests with 429."""
+
+    def __init__(self, listings, throttled=0):
+        self.listings = listings
+        self.throttled = throttled
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def list_folder(self, folder):
+        with self._lock:
+            self.requests.append(folder['path'])
+        return self.listings[folder['path']]
+
+    def callback(self, request, uri, headers):
+        path = request.querystring['path'][0]
+        with self._lock:
+            self.requests.append(path)
+            if self.throttled:
+                self.throttled -= 1
+                return (429, dict(headers, **{'Retry-After': '0'}), json.dumps({'message': 'Slow down'}))
+        return (200, headers, json.dumps({'data': self.listings[path]}))
+
+
+class TestTokenBucket(OsfTestCase):
+
+    def test_throttle_and_relax(self):
+        bucket = TokenBucket(8, min_rate=1)
+        bucket.throttle()
+        bucket.throttle()
+        assert_equal(bucket.rate, 2)
+        bucket.throttle()
+        bucket.throttle()
+        assert_equal(bucket.rate, 1)
+        for _ in range(20):
+            bucket.relax()
+        assert_equal(bucket.rate, 8)
+
+    @mock.patch('website.addons.base.file_tree.time')
+    def test_acquire_waits_for_tokens(self, mock_time):
+        now = [100.0]
+        mock_time.time.side_effect = lambda: now[0]
+
+        def sleep(seconds):
+            now[0] += seconds
+        mock_time.sleep.side_effect = sleep
+
+        bucket = TokenBucket(2)
+        for _ in range(4):
+            bucket.acquire()
+        assert_almost_equal(now[0], 101.0)
+        bucket.throttle(retry_after=5)
+        bucket.acquire()
+        assert_true(now[0] >= 106.0)
+
+
+class TestFileTreeWalker(OsfTestCase):
+
+    def setUp(self):
+        super(TestFileTreeWalker, self).setUp()
+        self.listings = make_tree(depth=3, breadth=3)
+        self.waterbutler = FakeWaterButler(self.listings)
+
+    def assert_tree(self, tree):
+        assert_equal([child['path'] for child in tree['children']], [child['path'] for child in self.listings[tree['path']]])
+        for child in tree['children']:
+            if child['kind'] == 'folder':
+                self.assert_tree(child)
+            else:
+                assert_not_in('children', child)
+
+    def test_walk(self):
+        tree = FileTreeWalker(self.waterbutler.list_folder, max_workers=4).walk({'path': '/', 'kind': 'folder'})
+        self.assert_tree(tree)
+        assert_equal(sorted(self.waterbutler.requests), sorted(self.listings.keys()))
+
+    def test_walk_streams_listings(self):
+        listed = []
+        walker = FileTreeWalker(
+            self.waterbutler.list_folder, max_workers=4, on_listing=lambda folder, children: listed.append(folder['path'])
+        )
+        walker.walk({'path': '/', 'kind': 'folder'})
+        assert_equal(listed[0], '/')
+        assert_equal(sorted(listed), sorted(self.listings.keys()))
+
+    def test_walk_resumes(self):
+        def list_folder(folder):
+            if folder['path'] == '/folder1/':
+                raise HTTPError(500)
+            return self.waterbutler.list_folder(folder)
+
+        listings = {}
+        with assert_raises(HTTPError):
+            FileTreeWalker(list_folder, max_workers=1, listings=listings).walk({'path': '/', 'kind': 'folder'})
+        assert_in('/', listings)
+        assert_not_in('/folder1/', listings)
+
+        self.waterbutler.requests = []
+        tree = FileTreeWalker(self.waterbutler.list_folder, max_workers=4, listings=listings).walk({'path': '/', 'kind': 'folder'})
+        self.assert_tree(tree)
+        assert_not_in('/', self.waterbutler.requests)
+        assert_in('/folder1/', self.waterbutler.requests)
+
+
+class TestGetFileTree(OsfTestCase):
+
+    def setUp(self):
+        super(TestGetFileTree, self).setUp()
+        self.user = AuthUserFactory()
+        self.node = ProjectFactory(creator=self.user)
+        self.addon = self.node.get_or_add_addon('osfstorage', auth=Auth(self.user))
+
+    def register(self, waterbutler):
+        for path in waterbutler.listings:
+            httpretty.register_uri(
+                httpretty.GET,
+                waterbutler_url_for('metadata', provider='osfstorage', path=path, node=self.node, user=self.user, view_only=True),
+                body=waterbutler.callback,
+                content_type='application/json',
+            )
+
+    @httpretty.activate
+    def test_get_file_tree_retries_throttled_listings(self):
+        waterbutler = FakeWaterButler(make_tree(depth=2, breadth=2), throttled=3)
+        self.register(waterbutler)
+        tree = self.addon._get_file_tree(user=self.user, max_workers=2)
+        assert_equal(len(tree['children']), 4)
+        # Each folder is listed once, plus the throttled attempts
+        assert_equal(len(waterbutler.requests), len(waterbutler.listings) + 3)
+
+    @httpretty.activate
+    def test_get_file_tree_builds_urls_on_calling_thread(self):
+        waterbutler = FakeWaterButler(make_tree(depth=2, breadth=2))
+        self.register(waterbutler)
+        cookie = self.user.get_or_create_cookie()
+        threads = []
+
+        def get_or_create_cookie():
+            threads.append(threading.current_thread().ident)
+            return cookie
+
+        with mock.patch.object(self.user, 'get_or_create_cookie', side_effect=get_or_create_cookie):
+            tree = self.addon._get_file_tree(user=self.user, max_workers=2)
+        assert_equal(len(tree['children']), 4)
+        assert_equal(set(threads), {threading.current_thread().ident})
+
+    @httpretty.activate
+    @mock.patch('website.addons.base.settings.ARCHIVE_STAT_MAX_RETRIES', 1)
+    def test_get_file_tree_gives_up_when_throttled(self):
+        waterbutler = FakeWaterButler(make_tree(depth=1, breadth=1), throttled=5)
+        self.register(waterbutler)
+        with assert_raises(HTTPError) as error:
+            self.addon._get_file_tree(user=self.user)
+        assert_equal(error.exception.code, 429)
@@ -10,8 +10,9 @@ from modularodm import Q
 from modularodm import fields
 from modularodm.storage.mongostorage import MongoStorage
 
-from framework.mongo import database
+from framework.mongo import client, database
 from framework.guid.model import GuidStoredObject
+from framework.guid.pool import GuidPool
 
 from website import models
 
@@ -32,6 +33,68 @@ class TestGuidStoredObject(OsfTestCase):
         assert_equal(guids[0].referent, fake_guid)
         assert_equal(guids[0]._id, fake_guid._id)
 
+    def test_guid_stored_object_takes_reserved_guid(self):
+        node = NodeFactory()
+        guid = models.Guid.load(node._id)
+        assert_equal(len(node._id), 5)
+        assert_equal(guid.referent, node)
+
+
+class TestGuidPool(OsfTestCase):
+
+    def setUp(self):
+        super(TestGuidPool, self).setUp()
+        self.pool = GuidPool(length=5, batch_size=10, low_water=0)
+
+    def test_reserve_skips_blacklisted_and_existing(self):
+        database['blacklistguid'].insert({'_id': 'abcde'})
+        database['guid'].insert({'_id': 'bcdef', 'referent': None})
+        with mock.patch.object(self.pool, 'generate_candidates', return_value={'abcde', 'bcdef', 'cdefg'}):
+            assert_equal(self.pool.reserve(3), 1)
+        assert_equal(self.pool.take(), 'cdefg')
+        assert_equal(self.pool.stats()['collisions'], 2)
+        assert_almost_equal(self.pool.stats()['collision_rate'], 2.0 / 3)
+
+    def test_allocate_points_reserved_guid_to_referent(self):
+        node = NodeFactory()
+        guid = models.Guid.generate(node)
+        assert_equal(guid.referent, node)
+        assert_equal(database['guid'].find_one({'_id': guid._id})['referent'], [node._id, 'node'])
+
+    def test_allocate_skips_lost_reservations(self):
+        self.pool.reserve(2)
+        lost = self.pool._ids[0]
+        database['guid'].remove({'_id': lost})
+        guid_id = self.pool.allocate(referent_name='node')
+        assert_not_equal(guid_id, lost)
+        assert_equal(database['guid'].find_one({'_id': guid_id})['referent'], [guid_id, 'node'])
+
+    def test_take_reserves_one_id_when_empty(self):
+        assert_equal(self.pool.stats()['depth'], 0)
+        with mock.patch.object(self.pool, '_refill_in_background') as mock_refill:
+            guid_id = self.pool.take()
+        assert_true(mock_refill.called)
+        assert_equal(self.pool.stats()['depth'], 0)
+        assert_equal(database['guid'].find_one({'_id': guid_id})['referent'], None)
+
+    @mock.patch('framework.guid.pool.CLIENT_POOL')
+    def test_refill_releases_client(self, mock_client_pool):
+        mock_client_pool.acquire.return_value = client._get_current_object()
+        self.pool._refilling = True
+        self.pool._refill()
+        assert_true(mock_client_pool.release.called)
+        assert_equal(self.pool.stats()['depth'], 10)
+        assert_false(self.pool._refilling)
+
+    @mock.patch('framework.guid.pool.CLIENT_POOL')
+    def test_refill_releases_client_on_error(self, mock_client_pool):
+        mock_client_pool.acquire.return_value = client._get_current_object()
+        self.pool._refilling = True
+        with mock.patch.object(self.pool, 'reserve_ids', side_effect=Exception):
+            self.pool._refill()
+        assert_true(mock_client_pool.release.called)
+        assert_false(self.pool._refilling)
+
 
 class TestResolveGuid(OsfTestCase):
 
@@ -1564,6 +1564,43 @@ class TestNode(OsfTestCase):
         # Hidden log is not returned
         assert_equal(n_new_logs, n_orig_logs - 1)
 
+    def test_logs_are_stamped_with_lineage(self):
+        grandchild = NodeFactory(creator=self.user, parent=self.node)
+        assert_equal(grandchild.logs[-1].lineage, [grandchild._id, self.node._id, self.parent._id])
+
+    def test_get_aggregate_logs_queryset_includes_descendant_logs(self):
+        grandchild = NodeFactory(creator=self.user, parent=self.node)
+        logs = list(self.parent.get_aggregate_logs_queryset(Auth(self.user)))
+        assert_equal(
+            {log.node._id for log in logs},
+            {self.parent._id, self.node._id, grandchild._id}
+        )
+
+    def test_get_aggregate_logs_queryset_excludes_descendants_user_cannot_view(self):
+        self.parent.set_privacy('public', auth=self.auth)
+        non_contrib = UserFactory()
+        logs = list(self.parent.get_aggregate_logs_queryset(Auth(non_contrib)))
+        assert_true(logs)
+        assert_not_in(self.node._id, [log.node._id for log in logs])
+
+    def test_templated_component_logs_are_restamped_with_lineage(self):
+        templated = self.parent.use_as_template(auth=self.auth)
+        templated_child = templated.nodes[0]
+        assert_equal(
+            templated_child.logs[-1].lineage,
+            [templated_child._id, templated._id]
+        )
+        logs = list(templated.get_aggregate_logs_queryset(self.auth))
+        assert_in(templated_child._id, [log.node._id for log in logs])
+
+    def test_registered_component_logs_are_restamped_with_lineage(self):
+        registration = RegistrationFactory(project=self.parent)
+        child_registration = registration.nodes[0]
+        assert_equal(
+            child_registration.logs[-1].lineage,
+            [child_registration._id, registration._id]
+        )
+
     def test_validate_categories(self):
         with assert_raises(ValidationError):
             Node(category='invalid').save()  # an invalid category
@@ -4292,6 +4329,29 @@ class TestNodeLog(OsfTestCase):
         assert_equal(project._id, log_node_forked.original_node._id)
         assert_equal(fork._id, log_node_forked.node._id)
 
+    def test_clone_logs(self):
+        user = UserFactory()
+        project = ProjectFactory(creator=user)
+        for i in range(4):
+            project.add_log(NodeLog.TAG_ADDED, params={'node': project._id, 'tag': str(i)}, auth=Auth(user))
+        parent = ProjectFactory(creator=user)
+        copy = NodeFactory(creator=user, parent=parent)
+
+        assert_equal(NodeLog.clone_logs(project, copy, batch_size=2), 5)
+
+        originals = list(project.logs)
+        clones = list(NodeLog.find(Q('node', 'eq', copy._id) & Q('original_node', 'eq', project._id)).sort('date'))
+        assert_equal(len(clones), 5)
+        for original, clone in zip(originals, clones):
+            assert_not_equal(clone._id, original._id)
+            assert_equal(clone.node, copy)
+            assert_equal(clone.original_node, project)
+            assert_equal(clone.lineage, [copy._id, parent._id])
+            assert_equal(clone.action, original.action)
+            assert_equal(clone.params, original.params)
+            assert_equal(clone.user, user)
+            assert_equal(clone.date, original.date)
+
 
 class TestPermissions(OsfTestCase):
 
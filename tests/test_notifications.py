@@ -14,6 +14,7 @@ from framework.auth.core import User
 from framework.guid.model import Guid
 
 from website.notifications.tasks import get_users_emails, send_users_email, group_by_node, remove_notifications
+from website.notifications.tasks import iter_users_emails_batches
 from website.notifications import constants
 from website.notifications.model import NotificationDigest
 from website.notifications.model import NotificationSubscription
@@ -1196,6 +1197,44 @@ class TestCompileSubscriptions(NotificationTestCase):
         subs = emails.compile_subscriptions(node5, 'file_updated')
         assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
 
+    def test_admin_on_parent_listed_on_private_child(self):
+        self.base_project.add_contributor(self.user_4, permissions=['read', 'write', 'admin'])
+        self.base_sub.email_digest.append(self.user_4)
+        self.base_sub.save()
+        result = emails.compile_subscriptions(self.private_node, 'file_updated')
+        assert_equal({'email_transactional': [], 'none': [], 'email_digest': [self.user_4._id]}, result)
+
+    def test_event_subscription_takes_precedence(self):
+        self.shared_sub.email_transactional.append(self.user_1)
+        self.shared_sub.save()
+        file_sub = factories.NotificationSubscriptionFactory(
+            _id=self.shared_node._id + '_xyz42_file_updated',
+            owner=self.shared_node,
+            event_name='xyz42_file_updated'
+        )
+        file_sub.save()
+        file_sub.none.append(self.user_1)
+        file_sub.save()
+        result = emails.compile_subscriptions(self.shared_node, 'file_updated', 'xyz42_file_updated')
+        assert_equal({'email_transactional': [], 'none': [self.user_1._id], 'email_digest': []}, result)
+
+    def test_subscriptions_fetched_once_per_request(self):
+        self.base_sub.email_transactional.append(self.user_1)
+        self.base_sub.save()
+        with mock.patch.object(NotificationSubscription, 'find', wraps=NotificationSubscription.find) as mock_find:
+            first = emails.compile_subscriptions(self.shared_node, 'file_updated')
+            first['email_transactional'].remove(self.user_1._id)
+            second = emails.compile_subscriptions(self.shared_node, 'file_updated')
+        assert_equal(mock_find.call_count, 1)
+        assert_equal({'email_transactional': [self.user_1._id], 'none': [], 'email_digest': []}, second)
+
+    def test_cache_cleared_when_subscription_saved(self):
+        emails.compile_subscriptions(self.shared_node, 'file_updated')
+        self.shared_sub.email_digest.append(self.user_1)
+        self.shared_sub.save()
+        result = emails.compile_subscriptions(self.shared_node, 'file_updated')
+        assert_equal({'email_transactional': [], 'none': [], 'email_digest': [self.user_1._id]}, result)
+
 
 class TestMoveSubscription(NotificationTestCase):
     def setUp(self):
@@ -1612,7 +1651,7 @@ class TestSendDigest(OsfTestCase):
         ]
 
         assert_equal(len(user_groups), 2)
-        assert_equal(user_groups, expected)
+        assert_equal(user_groups, sorted(expected, key=lambda group: group['user_id']))
         digest_ids = [d._id, d2._id, d3._id]
         remove_notifications(email_notification_ids=digest_ids)
 
@@ -1663,12 +1702,13 @@ class TestSendDigest(OsfTestCase):
         ]
 
         assert_equal(len(user_groups), 2)
-        assert_equal(user_groups, expected)
+        assert_equal(user_groups, sorted(expected, key=lambda group: group['user_id']))
         digest_ids = [d._id, d2._id, d3._id]
         remove_notifications(email_notification_ids=digest_ids)
 
-    @mock.patch('website.mails.send_mail')
-    def test_send_users_email_called_with_correct_args(self, mock_send_mail):
+    @mock.patch('website.mails.send_rendered_mail')
+    @mock.patch('website.mails.render_mail')
+    def test_send_users_email_called_with_correct_args(self, mock_render_mail, mock_send_rendered_mail):
         send_type = 'email_transactional'
         d = factories.NotificationDigestFactory(
             user_id=factories.UserFactory()._id,
@@ -1680,14 +1720,16 @@ class TestSendDigest(OsfTestCase):
         d.save()
         user_groups = get_users_emails(send_type)
         send_users_email(send_type)
-        assert_true(mock_send_mail.called)
-        assert_equals(mock_send_mail.call_count, len(user_groups))
+        assert_true(mock_render_mail.called)
+        assert_equals(mock_render_mail.call_count, len(user_groups))
+        assert_equals(mock_send_rendered_mail.call_count, len(user_groups))
+        mock_send_rendered_mail.assert_called_with(mock_render_mail.return_value)
 
         last_user_index = len(user_groups) - 1
         user = User.load(user_groups[last_user_index]['user_id'])
         email_notification_ids = [message['_id'] for message in user_groups[last_user_index]['info']]
 
-        args, kwargs = mock_send_mail.call_args
+        args, kwargs = mock_render_mail.call_args
 
         assert_equal(kwargs['to_addr'], user.username)
         assert_equal(kwargs['mimetype'], 'html')
@@ -1695,7 +1737,75 @@ class TestSendDigest(OsfTestCase):
         assert_equal(kwargs['name'], user.fullname)
         message = group_by_node(user_groups[last_user_index]['info'])
         assert_equal(kwargs['message'], message)
-        assert_equal(kwargs['callback'], remove_notifications(email_notification_ids=email_notification_ids))
+        assert_equal(NotificationDigest.find(Q('_id', 'in', email_notification_ids)).count(), 0)
+
+    @mock.patch('website.mails.send_rendered_mail')
+    @mock.patch('website.mails.render_mail')
+    def test_send_users_email_streams_batches(self, mock_render_mail, mock_send_rendered_mail):
+        send_type = 'email_transactional'
+        users = [factories.UserFactory() for _ in range(5)]
+        project = factories.ProjectFactory()
+        for user in users:
+            for _ in range(2):
+                factories.NotificationDigestFactory(
+                    user_id=user._id,
+                    send_type=send_type,
+                    timestamp=datetime.datetime.utcnow(),
+                    message='Hello',
+                    node_lineage=[project._id]
+                ).save()
+        batches = list(iter_users_emails_batches(send_type, 2))
+        assert_equal([len(batch) for batch in batches], [2, 2, 1])
+        assert_true(all(len(group['info']) == 2 for batch in batches for group in batch))
+        with mock.patch.object(settings, 'NOTIFICATION_DIGEST_BATCH_SIZE', 2):
+            send_users_email(send_type)
+        assert_equal(mock_send_rendered_mail.call_count, 5)
+        assert_equal(NotificationDigest.find(Q('send_type', 'eq', send_type)).count(), 0)
+
+    @mock.patch('website.mails.send_rendered_mail')
+    def test_send_users_email_keeps_digests_of_failed_emails(self, mock_send_rendered_mail):
+        send_type = 'email_transactional'
+        project = factories.ProjectFactory()
+        failed_user, sent_user = factories.UserFactory(), factories.UserFactory()
+        digests = {}
+        for user in (failed_user, sent_user):
+            digests[user._id] = factories.NotificationDigestFactory(
+                user_id=user._id,
+                send_type=send_type,
+                timestamp=datetime.datetime.utcnow(),
+                message='Hello',
+                node_lineage=[project._id]
+            )
+            digests[user._id].save()
+
+        def send_rendered_mail(rendered):
+            if rendered['to_addr'] == failed_user.username:
+                raise Exception('Could not send')
+        mock_send_rendered_mail.side_effect = send_rendered_mail
+
+        with mock.patch('website.notifications.tasks.log_exception') as mock_log_exception:
+            send_users_email(send_type)
+        assert_true(mock_log_exception.called)
+        assert_equal(mock_send_rendered_mail.call_count, 2)
+        assert_equal(NotificationDigest.find(Q('_id', 'eq', digests[failed_user._id]._id)).count(), 1)
+        assert_equal(NotificationDigest.find(Q('_id', 'eq', digests[sent_user._id]._id)).count(), 0)
+
+    @mock.patch('website.notifications.tasks.group_by_node')
+    @mock.patch('website.mails.send_rendered_mail')
+    def test_send_users_email_removes_digests_without_email(self, mock_send_rendered_mail, mock_group_by_node):
+        mock_group_by_node.return_value = {}
+        send_type = 'email_transactional'
+        d = factories.NotificationDigestFactory(
+            user_id=factories.UserFactory()._id,
+            send_type=send_type,
+            timestamp=datetime.datetime.utcnow(),
+            message='Hello',
+            node_lineage=[factories.ProjectFactory()._id]
+        )
+        d.save()
+        send_users_email(send_type)
+        assert_false(mock_send_rendered_mail.called)
+        assert_equal(NotificationDigest.find(Q('_id', 'eq', d._id)).count(), 0)
 
     def test_remove_sent_digest_notifications(self):
         d = factories.NotificationDigestFactory(
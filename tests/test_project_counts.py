@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import mock
+from nose.tools import *  # noqa PEP8 asserts
+
+from framework.auth import Auth
+from framework.mongo import database
+from website.project.counts import compute_node_counts, get_node_counts, invalidate_node_counts
+
+from tests.base import OsfTestCase
+from tests.factories import (
+    AuthUserFactory, ProjectFactory, CollectionFactory, CommentFactory, WatchConfigFactory,
+    RegistrationFactory, ForkFactory, NodeFactory,
+)
+
+
+class TestNodeCounts(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeCounts, self).setUp()
+        self.user = AuthUserFactory()
+        self.auth = Auth(self.user)
+        self.project = ProjectFactory(creator=self.user)
+
+    def test_counts_of_new_project(self):
+        assert_equal(compute_node_counts(self.project._id), {
+            'registration_count': 0,
+            'fork_count': 0,
+            'templated_count': 0,
+            'watched_count': 0,
+            'points': 0,
+            'has_comments': False,
+        })
+
+    def test_counts_match_node_queries(self):
+        RegistrationFactory(project=self.project)
+        ForkFactory(project=self.project, user=self.user)
+        deleted_fork = ForkFactory(project=self.project, user=self.user)
+        deleted_fork.remove_node(self.auth)
+        self.project.use_as_template(self.auth).save()
+        self.user.watch(WatchConfigFactory(node=self.project))
+        NodeFactory(creator=self.user).add_pointer(self.project, self.auth, save=True)
+        CollectionFactory(creator=self.user).add_pointer(self.project, self.auth, save=True)
+        CommentFactory(node=self.project, user=self.user)
+
+        counts = compute_node_counts(self.project._id)
+        assert_equal(counts['registration_count'], self.project.registrations_all.count())
+        assert_equal(counts['fork_count'], self.project.forks.count())
+        assert_equal(counts['fork_count'], 1)
+        assert_equal(counts['templated_count'], self.project.templated_list.count())
+        assert_equal(counts['watched_count'], self.project.watches.count())
+        assert_equal(counts['points'], len(self.project.get_points(deleted=False, folders=False)))
+        assert_equal(counts['points'], 1)
+        assert_true(counts['has_comments'])
+
+    def test_counts_are_cached(self):
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 0)
+        database['watchconfig'].insert({'_id': 'rawwatch', 'node': self.project._id})
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 0)
+        invalidate_node_counts(self.project._id)
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 1)
+
+    def test_counts_cached_outside_of_request_client(self):
+        with mock.patch('website.project.counts.CLIENT_POOL') as mock_pool:
+            mock_client = mock_pool.acquire.return_value
+            mock_client.__getitem__.return_value.__getitem__.return_value.update.side_effect = Exception
+            # A failed write to the cache is logged, and the computed counts are still returned
+            assert_equal(get_node_counts(self.project._id)['watched_count'], 0)
+        client_id = mock_pool.acquire.call_args[0][0]
+        mock_pool.release.assert_called_once_with(client_id)
+        assert_is_none(database['nodecounts'].find_one({'_id': self.project._id}))
+
+    def test_fork_invalidates_counts(self):
+        assert_equal(get_node_counts(self.project._id)['fork_count'], 0)
+        fork = ForkFactory(project=self.project, user=self.user)
+        assert_equal(get_node_counts(self.project._id)['fork_count'], 1)
+        fork.remove_node(self.auth)
+        assert_equal(get_node_counts(self.project._id)['fork_count'], 0)
+
+    def test_comment_invalidates_counts(self):
+        assert_false(get_node_counts(self.project._id)['has_comments'])
+        CommentFactory(node=self.project, user=self.user)
+        assert_true(get_node_counts(self.project._id)['has_comments'])
+
+    def test_watch_and_unwatch_invalidate_counts(self):
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 0)
+        config = WatchConfigFactory(node=self.project)
+        self.user.watch(config)
+        self.user.save()
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 1)
+        self.user.unwatch(config)
+        assert_equal(get_node_counts(self.project._id)['watched_count'], 0)
+
+    def test_pointers_invalidate_counts(self):
+        node = NodeFactory(creator=self.user)
+        assert_equal(get_node_counts(self.project._id)['points'], 0)
+        pointer = node.add_pointer(self.project, self.auth, save=True)
+        assert_equal(get_node_counts(self.project._id)['points'], 1)
+        node.rm_pointer(pointer, self.auth)
+        assert_equal(get_node_counts(self.project._id)['points'], 0)
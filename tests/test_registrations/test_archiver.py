@@ -9,6 +9,7 @@ import copy
 import re
 
 import celery
+from celery.exceptions import Retry
 import mock  # noqa
 from contextlib import nested
 from mock import call
@@ -32,6 +33,7 @@ from website.archiver import (
 from website.archiver import utils as archiver_utils
 from website.app import *  # noqa
 from website.archiver import listeners
+from website.archiver import listings as file_listings
 from website.archiver.tasks import *   # noqa
 from website.archiver.model import ArchiveTarget, ArchiveJob
 from website.archiver.decorators import fail_archive_on_error
@@ -149,7 +151,7 @@ class MockAddon(mock.MagicMock, StorageAddonBase):
 
     complete = True
 
-    def _get_file_tree(self, user, version):
+    def _get_file_tree(self, user, version, max_workers=1, listings=None):
         return FILE_TREE
 
     def after_register(self, *args):
@@ -349,7 +351,7 @@ class TestStorageAddonBase(ArchiverTestCase):
     }
 
     @httpretty.activate
-    def _test__get_file_tree(self, addon_short_name):
+    def _test__get_file_tree(self, addon_short_name, max_workers=1):
         requests_made = []
         def callback(request, uri, headers):
             path = request.querystring['path'][0]
@@ -375,12 +377,13 @@ class TestStorageAddonBase(ArchiverTestCase):
             'name': '',
             'kind': 'folder',
         }
-        file_tree = addon._get_file_tree(root, self.user)
+        file_tree = addon._get_file_tree(root, self.user, max_workers=max_workers)
         assert_equal(FILE_TREE, file_tree)
         assert_equal(requests_made, ['/', '/qwerty'])  # no requests made for files
 
     def _test_addon(self, addon_short_name):
         self._test__get_file_tree(addon_short_name)
+        self._test__get_file_tree(addon_short_name, max_workers=4)
 
     def test_addons(self):
         #  Test that each addon in settings.ADDONS_ARCHIVABLE other than wiki/forward implements the StorageAddonBase interface
@@ -415,6 +418,57 @@ class TestArchiverTasks(ArchiverTestCase):
         assert_equal(res.target_name, 'dropbox')
         assert_equal(res.disk_usage, 128 + 256)
 
+    @use_fake_addons
+    def test_stat_addon_caches_result(self):
+        stat_addon('dropbox', self.archive_job._id)
+        target = self.archive_job.get_target('dropbox')
+        assert_equal(target.bytes_total, 128 + 256)
+        with mock.patch.object(MockAddon, '_get_file_tree') as mock_get_file_tree:
+            res = stat_addon('dropbox', self.archive_job._id)
+        assert_false(mock_get_file_tree.called)
+        assert_equal(res.target_name, 'dropbox')
+        assert_equal(res.num_files, 2)
+        assert_equal(res.disk_usage, 128 + 256)
+
+    @use_fake_addons
+    def test_stat_addon_caches_only_totals(self):
+        stat_addon('dropbox', self.archive_job._id)
+        target = self.archive_job.get_target('dropbox')
+        assert_not_in('targets', target.stat_result)
+        assert_equal(target.stat_result['num_files'], 2)
+        assert_equal(target.stat_result['disk_usage'], 128 + 256)
+
+    @use_fake_addons
+    def test_stat_addon_retried_with_saved_listings_when_throttled(self):
+        root_listing = [{'path': '/folder/', 'kind': 'folder', 'name': 'folder'}]
+
+        def throttled_file_tree(user, version, max_workers=1, listings=None):
+            listings['/'] = root_listing
+            raise HTTPError(429, data={'error': 'Too many requests'})
+
+        with mock.patch.object(MockAddon, '_get_file_tree', side_effect=throttled_file_tree):
+            with mock.patch.object(stat_addon, 'retry', return_value=Retry()) as mock_retry:
+                with assert_raises(Retry):
+                    stat_addon('dropbox', self.archive_job._id)
+        assert_true(mock_retry.called)
+        assert_equal(file_listings.get_listings(self.archive_job._id, 'dropbox'), {'/': root_listing})
+        assert_not_equal(self.archive_job.get_target('dropbox').status, ARCHIVER_NETWORK_ERROR)
+
+        with mock.patch.object(MockAddon, '_get_file_tree', return_value=FILE_TREE) as mock_get_file_tree:
+            stat_addon('dropbox', self.archive_job._id)
+        assert_equal(mock_get_file_tree.call_args[1]['listings'], {'/': root_listing})
+        assert_equal(file_listings.get_listings(self.archive_job._id, 'dropbox'), {})
+
+    @use_fake_addons
+    def test_stat_addon_not_retried_on_other_errors(self):
+        with mock.patch.object(MockAddon, '_get_file_tree', side_effect=HTTPError(500, data={'error': 'Oops'})):
+            with mock.patch.object(stat_addon, 'retry') as mock_retry:
+                with assert_raises(HTTPError):
+                    stat_addon('dropbox', self.archive_job._id)
+        assert_false(mock_retry.called)
+        self.archive_job.reload()
+        assert_equal(self.archive_job.get_target('dropbox').status, ARCHIVER_NETWORK_ERROR)
+
     @use_fake_addons
     @mock.patch('website.archiver.tasks.archive_addon.delay')
     def test_archive_node_pass(self, mock_archive_addon):
@@ -446,7 +500,7 @@ class TestArchiverTasks(ArchiverTestCase):
     def test_archive_node_does_not_archive_empty_addons(self, mock_archive_addon):
         with mock.patch.object(self.src, 'get_addon') as mock_get_addon:
             mock_addon = MockAddon()
-            def empty_file_tree(user, version):
+            def empty_file_tree(user, version, **kwargs):
                 return {
                     'path': '/',
                     'kind': 'folder',
@@ -1261,6 +1315,42 @@ class TestArchiveJobModel(OsfTestCase):
         assert_equal(item['stat_result'], target.stat_result)
         assert_equal(item['errors'], target.errors)
 
+    def test_progress(self):
+        target = ArchiveTarget(name='neon-archive', folder_name='Neon Archive', bytes_total=400)
+        target.save()
+        job = ArchiveJob()
+        job.target_addons.append(target)
+        job.save()
+
+        job.record_progress('/Neon Archive/folder/file.txt', 100)
+        job.record_progress('/Other Archive/file.txt', 100)
+        assert_equal(job.get_target('neon-archive').bytes_done, 100)
+
+        target = job.get_target('neon-archive')
+        target.datetime_started = datetime.datetime.utcnow() - datetime.timedelta(seconds=10)
+        target.save()
+        progress = job.progress()[0]
+        assert_equal(progress['bytes_done'], 100)
+        assert_equal(progress['bytes_total'], 400)
+        assert_true(progress['throughput'] > 0)
+        assert_true(progress['eta'] > datetime.datetime.utcnow())
+
+    def test_record_progress_outside_of_request_client(self):
+        target = ArchiveTarget(name='neon-archive', folder_name='Neon Archive', bytes_total=400)
+        target.save()
+        job = ArchiveJob()
+        job.target_addons.append(target)
+        job.save()
+
+        with mock.patch('website.archiver.model.CLIENT_POOL') as mock_pool:
+            mock_client = mock_pool.acquire.return_value
+            mock_client.__getitem__.return_value.__getitem__.return_value.update.side_effect = Exception
+            # A failed write is logged, not raised into the callback
+            job.record_progress('/Neon Archive/file.txt', 100)
+        client_id = mock_pool.acquire.call_args[0][0]
+        assert_equal(client_id[0], 'ArchiveJob')
+        mock_pool.release.assert_called_once_with(client_id)
+
     @use_fake_addons
     def test_get_target(self):
         proj = factories.ProjectFactory()
@@ -14,6 +14,7 @@ from tests.factories import (UserFactory, ProjectFactory, NodeFactory,
                              AuthFactory, PointerFactory, RegistrationFactory,
                              PrivateLinkFactory)
 from framework.auth import Auth
+from website.project.model import Node
 from website.util import rubeus
 from website.util.rubeus import sort_by_name
 
@@ -295,7 +296,7 @@ class TestRubeus(OsfTestCase):
         collector = rubeus.NodeFileCollector(
             self.project, Auth(user=UserFactory())
         )
-        nodes = collector._collect_components(self.project, visited=[])
+        nodes = collector._collect_components(self.project, visited=set())
         assert_equal(len(nodes), 0)
 
     def test_serialized_pointer_has_flag_indicating_its_a_pointer(self):
@@ -304,6 +305,28 @@ class TestRubeus(OsfTestCase):
         ret = serializer._serialize_node(pointer)
         assert_true(ret['isPointer'])
 
+    @mock.patch('website.util.rubeus.NodeFileCollector._collect_addons', return_value=[])
+    def test_permissions_checked_once_per_node(self, mock_collect_addons):
+        component = NodeFactory(creator=self.project.creator, parent=self.project)
+        self.project.add_pointer(component, auth=self.consolidated_auth)
+        collector = rubeus.NodeFileCollector(self.project, self.consolidated_auth)
+        with mock.patch('website.project.model.Node.can_view', autospec=True, return_value=True) as mock_can_view:
+            ret = collector.to_hgrid()
+        assert_equal(len(ret[0]['children']), 1)
+        assert_equal(mock_can_view.call_count, 1)
+
+    @mock.patch('website.util.rubeus.NodeFileCollector._collect_addons', return_value=[])
+    def test_to_hgrid_loads_each_level_once(self, mock_collect_addons):
+        component = NodeFactory(creator=self.project.creator, parent=self.project)
+        NodeFactory(creator=self.project.creator, parent=component)
+        NodeFactory(creator=self.project.creator, parent=component)
+        collector = rubeus.NodeFileCollector(self.project, self.consolidated_auth)
+        with mock.patch('website.project.model.Node.find', wraps=Node.find) as mock_find:
+            with mock.patch('website.project.model.Node._is_cached', return_value=False):
+                ret = collector.to_hgrid()
+        assert_equal(len(ret[0]['children'][0]['children']), 2)
+        assert_equal(mock_find.call_count, 2)
+
 
 # TODO: Make this more reusable across test modules
 mock_addon = mock.Mock()
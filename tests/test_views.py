@@ -1161,6 +1161,57 @@ class TestGetNodeTree(OsfTestCase):
         assert_equal(parent_node_id, project._primary_key)
         assert_equal(children, [])
 
+    def test_get_node_with_readable_grandchild(self):
+        project = ProjectFactory(creator=self.user2)
+        child = NodeFactory(parent=project, creator=self.user2)
+        grandchild = NodeFactory(parent=child, creator=self.user)
+        NodeFactory(parent=project, creator=self.user2)
+        url = project.api_url_for('get_node_tree')
+        res = self.app.get(url, auth=self.user.auth)
+        tree = res.json[0]
+        assert_equal(tree['node']['title'], 'Private Project')
+        assert_false(tree['permissions']['view'])
+        assert_equal(len(tree['children']), 1)
+        assert_equal(tree['children'][0]['node']['id'], child._id)
+        assert_equal(tree['children'][0]['kind'], 'folder')
+        assert_equal(tree['children'][0]['children'][0]['node']['id'], grandchild._id)
+        assert_true(tree['children'][0]['children'][0]['permissions']['view'])
+
+    def test_get_node_admin_reads_descendants(self):
+        project = ProjectFactory(creator=self.user)
+        child = NodeFactory(parent=project, creator=self.user2)
+        grandchild = NodeFactory(parent=child, creator=self.user2)
+        deleted = NodeFactory(parent=project, creator=self.user)
+        deleted.remove_node(Auth(self.user))
+        url = project.api_url_for('get_node_tree')
+        res = self.app.get(url, auth=self.user.auth)
+        tree = res.json[0]
+        assert_equal([each['node']['id'] for each in tree['children']], [child._id])
+        child_tree = tree['children'][0]
+        assert_true(child_tree['permissions']['view'])
+        assert_equal(child_tree['kind'], 'node')
+        assert_false(child_tree['node']['is_admin'])
+        assert_equal(child_tree['children'][0]['node']['id'], grandchild._id)
+        assert_equal(child_tree['node']['contributors'], [
+            {'id': self.user2._id, 'is_admin': True, 'is_confirmed': True}
+        ])
+
+
+    def test_get_node_with_affiliated_institutions(self):
+        institution = InstitutionFactory()
+        project = ProjectFactory(creator=self.user)
+        child = NodeFactory(parent=project, creator=self.user)
+        for node in (project, child):
+            node.affiliated_institutions.append(institution)
+            node.save()
+        url = project.api_url_for('get_node_tree')
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        tree = res.json[0]
+        expected = [{'id': institution.pk, 'name': institution.name}]
+        assert_equal(tree['node']['affiliated_institutions'], expected)
+        assert_equal(tree['children'][0]['node']['affiliated_institutions'], expected)
+
 
 class TestUserProfile(OsfTestCase):
 
@@ -79,6 +79,32 @@ class TestWatching(OsfTestCase):
         log_ids = list(self.user.get_recent_log_ids(since=since))
         assert_equal(len(log_ids), 3)
 
+    def test_get_recent_log_ids_of_several_nodes(self):
+        other_project = ProjectFactory(creator=self.user)
+        self._watch_project(self.project)
+        self._watch_project(other_project)
+        other_log = other_project.add_log(
+            'tag_added',
+            params={'project': other_project._primary_key},
+            auth=self.consolidate_auth,
+            save=True,
+        )
+        log_ids = list(self.user.get_recent_log_ids())
+        expected = [log._id for log in self.project.logs] + [log._id for log in other_project.logs]
+        assert_equal(log_ids, sorted(expected, reverse=True))
+        assert_equal(log_ids[0], other_log._id)
+
+    def test_get_recent_log_ids_pages(self):
+        self._watch_project(self.project)
+        log_ids = list(self.user.get_recent_log_ids())
+        first_page = list(self.user.get_recent_log_ids(limit=2))
+        assert_equal(first_page, log_ids[:2])
+        second_page = list(self.user.get_recent_log_ids(before=first_page[-1], limit=2))
+        assert_equal(second_page, log_ids[2:4])
+
+    def test_get_recent_log_ids_not_watching(self):
+        assert_equal(list(self.user.get_recent_log_ids()), [])
+
     def test_get_daily_digest_log_ids(self):
         self._watch_project(self.project)
         day_log_ids = list(self.user.get_daily_digest_log_ids())
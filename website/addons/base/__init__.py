@@ -3,10 +3,10 @@ import glob
 import importlib
 import mimetypes
 import os
-from time import sleep
 
 from bson import ObjectId
 from mako.lookup import TemplateLookup
+import furl
 import markupsafe
 import requests
 
@@ -23,10 +23,11 @@ from framework.mongo import StoredObject
 from framework.routing import process_rules
 
 from website import settings
-from website.addons.base import serializer, logger
-from website.project.model import Node, User
+from website.addons.base import auth_cache, file_tree, serializer, logger
+from website.project.model import Node, PrivateLink, User
 from website.util import waterbutler_url_for
 
+from website.oauth.models import ExternalAccount
 from website.oauth.signals import oauth_complete
 
 NODE_SETTINGS_TEMPLATE_DEFAULT = os.path.join(
@@ -359,6 +360,16 @@ class AddonOAuthUserSettingsBase(AddonUserSettingsBase):
     def has_auth(self):
         return bool(self.external_accounts)
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(AddonOAuthUserSettingsBase, self).save(*args, **kwargs)
+        if saved_fields:
+            # Grants may have been revoked; drop the payloads they allowed
+            auth_cache.invalidate(
+                node_ids=self.oauth_grants.keys(),
+                account_ids=[account._id for account in self.external_accounts],
+            )
+        return saved_fields
+
     @property
     def external_accounts(self):
         """The user's list of ``ExternalAccount`` instances for this provider"""
@@ -565,6 +576,12 @@ class AddonNodeSettingsBase(AddonSettingsBase):
         """Whether the node has added credentials for this addon."""
         return False
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(AddonNodeSettingsBase, self).save(*args, **kwargs)
+        if saved_fields and self.owner:
+            auth_cache.invalidate(node_ids=[self.owner._id])
+        return saved_fields
+
     def to_json(self, user):
         ret = super(AddonNodeSettingsBase, self).to_json(user)
         ret.update({
@@ -756,10 +773,10 @@ class StorageAddonBase(object):
             name = name + ': {folder}'.format(folder=folder_name)
         return name
 
-    def _get_fileobj_child_metadata(self, filenode, user, cookie=None, version=None):
+    def _get_metadata_url(self, path, user, cookie=None, version=None):
         kwargs = dict(
             provider=self.config.short_name,
-            path=filenode.get('path', ''),
+            path=path,
             node=self.owner,
             user=user,
             view_only=True,
@@ -768,41 +785,73 @@ class StorageAddonBase(object):
             kwargs['cookie'] = cookie
         if version:
             kwargs['version'] = version
-        metadata_url = waterbutler_url_for(
+        return waterbutler_url_for(
             'metadata',
             **kwargs
         )
-        res = requests.get(metadata_url)
+
+    def _get_fileobj_child_metadata(self, filenode, user, cookie=None, version=None, bucket=None, metadata_url=None):
+        """List the children of a folder through WaterButler.
+
+        :param TokenBucket bucket: Limits the rate of requests; throttled requests are retried
+            up to `settings.ARCHIVE_STAT_MAX_RETRIES` times after backing it off
+        :param str metadata_url: Metadata URL of another folder of this addon, for the same user
+            and version; only its path is replaced, so that listing makes no database queries
+        """
+        if metadata_url:
+            url = furl.furl(metadata_url)
+            url.args['path'] = filenode.get('path', '')
+            metadata_url = url.url
+        else:
+            metadata_url = self._get_metadata_url(filenode.get('path', ''), user, cookie=cookie, version=version)
+        for attempt in range(settings.ARCHIVE_STAT_MAX_RETRIES + 1):
+            if bucket:
+                bucket.acquire()
+            res = requests.get(metadata_url)
+            if res.status_code not in file_tree.THROTTLED_STATUSES or not bucket:
+                break
+            retry_after = res.headers.get('Retry-After')
+            bucket.throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
         if res.status_code != 200:
             raise HTTPError(res.status_code, data={
                 'error': res.json(),
             })
-        # TODO: better throttling?
-        sleep(1.0 / 5.0)
+        if bucket:
+            bucket.relax()
         return res.json().get('data', [])
 
-    def _get_file_tree(self, filenode=None, user=None, cookie=None, version=None):
+    def _get_file_tree(self, filenode=None, user=None, cookie=None, version=None, max_workers=1,
+                       listings=None, on_listing=None):
         """
-        Recursively get file metadata
+        Recursively get file metadata. Folders are listed by up to `max_workers` threads, at up to
+        `settings.ARCHIVE_STAT_RATE` requests per second.
+
+        :param dict listings: Children of folders already listed, by path, e.g. by an earlier
+            walk that failed; filled in with the folders listed by this one
+        :param callable on_listing: Called with each folder and its children as they are listed
         """
         filenode = filenode or {
             'path': '/',
             'kind': 'folder',
             'name': self.root_node.name,
         }
-        if filenode.get('kind') == 'file':
-            return filenode
-        elif 'size' in filenode:
-            return filenode
-        kwargs = {
-            'version': version,
-            'cookie': cookie,
-        }
-        filenode['children'] = [
-            self._get_file_tree(child, user, cookie=cookie)
-            for child in self._get_fileobj_child_metadata(filenode, user, **kwargs)
-        ]
-        return filenode
+        # The URLs are built on this thread, as building them loads the owner and the user's
+        # cookie; worker threads only make the requests
+        root_url = self._get_metadata_url(filenode.get('path', ''), user, cookie=cookie, version=version)
+        folder_url = self._get_metadata_url(filenode.get('path', ''), user, cookie=cookie) if version else root_url
+        bucket = file_tree.TokenBucket(settings.ARCHIVE_STAT_RATE)
+
+        def list_folder(folder):
+            # Only the top-level listing is made for `version`
+            return self._get_fileobj_child_metadata(
+                folder, user, cookie=cookie, version=version if folder is filenode else None, bucket=bucket,
+                metadata_url=root_url if folder is filenode else folder_url,
+            )
+
+        walker = file_tree.FileTreeWalker(
+            list_folder, max_workers=max_workers, listings=listings, on_listing=on_listing
+        )
+        return walker.walk(filenode)
 
 class AddonOAuthNodeSettingsBase(AddonNodeSettingsBase):
     _meta = {
@@ -1045,6 +1094,39 @@ class AddonOAuthNodeSettingsBase(AddonNodeSettingsBase):
         )
 
 
+# Fields whose changes can change what `get_auth` allows on a node, or what it hands out
+WATERBUTLER_AUTH_NODE_FIELDS = {'contributors', 'permissions', 'is_public', 'is_deleted', 'is_registration', 'nodes'}
+
+
+@Node.subscribe('save')
+def invalidate_node_waterbutler_auth(schema, instance, fields_changed, cached_data):
+    """Drop the cached WaterButler payloads of a saved node and its descendants."""
+    if fields_changed & WATERBUTLER_AUTH_NODE_FIELDS:
+        auth_cache.invalidate(node_ids=[instance._id])
+
+
+@PrivateLink.subscribe('save')
+def invalidate_private_link_waterbutler_auth(schema, instance, fields_changed, cached_data):
+    """Drop the cached WaterButler payloads of the nodes a view-only link was or is shared on."""
+    if fields_changed & {'is_deleted', 'nodes'}:
+        auth_cache.invalidate(node_ids=instance.to_storage()['nodes'] + (cached_data.get('nodes') or []))
+
+
+@User.subscribe('save')
+@ExternalAccount.subscribe('save')
+def invalidate_account_waterbutler_auth(schema, instance, fields_changed, cached_data):
+    """Drop the cached WaterButler payloads with credentials of a saved external account, or of
+    the accounts a user connected or disconnected.
+    """
+    if isinstance(instance, ExternalAccount):
+        if fields_changed:
+            auth_cache.invalidate(account_ids=[instance._id])
+    elif 'external_accounts' in fields_changed:
+        auth_cache.invalidate(
+            account_ids=instance.to_storage()['external_accounts'] + (cached_data.get('external_accounts') or [])
+        )
+
+
 # TODO: No more magicks
 def init_addon(app, addon_name, routes=True):
     """Load addon module return its create configuration object.
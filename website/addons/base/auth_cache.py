@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Cache of the signed payloads `get_auth` hands to WaterButler, in the `waterbutlerauth`
+collection.
+
+Requests from the same user for the same node, provider and class of action pass the same access
+checks and get the same credentials, so a burst of them, e.g. the uploads of a folder, can share
+one payload. Entries are keyed on that tuple and record the node's lineage and the external
+account the credentials belong to; the save listeners in `website.addons.base` drop them when
+permissions, contributors, add-on settings or accounts change. Entries expire after
+`WATERBUTLER_AUTH_CACHE_TTL` seconds, which is below `WATERBUTLER_JWT_EXPIRATION` so that a cached
+payload is still valid when it is handed out; a TTL index on `date_created` deletes them later.
+
+`get_auth` runs outside the request transaction, so that parallel requests filling the same entry
+do not wait on each other's locks; a second miss on a key simply overwrites the first payload.
+"""
+import logging
+import datetime
+import collections
+
+from framework.mongo import database
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = 'waterbutlerauth'
+
+# Hits, misses and invalidated entries since the process started
+stats = collections.Counter()
+
+
+def get_collection():
+    collection = database[COLLECTION]
+    # `ensure_index` is a no-op while pymongo remembers creating the index
+    collection.ensure_index('nodes')
+    collection.ensure_index('account')
+    # Expired entries are never served; the TTL index only keeps the collection small
+    collection.ensure_index('date_created', expireAfterSeconds=settings.WATERBUTLER_AUTH_CACHE_TTL)
+    return collection
+
+
+def get_cache_key(user_id, node_id, provider, action_class, private_key=None):
+    return ':'.join([user_id or '', node_id, provider, action_class, private_key or ''])
+
+
+def get_payload(key):
+    """Return the cached payload for `key`, or None if there is none or it expired."""
+    if not settings.WATERBUTLER_AUTH_CACHE_TTL:
+        return None
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.WATERBUTLER_AUTH_CACHE_TTL)
+    cached = get_collection().find_one({'_id': key, 'date_created': {'$gt': cutoff}})
+    if cached:
+        stats['hits'] += 1
+        return cached['payload']
+    stats['misses'] += 1
+    return None
+
+
+def set_payload(key, payload, node_ids, account_id=None):
+    """Cache a payload.
+
+    :param list node_ids: Ids of the node and its ancestors, whose changes drop the entry
+    :param str account_id: Id of the external account the payload has credentials for
+    """
+    if not settings.WATERBUTLER_AUTH_CACHE_TTL:
+        return
+    get_collection().update(
+        {'_id': key},
+        {'$set': {'payload': payload, 'nodes': node_ids, 'account': account_id, 'date_created': datetime.datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def invalidate(node_ids=None, account_ids=None):
+    """Drop the cached payloads for the given nodes, or any of their descendants, and for the
+    given external accounts.
+    """
+    node_ids = [node_id for node_id in node_ids or [] if node_id]
+    account_ids = [account_id for account_id in account_ids or [] if account_id]
+    clauses = []
+    if node_ids:
+        clauses.append({'nodes': {'$in': node_ids}})
+    if account_ids:
+        clauses.append({'account': {'$in': account_ids}})
+    if not clauses:
+        return
+    result = get_collection().remove({'$or': clauses})
+    stats['invalidated'] += (result or {}).get('n', 0)
+
+
+def get_stats():
+    lookups = stats['hits'] + stats['misses']
+    return {
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'invalidated': stats['invalidated'],
+        'hit_rate': float(stats['hits']) / lookups if lookups else 0.0,
+    }
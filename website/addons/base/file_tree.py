@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Concurrent walker for the file trees of storage add-ons.
+
+Folders are listed by a pool of worker threads. Every folder is queued as soon as its parent has
+been listed, so siblings are fetched concurrently rather than one after another. Requests to
+WaterButler draw from a token bucket that halves its rate when WaterButler answers 429 or 503 and
+recovers as requests succeed. Listings are reported as they complete and recorded by folder path,
+so an interrupted walk can be resumed without listing those folders again.
+"""
+import time
+import Queue
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+logger = logging.getLogger(__name__)
+
+# Statuses WaterButler answers with when it or the provider behind it is overloaded
+THROTTLED_STATUSES = (429, 503)
+
+
+class TokenBucket(object):
+    """Rate limiter shared by the threads of a walk.
+
+    :param float rate: Requests per second to allow, and to recover to after backing off
+    :param float min_rate: Requests per second to back off to at most
+    """
+
+    def __init__(self, rate, min_rate=0.5):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        # Allow a burst of up to a second's worth of requests
+        self.tokens = self.max_rate
+        self.updated = time.time()
+        self.blocked_until = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.tokens + (now - self.updated) * self.rate, max(self.rate, 1))
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self._lock:
+                now = time.time()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def throttle(self, retry_after=None):
+        """Back off after a throttled request, for `retry_after` seconds if given."""
+        with self._lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+        logger.info('WaterButler is throttling requests; backing off to {:.2f} requests/s'.format(self.rate))
+
+    def relax(self):
+        """Recover some of the rate after a successful request."""
+        with self._lock:
+            self.rate = min(self.rate + self.max_rate / 10, self.max_rate)
+
+
+class FileTreeWalker(object):
+    """
+    :param callable list_folder: Takes a folder and returns the metadata of its children
+    :param int max_workers: Number of folders listed at once
+    :param dict listings: Children of folders already listed, by folder path. Folders in it are
+        not listed again, and folders listed during the walk are added to it.
+    :param callable on_listing: Called with each folder and its children as they are listed
+    """
+
+    def __init__(self, list_folder, max_workers=1, listings=None, on_listing=None):
+        self.list_folder = list_folder
+        self.max_workers = max(max_workers, 1)
+        self.listings = listings if listings is not None else {}
+        self.on_listing = on_listing
+
+    @staticmethod
+    def is_folder(filenode):
+        return filenode.get('kind') != 'file' and 'size' not in filenode
+
+    def walk(self, root):
+        """List `root` and all folders below it, setting the `children` of each folder.
+
+        :return: `root`
+        """
+        if not self.is_folder(root):
+            return root
+        results = Queue.Queue()
+        pool = ThreadPool(self.max_workers)
+
+        def fetch(folder):
+            try:
+                results.put((folder, self.list_folder(folder), None))
+            except Exception as error:
+                results.put((folder, None, error))
+
+        try:
+            outstanding = 0
+            queued = [root]
+            while queued or outstanding:
+                for folder in queued:
+                    if folder['path'] in self.listings:
+                        results.put((folder, self.listings[folder['path']], None))
+                    else:
+                        pool.apply_async(fetch, (folder, ))
+                    outstanding += 1
+                queued = []
+                folder, children, error = results.get()
+                outstanding -= 1
+                if error is not None:
+                    raise error
+                # Copies, so that recorded listings do not grow into subtrees as the walk goes on
+                self.listings[folder['path']] = [dict(child) for child in children]
+                folder['children'] = [dict(child) for child in children]
+                if self.on_listing:
+                    self.on_listing(folder, folder['children'])
+                queued = [child for child in folder['children'] if self.is_folder(child)]
+        finally:
+            pool.terminate()
+        return root
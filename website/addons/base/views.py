@@ -28,6 +28,7 @@ from framework.transactions.handlers import no_auto_transaction
 from website import mails
 from website import settings
 from website.addons.base import StorageAddonBase
+from website.addons.base import auth_cache
 from website.addons.base import exceptions
 from website.addons.base import signals as file_signals
 from website.files.models import FileNode, StoredFileNode, TrashedFileNode
@@ -210,6 +211,15 @@ def check_access(node, auth, action, cas_resp):
     raise HTTPError(httplib.FORBIDDEN if auth.user else httplib.UNAUTHORIZED)
 
 
+def get_action_class(action):
+    """Group actions that pass or fail the same access checks, so they can share cached payloads.
+    Actions with checks of their own in `check_access` are in a class of their own.
+    """
+    if action in ('download', 'copyfrom', 'copyto'):
+        return action
+    return permission_map.get(action)
+
+
 def make_auth(user):
     if user is not None:
         return {
@@ -220,6 +230,8 @@ def make_auth(user):
     return {}
 
 
+# Parallel uploads would contend for the auth cache entry inside the request transaction
+@no_auto_transaction
 @collect_auth
 def get_auth(auth, **kwargs):
     cas_resp = None
@@ -258,6 +270,16 @@ def get_auth(auth, **kwargs):
     except KeyError:
         raise HTTPError(httplib.BAD_REQUEST)
 
+    # Scopes of OAuth tokens are checked per request
+    action_class = get_action_class(action) if cas_resp is None else None
+    if action_class:
+        cache_key = auth_cache.get_cache_key(
+            auth.user._id if auth.user else None, node_id, provider_name, action_class, auth.private_key
+        )
+        payload = auth_cache.get_payload(cache_key)
+        if payload:
+            return {'payload': payload}
+
     node = Node.load(node_id)
     if not node:
         raise HTTPError(httplib.NOT_FOUND)
@@ -275,7 +297,7 @@ def get_auth(auth, **kwargs):
         log_exception()
         raise HTTPError(httplib.BAD_REQUEST)
 
-    return {'payload': jwe.encrypt(jwt.encode({
+    payload = jwe.encrypt(jwt.encode({
         'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.WATERBUTLER_JWT_EXPIRATION),
         'data': {
             'auth': make_auth(auth.user),  # A waterbutler auth dict not an Auth object
@@ -286,7 +308,17 @@ def get_auth(auth, **kwargs):
                 _absolute=True,
             ),
         }
-    }, settings.WATERBUTLER_JWT_SECRET, algorithm=settings.WATERBUTLER_JWT_ALGORITHM), WATERBUTLER_JWE_KEY)}
+    }, settings.WATERBUTLER_JWT_SECRET, algorithm=settings.WATERBUTLER_JWT_ALGORITHM), WATERBUTLER_JWE_KEY)
+
+    if action_class:
+        external_account = getattr(provider_settings, 'external_account', None)
+        auth_cache.set_payload(
+            cache_key,
+            payload,
+            [node._id] + [parent._id for parent in node.parents],
+            account_id=external_account._id if external_account else None,
+        )
+    return {'payload': payload}
 
 
 LOG_ACTION_MAP = {
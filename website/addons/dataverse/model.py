@@ -106,9 +106,11 @@ class AddonDataverseNodeSettings(StorageAddonBase, AddonOAuthNodeSettingsBase):
                 auth=auth,
             )
 
-    def _get_fileobj_child_metadata(self, filenode, user, cookie=None, version=None):
+    def _get_fileobj_child_metadata(self, filenode, user, cookie=None, version=None, bucket=None, metadata_url=None):
         try:
-            return super(AddonDataverseNodeSettings, self)._get_fileobj_child_metadata(filenode, user, cookie=cookie, version=version)
+            return super(AddonDataverseNodeSettings, self)._get_fileobj_child_metadata(
+                filenode, user, cookie=cookie, version=version, bucket=bucket, metadata_url=metadata_url
+            )
         except HTTPError as e:
             # The Dataverse API returns a 404 if the dataset has no published files
             if e.code == http.NOT_FOUND and version == 'latest-published':
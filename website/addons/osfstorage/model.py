@@ -47,7 +47,10 @@ class OsfStorageNodeSettings(StorageAddonBase, AddonNodeSettingsBase):
         if not self.root_node:
             self.on_add()
 
-        clone.root_node = files_utils.copy_files(self.get_root(), clone.owner).stored_object
+        def log_progress(copied, total):
+            logger.info('Copied {} of {} files and folders from {} to fork {}'.format(copied, total, node._id, fork._id))
+
+        clone.root_node = files_utils.copy_files(self.get_root(), clone.owner, on_progress=log_progress).stored_object
         clone.save()
 
         return clone, None
@@ -15,6 +15,7 @@ from modularodm import exceptions as modm_errors
 
 
 from website.files import models
+from website.files import utils as files_utils
 from website.addons.osfstorage import utils
 from website.addons.osfstorage import settings
 from website.files.exceptions import FileNodeCheckedOutError
@@ -247,6 +248,72 @@ class TestOsfstorageFileNode(StorageTestCase):
         assert_equal(copied.parent, copy_to)
         assert_equal(to_copy.parent, self.node_settings.get_root())
 
+    def test_copy_folder_copies_subtree(self):
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        child = to_copy.append_folder('Sub').append_file('Carp')
+        child.versions.append(factories.FileVersionFactory())
+        child.save()
+        to_copy.append_file('Tuna')
+        copy_to = self.node_settings.get_root().append_folder('Dest')
+
+        copied = to_copy.copy_under(copy_to)
+
+        assert_equal(copied.parent, copy_to)
+        assert_equal(len(list(copied.children)), 2)
+        copied_child = copied.find_child_by_name('Sub').find_child_by_name('Carp')
+        assert_not_equal(copied_child._id, child._id)
+        assert_equal(copied_child.copied_from._id, child._id)
+        assert_equal(copied_child.versions, child.versions)
+        assert_equal(copied_child.node, self.project)
+        child.reload()
+        assert_equal(child.parent.name, 'Sub')
+        assert_equal(child.parent.parent, to_copy)
+
+    def test_copy_folder_reports_progress(self):
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        for i in range(5):
+            to_copy.append_file('Carp {}'.format(i))
+        copy_to = self.node_settings.get_root().append_folder('Dest')
+        progress = []
+
+        copied = files_utils.copy_files(
+            to_copy, self.project, parent=copy_to, batch_size=2,
+            on_progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert_equal(progress, [(2, 5), (4, 5), (5, 5)])
+        assert_equal(len(list(copied.children)), 5)
+
+    @mock.patch('website.search.search.update_files')
+    def test_copy_folder_indexes_files_of_public_node(self, mock_update_files):
+        self.project.is_public = True
+        self.project.save()
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        to_copy.append_folder('Sub').append_file('Carp')
+        to_copy.append_file('Tuna')
+        copy_to = self.node_settings.get_root().append_folder('Dest')
+
+        copied = to_copy.copy_under(copy_to)
+
+        assert_equal(mock_update_files.call_count, 1)
+        indexed = list(mock_update_files.call_args[0][0])
+        assert_equal(
+            {each._id for each in indexed},
+            {copied.find_child_by_name('Tuna')._id, copied.find_child_by_name('Sub').find_child_by_name('Carp')._id},
+        )
+
+    @mock.patch('website.search.search.update_files')
+    def test_copy_folder_does_not_index_files_of_private_node(self, mock_update_files):
+        self.project.is_public = False
+        self.project.save()
+        to_copy = self.node_settings.get_root().append_folder('Cloud')
+        to_copy.append_file('Tuna')
+        copy_to = self.node_settings.get_root().append_folder('Dest')
+
+        to_copy.copy_under(copy_to)
+
+        assert_false(mock_update_files.called)
+
     def test_move_nested(self):
         new_project = ProjectFactory()
         other_node_settings = new_project.get_addon('osfstorage')
@@ -540,6 +607,20 @@ class TestNodeSettingsModel(StorageTestCase):
         assert_true(fork_node_settings.root_node)
 
 
+    def test_after_fork_copies_nested_folders(self):
+        folder = self.node_settings.get_root().append_folder('jazz')
+        folder.append_folder('bebop').append_file('dreamers-ball.mp3')
+
+        fork = self.project.fork_node(self.auth_obj)
+        fork_node_settings = fork.get_addon('osfstorage')
+        fork_node_settings.reload()
+
+        cloned_folder = fork_node_settings.get_root().find_child_by_name('jazz')
+        cloned_record = cloned_folder.find_child_by_name('bebop').find_child_by_name('dreamers-ball.mp3')
+        assert_equal(cloned_record.node, fork)
+        assert_equal(cloned_record.materialized_path, '/jazz/bebop/dreamers-ball.mp3')
+
+
 class TestOsfStorageFileVersion(StorageTestCase):
 
     def setUp(self):
@@ -10,6 +10,7 @@ from modularodm.exceptions import ValidationValueError
 from framework.exceptions import HTTPError
 from framework.analytics import update_counter
 
+from website.files import utils as files_utils
 from website.addons.osfstorage import settings
 
 
@@ -109,18 +110,4 @@ def copy_files(src, target_settings, parent=None, name=None):
     :param OsfStorageNodeSettings target_settings: The node settings of the project to copy files to
     :param OsfStorageFileNode parent: The parent of to attach the clone of src to, if applicable
     """
-    cloned = src.clone()
-    cloned.parent = parent
-    cloned.name = name or cloned.name
-    cloned.node_settings = target_settings
-
-    if src.is_file:
-        cloned.versions = src.versions
-
-    cloned.save()
-
-    if src.is_folder:
-        for child in src.children:
-            copy_files(child, target_settings, parent=cloned)
-
-    return cloned
+    return files_utils.copy_files(src, target_settings.owner, parent=parent, name=name)
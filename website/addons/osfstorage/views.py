@@ -179,6 +179,9 @@ def osfstorage_create_child(file_node, payload, node_addon, **kwargs):
                 )
                 version_id = version._id
                 archive_exists = version.archive is not None
+                job = node_addon.owner.archive_job
+                if job and not job.done:
+                    job.record_progress(file_node.materialized_path, version.size or 0)
             else:
                 raise HTTPError(httplib.FORBIDDEN, data={
                     'message_long': 'File cannot be updated due to checkout status.'
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Cache of rendered wiki content.
+
+The rendering of a wiki version depends only on its content, on the node it is rendered for
+(wikilinks point into that node) and on the renderer configuration, so rendered HTML and search
+text are stored under a hash of these three. Entries never go stale: changing the content or the
+configuration simply changes the key.
+"""
+import json
+import hashlib
+
+import bleach
+import markdown
+import pygments
+
+from framework.mongo import database
+from framework.sessions.store import ExpiringLRUCache
+
+from website import settings
+from website.addons.wiki import settings as wiki_settings
+
+# Increment when changing `render_content` in a way that affects its output
+RENDERER_VERSION = 1
+
+
+def get_renderer_config_hash():
+    config = {
+        'renderer': RENDERER_VERSION,
+        'markdown': markdown.version,
+        'bleach': bleach.__version__,
+        'pygments': pygments.__version__,
+        'whitelist': settings.WIKI_WHITELIST,
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True)).hexdigest()
+
+
+def get_render_key(node_id, content):
+    """Return the cache key of `content` rendered for the node `node_id`."""
+    digest = hashlib.sha1()
+    digest.update(RENDERER_CONFIG_HASH)
+    digest.update(node_id.encode('utf-8'))
+    digest.update((content or u'').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class RenderCache(object):
+    """Bounded in-process LRU cache of rendered wiki content, optionally backed by a collection
+    so that renderings are shared between processes and survive restarts.
+    """
+
+    def __init__(self, max_size, collection_name=None):
+        self.cache = ExpiringLRUCache(max_size, ttl=None)
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return database[self.collection_name] if self.collection_name else None
+
+    def get(self, key):
+        """Return a dict with the `html` and `text` renderings, or None if not cached."""
+        rendered = self.cache.get(key)
+        if rendered is None and self.collection_name:
+            document = self.collection.find_one({'_id': key})
+            if document:
+                rendered = {'html': document['html'], 'text': document['text']}
+                self.cache.set(key, rendered)
+        return rendered
+
+    def set(self, key, rendered):
+        self.cache.set(key, rendered)
+        if self.collection_name:
+            self.collection.update({'_id': key}, {'$set': rendered}, upsert=True)
+
+    def clear(self):
+        self.cache.clear()
+
+
+RENDERER_CONFIG_HASH = get_renderer_config_hash()
+
+render_cache = RenderCache(
+    wiki_settings.WIKI_RENDER_CACHE_MAX_SIZE,
+    collection_name='wikirendercache' if wiki_settings.WIKI_RENDER_CACHE_PERSIST else None,
+)
@@ -21,6 +21,7 @@ from framework.mongo import utils as mongo_utils
 from website import settings
 from website.addons.base import AddonNodeSettingsBase
 from website.addons.wiki import utils as wiki_utils
+from website.addons.wiki.cache import get_render_key, render_cache
 from website.addons.wiki.settings import WIKI_CHANGE_DATE
 from website.project.commentable import Commentable
 from website.project.model import Node
@@ -233,22 +234,38 @@ class NodeWikiPage(GuidStoredObject, Commentable):
     def get_absolute_url(self):
         return self.absolute_api_v2_url
 
+    def render(self, node):
+        """Render the page for `node`, or fetch its rendering from the cache.
+
+        :return: dict with the cleaned `html` and the `text` of the page
+        """
+        key = get_render_key(node._id, self.content)
+        rendered = render_cache.get(key)
+        if rendered is None:
+            sanitized_content = render_content(self.content, node=node)
+            try:
+                html = linkify(
+                    sanitized_content,
+                    [nofollow, ],
+                )
+            except TypeError:
+                logger.warning('Returning unlinkified content.')
+                html = sanitized_content
+            rendered = {
+                'html': html,
+                'text': sanitize(html, tags=[], strip=True),
+            }
+            render_cache.set(key, rendered)
+        return rendered
+
     def html(self, node):
         """The cleaned HTML of the page"""
-        sanitized_content = render_content(self.content, node=node)
-        try:
-            return linkify(
-                sanitized_content,
-                [nofollow, ],
-            )
-        except TypeError:
-            logger.warning('Returning unlinkified content.')
-            return sanitized_content
+        return self.render(node)['html']
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
 
-        return sanitize(self.html(node), tags=[], strip=True)
+        return self.render(node)['text']
 
     def get_draft(self, node):
         """
@@ -291,6 +308,9 @@ class NodeWikiPage(GuidStoredObject, Commentable):
     def save(self, *args, **kwargs):
         rv = super(NodeWikiPage, self).save(*args, **kwargs)
         if self.node:
+            # Render new versions right away, so that views and search indexing find them cached
+            if 'content' in rv:
+                self.render(self.node)
             self.node.update_search()
         return rv
 
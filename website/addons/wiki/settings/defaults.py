@@ -11,3 +11,8 @@ SHAREJS_DB_URL = 'mongodb://{}:{}/{}'.format(settings.DB_HOST, settings.DB_PORT,
 
 # TODO: Change to release date for wiki change
 WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098)
+
+# Number of rendered wiki versions kept in process, and whether renderings are also stored in
+# the database to be shared between processes; see website.addons.wiki.cache
+WIKI_RENDER_CACHE_MAX_SIZE = 1000
+WIKI_RENDER_CACHE_PERSIST = False
@@ -71,6 +71,37 @@ class TestNodeWikiPageModel(OsfTestCase):
         # node.wiki_pages_current and node.wiki_pages_versions
         assert_false(ver.is_current)
 
+    def test_html_and_raw_text(self):
+        node = NodeFactory()
+        page = NodeWikiPage(page_name='foo', node=node, content='Look at [[bar]]')
+        assert_equal(page.html(node), render_content(page.content, node))
+        assert_in('/{}/wiki/bar/'.format(node._id), page.html(node))
+        assert_equal(page.raw_text(node), 'Look at bar')
+
+    @mock.patch('website.addons.wiki.model.render_content')
+    def test_rendering_is_cached_on_save(self, mock_render):
+        mock_render.return_value = '<p>rendered</p>'
+        node = NodeFactory()
+        content = 'cached content {}'.format(fake.sentence())
+        page = NodeWikiPage(page_name='foo', node=node, content=content)
+        page.save()
+        assert_equal(mock_render.call_count, 1)
+        assert_equal(page.html(node), '<p>rendered</p>')
+        assert_equal(page.raw_text(node), 'rendered')
+        # Another version with the same content shares the rendering
+        assert_equal(NodeWikiPage(page_name='foo', node=node, content=content).html(node), '<p>rendered</p>')
+        assert_equal(mock_render.call_count, 1)
+
+    @mock.patch('website.addons.wiki.model.render_content')
+    def test_rendering_depends_on_node_and_content(self, mock_render):
+        mock_render.return_value = '<p>rendered</p>'
+        node, other_node = NodeFactory(), NodeFactory()
+        content = 'keyed content {}'.format(fake.sentence())
+        NodeWikiPage(page_name='foo', node=node, content=content).html(node)
+        NodeWikiPage(page_name='foo', node=node, content=content).html(other_node)
+        NodeWikiPage(page_name='foo', node=node, content=content + '!').html(node)
+        assert_equal(mock_render.call_count, 3)
+
 class TestWikiViews(OsfTestCase):
 
     def setUp(self):
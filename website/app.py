@@ -30,6 +30,7 @@ from website import maintenance
 from website.archiver import listeners  # noqa
 from website.mails import listeners  # noqa
 from website.notifications import listeners  # noqa
+from website.conferences import listeners  # noqa
 from api.caching import listeners  # noqa
 
 
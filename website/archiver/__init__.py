@@ -24,14 +24,13 @@ NO_ARCHIVE_LIMIT = 'high_upload_limit'
 
 class StatResult(object):
     """
-    Helper class to collect metadata about a single file
+    Helper class to collect metadata about a single file, or the totals of a file tree
     """
-    num_files = 1
-
-    def __init__(self, target_id, target_name, disk_usage=0):
+    def __init__(self, target_id, target_name, disk_usage=0, num_files=1):
         self.target_id = target_id
         self.target_name = target_name
         self.disk_usage = float(disk_usage)
+        self.num_files = num_files
 
     def __str__(self):
         return str(self._to_dict())
@@ -56,6 +55,21 @@ class AggregateStatResult(object):
     def __str__(self):
         return str(self._to_dict())
 
+    @classmethod
+    def _from_dict(cls, data):
+        return cls(
+            data['target_id'],
+            data['target_name'],
+            targets=[
+                cls._from_dict(target) if 'targets' in target else StatResult(
+                    target['target_id'],
+                    target['target_name'],
+                    disk_usage=target['disk_usage'],
+                )
+                for target in data['targets']
+            ]
+        )
+
     def _to_dict(self):
         return {
             'target_id': self.target_id,
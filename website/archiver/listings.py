@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Folder listings of interrupted walks of add-on file trees, in the `archivefilelisting` collection.
+
+`stat_addon` saves the folders a failed walk listed, and a retry of it for the same archive job and
+target resumes the walk from them. Each folder is a document of its own, so no document grows with
+the size of the tree. Listings are dropped once a walk completes, and expire after
+`ARCHIVE_TIMEOUT_TIMEDELTA` otherwise.
+"""
+import hashlib
+import datetime
+
+from framework.mongo import database
+
+from website import settings
+
+COLLECTION = 'archivefilelisting'
+
+
+def get_collection():
+    collection = database[COLLECTION]
+    # `ensure_index` is a no-op while pymongo remembers creating the index
+    collection.ensure_index([('job', 1), ('target', 1)])
+    collection.ensure_index(
+        'date_created',
+        expireAfterSeconds=int(settings.ARCHIVE_TIMEOUT_TIMEDELTA.total_seconds()),
+    )
+    return collection
+
+
+def get_listing_id(job_id, target_name, path):
+    # Paths may be longer than an index key allows
+    return '{}:{}:{}'.format(job_id, target_name, hashlib.md5(path.encode('utf-8')).hexdigest())
+
+
+def get_listings(job_id, target_name):
+    """Return the saved children of folders, by folder path."""
+    return {
+        each['path']: each['children']
+        for each in get_collection().find({'job': job_id, 'target': target_name})
+    }
+
+
+def save_listings(job_id, target_name, listings, exclude_paths=()):
+    """Save the children of folders, one document per folder.
+
+    :param dict listings: Children of folders, by folder path
+    :param exclude_paths: Paths of folders that are already saved
+    """
+    collection = get_collection()
+    now = datetime.datetime.utcnow()
+    for path, children in listings.iteritems():
+        if path in exclude_paths:
+            continue
+        collection.update(
+            {'_id': get_listing_id(job_id, target_name, path)},
+            {'job': job_id, 'target': target_name, 'path': path, 'children': children, 'date_created': now},
+            upsert=True,
+        )
+
+
+def clear_listings(job_id, target_name):
+    get_collection().remove({'job': job_id, 'target': target_name})
@@ -1,7 +1,11 @@
 import datetime
+import logging
+import threading
 
 from modularodm import fields
 
+from framework.mongo import database
+from framework.mongo.handlers import CLIENT_POOL
 from framework.mongo import ObjectId
 from framework.mongo import StoredObject
 
@@ -9,12 +13,16 @@ from website.archiver import (
     ARCHIVER_INITIATED,
     ARCHIVER_SUCCESS,
     ARCHIVER_FAILURE,
-    ARCHIVER_FAILURE_STATUSES
+    ARCHIVER_FAILURE_STATUSES,
+    AggregateStatResult,
+    StatResult,
 )
 
 from website.addons.base import StorageAddonBase
 from website import settings
 
+logger = logging.getLogger(__name__)
+
 
 class ArchiveTarget(StoredObject):
     """Stores the results of archiving a single addon
@@ -40,6 +48,13 @@ class ArchiveTarget(StoredObject):
     stat_result = fields.DictionaryField()
     errors = fields.StringField(list=True)
 
+    # Name of the folder that the addon is copied into on the registration
+    folder_name = fields.StringField()
+    # When the copy request for the addon was sent
+    datetime_started = fields.DateTimeField()
+    bytes_total = fields.FloatField(default=0)
+    bytes_done = fields.FloatField(default=0)
+
     def __repr__(self):
         return '<{0}(_id={1}, name={2}, status={3})>'.format(
             self.__class__.__name__,
@@ -175,12 +190,100 @@ class ArchiveJob(StoredObject):
         self.save()
 
     def update_target(self, addon_short_name, status, stat_result=None, errors=None):
-        stat_result = stat_result or {}
         errors = errors or []
 
         target = self.get_target(addon_short_name)
         target.status = status
         target.errors = errors
-        target.stat_result = stat_result
+        if stat_result is not None:
+            target.stat_result = stat_result
+        if status == ARCHIVER_SUCCESS:
+            target.bytes_done = max(target.bytes_done, target.bytes_total)
         target.save()
         self._post_update_target()
+
+    def cache_stat_result(self, addon_short_name, stat_result):
+        """Store the totals of the AggregateStatResult of an addon so that retried archive tasks do not
+        need to walk the addon's file tree again. The tree itself is not stored, as it grows with the
+        number of files.
+        """
+        target = self.get_target(addon_short_name)
+        target.stat_result = {
+            'target_id': stat_result.target_id,
+            'target_name': stat_result.target_name,
+            'num_files': stat_result.num_files,
+            'disk_usage': stat_result.disk_usage,
+        }
+        target.bytes_total = stat_result.disk_usage
+        target.save()
+
+    def get_cached_stat_result(self, addon_short_name):
+        """Return an AggregateStatResult of the totals stored by `cache_stat_result`, or None."""
+        target = self.get_target(addon_short_name)
+        if not (target and target.stat_result):
+            return None
+        totals = target.stat_result
+        return AggregateStatResult(
+            totals['target_id'],
+            totals['target_name'],
+            targets=[
+                StatResult(
+                    totals['target_id'],
+                    totals['target_name'],
+                    disk_usage=totals['disk_usage'],
+                    num_files=totals['num_files'],
+                )
+            ],
+        )
+
+    def start_target(self, addon_short_name, folder_name):
+        target = self.get_target(addon_short_name)
+        target.folder_name = folder_name
+        target.datetime_started = datetime.datetime.utcnow()
+        target.bytes_done = 0
+        target.save()
+
+    def record_progress(self, path, size):
+        """Add `size` bytes to the target whose archive folder contains `path`, a path on the registration."""
+        folder_name = path.strip('/').split('/')[0]
+        for target in self.target_addons:
+            if target.folder_name == folder_name:
+                # Files are copied concurrently and every callback increments the same target, so
+                # increment atomically on a client of its own, outside of the request transaction
+                client_id = (self.__class__.__name__, threading.current_thread().ident)
+                client = CLIENT_POOL.acquire(client_id)
+                try:
+                    client[database.name][ArchiveTarget._name].update(
+                        {'_id': target._id},
+                        {'$inc': {'bytes_done': float(size)}},
+                    )
+                except Exception:
+                    logger.exception('Could not record archive progress of target {}'.format(target._id))
+                finally:
+                    CLIENT_POOL.release(client_id)
+                ArchiveTarget._clear_caches(target._id)
+                return
+
+    def progress(self):
+        """Copy progress of each target, with throughput (bytes per second) and estimated time of
+        completion for targets that are being copied.
+        """
+        now = datetime.datetime.utcnow()
+        ret = []
+        for target in self.target_addons:
+            throughput, eta = None, None
+            if target.datetime_started and target.bytes_done:
+                elapsed = (now - target.datetime_started).total_seconds()
+                if elapsed > 0:
+                    throughput = target.bytes_done / elapsed
+                    remaining = max(target.bytes_total - target.bytes_done, 0)
+                    eta = now + datetime.timedelta(seconds=remaining / throughput)
+            ret.append({
+                'name': target.name,
+                'status': target.status,
+                'bytes_done': target.bytes_done,
+                'bytes_total': target.bytes_total,
+                'throughput': throughput,
+                'eta': eta,
+            })
+        return ret
@@ -21,9 +21,11 @@ from website.archiver import (
     AggregateStatResult,
 )
 from website.archiver import utils
+from website.archiver import listings as file_listings
 from website.archiver.model import ArchiveJob
 from website.archiver import signals as archiver_signals
 
+from website.addons.base.file_tree import THROTTLED_STATUSES
 from website.project import signals as project_signals
 from website.project.model import Node, DraftRegistration
 from website import settings
@@ -123,10 +125,29 @@ def stat_addon(addon_short_name, job_pk):
     create_app_context()
     job = ArchiveJob.load(job_pk)
     src, dst, user = job.info()
+    cached_result = job.get_cached_stat_result(addon_short_name)
+    if cached_result:
+        # Stats are cached per target, and so per provider and version, so retries skip the walk
+        return cached_result
     src_addon = src.get_addon(addon_name)
+    listings = file_listings.get_listings(job._id, addon_short_name)
+    saved_paths = set(listings)
     try:
-        file_tree = src_addon._get_file_tree(user=user, version=version)
+        file_tree = src_addon._get_file_tree(
+            user=user,
+            version=version,
+            max_workers=settings.ARCHIVE_STAT_CONCURRENCY,
+            listings=listings,
+        )
     except HTTPError as e:
+        # Let the next attempt resume the walk
+        file_listings.save_listings(job._id, addon_short_name, listings, exclude_paths=saved_paths)
+        if e.code in THROTTLED_STATUSES and stat_addon.request.retries < settings.ARCHIVE_STAT_TASK_RETRIES:
+            raise stat_addon.retry(
+                exc=e,
+                countdown=settings.ARCHIVE_STAT_RETRY_DELAY,
+                max_retries=settings.ARCHIVE_STAT_TASK_RETRIES,
+            )
         dst.archive_job.update_target(
             addon_short_name,
             ARCHIVER_NETWORK_ERROR,
@@ -138,6 +159,8 @@ def stat_addon(addon_short_name, job_pk):
         addon_short_name,
         targets=[utils.aggregate_file_tree_metadata(addon_short_name, file_tree, user)],
     )
+    job.cache_stat_result(addon_short_name, result)
+    file_listings.clear_listings(job._id, addon_short_name)
     return result
 
 
@@ -217,10 +240,10 @@ def archive_addon(addon_short_name, job_pk, stat_result):
         # condition that non-deterministically caused archive jobs to fail.
         data = make_waterbutler_payload(src, dst, addon_name, '{0} ({1})'.format(folder_name, folder_name_suffix),
                                         cookie, revision=revision)
-        make_copy_request.delay(job_pk=job_pk, url=copy_url, data=data)
     else:
         data = make_waterbutler_payload(src, dst, addon_name, folder_name, cookie)
-        make_copy_request.delay(job_pk=job_pk, url=copy_url, data=data)
+    job.start_target(addon_short_name, folder_name=data['rename'])
+    make_copy_request.delay(job_pk=job_pk, url=copy_url, data=data)
 
 
 @celery_app.task(base=ArchiverTask, ignore_result=False)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Keep the index of conference submissions up to date as nodes, their files and conferences are
+saved. See `website.conferences.submissions`.
+"""
+from framework.celery_tasks import handlers
+
+from website.models import Node, StoredFileNode, TrashedFileNode
+from website.files import signals as file_signals
+from website.conferences import submissions, tasks
+from website.conferences.model import Conference
+
+# Fields of nodes that decide whether a node is a submission or that are shown in the grids
+SUBMISSION_NODE_FIELDS = {
+    'tags', 'is_public', 'is_deleted', 'title', 'creator', 'contributors', 'visible_contributor_ids', 'system_tags',
+}
+# Fields of conferences that are shown in the grids
+SUBMISSION_CONFERENCE_FIELDS = {'endpoint', 'name', 'field_names'}
+
+
+@Node.subscribe('save')
+def update_node_submissions(schema, instance, fields_changed, cached_data):
+    if not fields_changed & SUBMISSION_NODE_FIELDS:
+        return
+    if instance.tags or cached_data.get('tags'):
+        submissions.update_node(instance)
+
+
+@StoredFileNode.subscribe('save')
+@TrashedFileNode.subscribe('save')
+def update_file_submissions(schema, instance, fields_changed, cached_data):
+    """Update the submissions whose first file may have been added, moved away or deleted."""
+    if not instance.is_file or instance.provider != 'osfstorage' or 'node' not in fields_changed:
+        return
+    exclude_file_ids = [instance._id] if isinstance(instance, TrashedFileNode) else None
+    for node_id in {instance.node._id, cached_data.get('node')}:
+        if node_id and submissions.is_indexed(node_id):
+            submissions.update_node(Node.load(node_id), exclude_file_ids=exclude_file_ids)
+
+
+@file_signals.file_nodes_copied.connect
+def update_copied_file_submissions(node):
+    """Update the submission whose first file may be among file nodes copied in bulk."""
+    if submissions.is_indexed(node._id):
+        submissions.update_node(node)
+
+
+@Conference.subscribe('save')
+def update_conference_submissions(schema, instance, fields_changed, cached_data):
+    if fields_changed & SUBMISSION_CONFERENCE_FIELDS:
+        handlers.enqueue_task(tasks.rebuild_conference_submissions.s(instance.endpoint))
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Index of conference submissions, in the `conferencesubmission` collection.
+
+Each public, undeleted node tagged with the endpoint of a conference is a submission to it. The
+index holds one document per conference and submission with what the meeting grids show, so that
+a grid is served with one query for the submissions and one for their download counts. The
+listeners in `website.conferences.listeners` update the submissions of a node when it or its
+files are saved, and `website.conferences.tasks` rebuilds the index and refreshes the submission
+counts of conferences off-request.
+"""
+import re
+
+import pymongo
+from modularodm import Q
+
+from framework.mongo import database
+from framework.analytics import get_total_counters
+
+from website.models import Node, Tag
+from website.util import web_url_for
+
+COLLECTION = 'conferencesubmission'
+
+
+def get_collection():
+    collection = database[COLLECTION]
+    # `ensure_index` is a no-op while pymongo remembers creating the index
+    collection.ensure_index([('conference', pymongo.ASCENDING), ('dateCreated', pymongo.DESCENDING)])
+    collection.ensure_index('node')
+    return collection
+
+
+def get_first_file(node, exclude_file_ids=None):
+    """Return the storage document of the first osfstorage file of node, or None."""
+    return database['storedfilenode'].find_one({
+        'node': node._id,
+        'is_file': True,
+        'provider': 'osfstorage',
+        '_id': {'$nin': exclude_file_ids or []},
+    })
+
+
+def serialize_submission(conference, node, record=None):
+    """
+    :param dict conference: Storage document of the conference
+    :param Node node: The submission
+    :param dict record: Storage document of the first file of node
+    """
+    field_names = conference['field_names']
+    author = node.visible_contributors[0]
+    return {
+        '_id': '{}:{}'.format(conference['endpoint'], node._id),
+        'conference': conference['endpoint'],
+        'confName': conference['name'],
+        'node': node._id,
+        'title': node.title,
+        'nodeUrl': node.url,
+        'author': author.family_name if author.family_name else author.fullname,
+        'authorUrl': node.creator.url,
+        'category': field_names['submission1'] if field_names['submission1'] in node.system_tags else field_names['submission2'],
+        'file': record['_id'] if record else None,
+        'dateCreated': node.date_created,
+        'tags': ' '.join(tag._id for tag in node.tags),
+    }
+
+
+def update_node(node, exclude_file_ids=None):
+    """Index node as a submission to the conferences it is tagged with, if it is public and not
+    deleted, and drop it from the others.
+
+    :param list exclude_file_ids: Ids of files being deleted, which are not considered its first file
+    """
+    collection = get_collection()
+    collection.remove({'node': node._id})
+    if not node.is_public or node.is_deleted or not node.tags:
+        return
+    patterns = [re.compile('^{}$'.format(re.escape(tag._id)), re.IGNORECASE) for tag in node.tags]
+    conferences = list(database['conference'].find(
+        {'endpoint': {'$in': patterns}},
+        {'endpoint': True, 'name': True, 'field_names': True},
+    ))
+    if not conferences:
+        return
+    record = get_first_file(node, exclude_file_ids=exclude_file_ids)
+    collection.insert([serialize_submission(conference, node, record) for conference in conferences])
+
+
+def is_indexed(node_id):
+    return get_collection().find_one({'node': node_id}, {'_id': True}) is not None
+
+
+def rebuild_conference(conference):
+    """Index every submission to conference from scratch.
+
+    :return int: The number of submissions
+    """
+    collection = get_collection()
+    collection.remove({'conference': conference.endpoint})
+    tags = Tag.find(Q('lower', 'eq', conference.endpoint.lower())).get_keys()
+    nodes = Node.find(
+        Q('tags', 'in', tags) &
+        Q('is_public', 'eq', True) &
+        Q('is_deleted', 'ne', True)
+    )
+    stored = conference.to_storage()
+    submissions = [serialize_submission(stored, node, get_first_file(node)) for node in nodes]
+    if submissions:
+        collection.insert(submissions)
+    return len(submissions)
+
+
+def count_submissions():
+    """Return the number of submissions to each conference with any, by endpoint."""
+    result = get_collection().aggregate([
+        {'$group': {'_id': '$conference', 'count': {'$sum': 1}}},
+    ])
+    return {each['_id']: each['count'] for each in result['result']}
+
+
+def get_submissions(endpoint=None):
+    """Return the grid data of the submissions to a conference, or to all conferences, newest
+    first.
+    """
+    query = {'conference': endpoint} if endpoint else {}
+    submissions = list(get_collection().find(query).sort('dateCreated', pymongo.DESCENDING))
+    pages = {
+        submission['_id']: 'download:{}:{}'.format(submission['node'], submission['file'])
+        for submission in submissions if submission['file']
+    }
+    downloads = get_total_counters(pages.values())
+    return [
+        {
+            'id': idx,
+            'title': submission['title'],
+            'nodeUrl': submission['nodeUrl'],
+            'author': submission['author'],
+            'authorUrl': submission['authorUrl'],
+            'category': submission['category'],
+            'download': downloads[pages[submission['_id']]] if submission['file'] else 0,
+            'downloadUrl': web_url_for(
+                'addon_view_or_download_file',
+                pid=submission['node'],
+                path=submission['file'],
+                provider='osfstorage',
+                action='download',
+                _absolute=True,
+            ) if submission['file'] else '',
+            'dateCreated': submission['dateCreated'].isoformat(),
+            'confName': submission['confName'],
+            'confUrl': web_url_for('conference_results', meeting=submission['conference']),
+            'tags': submission['tags'],
+        }
+        for idx, submission in enumerate(submissions)
+    ]
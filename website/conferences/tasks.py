@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from framework.celery_tasks import app as celery_app
+
+from website.conferences import submissions
+from website.conferences.model import Conference
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='website.conferences.tasks.rebuild_conference_submissions')
+def rebuild_conference_submissions(endpoint):
+    """Index the submissions to one conference from scratch, e.g. after it was created or renamed."""
+    conference = Conference.load(endpoint)
+    if conference:
+        submissions.rebuild_conference(conference)
+
+
+@celery_app.task(name='website.conferences.tasks.refresh_conferences')
+def refresh_conferences(rebuild=False):
+    """Cache the number of submissions of each conference in `Conference.num_submissions`.
+
+    :param bool rebuild: Index the submissions to every conference from scratch first, picking up
+        changes the listeners do not follow, e.g. to the names of authors
+    """
+    conferences = list(Conference.find())
+    if rebuild:
+        for conference in conferences:
+            submissions.rebuild_conference(conference)
+    counts = submissions.count_submissions()
+    for conference in conferences:
+        count = counts.get(conference.endpoint, 0)
+        if conference.num_submissions != count:
+            conference.num_submissions = count
+            conference.save()
+    logger.info('Refreshed the submission counts of {} conferences'.format(len(conferences)))
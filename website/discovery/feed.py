@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Precomputed lists of the discovery page, in the `discoveryfeed` collection.
+
+`refresh_feed` asks Piwik for last week's most viewed nodes and queries the newest public projects
+and registrations; it runs on a schedule in `website.discovery.tasks`. If Piwik is slow or down,
+the most viewed lists of the previous run are kept. Requests serve the stored feed from memory,
+reading it again at most every `DISCOVERY_FEED_MEMORY_TTL` seconds. A feed older than
+`DISCOVERY_FEED_MAX_AGE` is still served, and a refresh is queued to replace it. Nodes made private
+or deleted since the feed was computed are dropped from it each time it is served.
+"""
+import time
+import logging
+import datetime
+import threading
+
+import requests
+from modularodm import Q
+
+from framework.mongo import database
+from framework.celery_tasks import handlers
+from framework.analytics.piwik import PiwikClient
+
+from website import settings
+from website.project import Node
+from website.project.utils import CONTENT_NODE_QUERY, recent_public_registrations
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = 'discoveryfeed'
+FEED_ID = 'activity'
+LIST_SIZE = 10
+LISTS = (
+    'recent_public_projects',
+    'recent_public_registrations',
+    'popular_public_projects',
+    'popular_public_registrations',
+)
+
+# The feed last read by this process, and when it was read
+_memory = {'feed': None, 'loaded': 0}
+_lock = threading.Lock()
+
+
+class FeedNode(object):
+    """The attributes of a node the discovery page shows, as stored by `serialize_node`."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def serialize_node(node):
+    return {
+        '_id': node._id,
+        'title': node.title,
+        'url': node.url,
+        'api_url': node.api_url,
+        'is_registration': node.is_registration,
+        'date_created': node.date_created,
+        'registered_date': node.registered_date,
+    }
+
+
+def get_recent():
+    # Only show top-level projects (any category) in new and noteworthy lists
+    # This means that public children of private nodes will be excluded
+    recent_public_projects = Node.find(
+        Q('parent_node', 'eq', None) &
+        Q('is_public', 'eq', True) &
+        Q('is_registration', 'eq', False) &
+        CONTENT_NODE_QUERY
+    ).sort(
+        '-date_created'
+    ).limit(LIST_SIZE)
+    return {
+        'recent_public_projects': [serialize_node(node) for node in recent_public_projects],
+        'recent_public_registrations': [serialize_node(node) for node in recent_public_registrations(LIST_SIZE)],
+    }
+
+
+def get_popular():
+    """Return the public projects and registrations most viewed last week according to Piwik,
+    with their hits.
+
+    :raises: requests.exceptions.RequestException, ValueError or TypeError if Piwik can not be
+        reached or does not answer with the expected JSON
+    """
+    popular = {'popular_public_projects': [], 'popular_public_registrations': [], 'hits': {}}
+    if not settings.PIWIK_HOST:
+        return popular
+
+    # get the date for exactly one week ago
+    target_date = datetime.date.today() - datetime.timedelta(weeks=1)
+    client = PiwikClient(
+        url=settings.PIWIK_HOST,
+        auth_token=settings.PIWIK_ADMIN_TOKEN,
+        site_id=settings.PIWIK_SITE_ID,
+        period='week',
+        date=target_date.strftime('%Y-%m-%d'),
+        timeout=settings.PIWIK_TIMEOUT,
+    )
+    variables = [x for x in client.custom_variables if x.label == 'Project ID']
+    if not variables:
+        return popular
+    popular_project_ids = variables[0].values
+
+    # Load the candidates in one query, then pick them in order of popularity
+    nodes = {node._id: node for node in Node.find(Q('_id', 'in', [x.value for x in popular_project_ids]))}
+    projects, registrations = popular['popular_public_projects'], popular['popular_public_registrations']
+    for nid in popular_project_ids:
+        node = nodes.get(nid.value)
+        if node is None or not node.is_public or node.is_deleted:
+            continue
+        if not node.is_registration:
+            selected = projects
+        elif not node.is_retracted:
+            selected = registrations
+        else:
+            continue
+        if len(selected) < LIST_SIZE:
+            selected.append(serialize_node(node))
+            popular['hits'][node._id] = {'hits': nid.actions, 'visits': nid.visits}
+        if len(projects) >= LIST_SIZE and len(registrations) >= LIST_SIZE:
+            break
+    return popular
+
+
+def get_collection():
+    return database[COLLECTION]
+
+
+def refresh_feed():
+    """Compute and store the feed, keeping the most viewed lists of the stored feed if Piwik
+    fails.
+    """
+    collection = get_collection()
+    feed = {'_id': FEED_ID, 'date_computed': datetime.datetime.utcnow()}
+    feed.update(get_recent())
+    try:
+        feed.update(get_popular())
+    except (requests.exceptions.RequestException, ValueError, TypeError) as error:
+        logger.warning('Could not get the most viewed nodes from Piwik, keeping the previous ones: {}'.format(error))
+        previous = collection.find_one({'_id': FEED_ID}) or {}
+        for key in ('popular_public_projects', 'popular_public_registrations', 'hits'):
+            feed[key] = previous.get(key) or ([] if key != 'hits' else {})
+    collection.update({'_id': FEED_ID}, feed, upsert=True)
+    return feed
+
+
+def revalidate():
+    # Avoid circular import
+    from website.discovery import tasks
+    handlers.enqueue_task(tasks.refresh_discovery_feed.s())
+
+
+def load_feed():
+    """Read the stored feed, queueing a refresh if it is missing or older than
+    DISCOVERY_FEED_MAX_AGE. Until a feed has been stored, the lists that do not need Piwik are
+    computed on the spot.
+    """
+    feed = get_collection().find_one({'_id': FEED_ID})
+    if feed is None:
+        revalidate()
+        feed = dict(get_recent(), popular_public_projects=[], popular_public_registrations=[], hits={})
+    elif datetime.datetime.utcnow() - feed['date_computed'] > datetime.timedelta(seconds=settings.DISCOVERY_FEED_MAX_AGE):
+        revalidate()
+    ret = {key: [FeedNode(**node) for node in feed[key]] for key in LISTS}
+    ret['hits'] = feed['hits']
+    return ret
+
+
+def filter_visible(feed):
+    """Return a copy of the feed without the nodes that are no longer public or were deleted,
+    checking all of them with a single query.
+    """
+    node_ids = list(set(node._id for key in LISTS for node in feed[key]))
+    visible = set(
+        each['_id'] for each in database['node'].find(
+            {'_id': {'$in': node_ids}, 'is_public': True, 'is_deleted': {'$ne': True}},
+            {'_id': 1},
+        )
+    ) if node_ids else set()
+    ret = {key: [node for node in feed[key] if node._id in visible] for key in LISTS}
+    ret['hits'] = feed['hits']
+    return ret
+
+
+def get_feed():
+    """Return the feed, from memory if this process read it in the last
+    DISCOVERY_FEED_MEMORY_TTL seconds, without the nodes that are no longer public.
+    """
+    with _lock:
+        if _memory['feed'] is None or time.time() - _memory['loaded'] >= settings.DISCOVERY_FEED_MEMORY_TTL:
+            _memory['feed'] = load_feed()
+            _memory['loaded'] = time.time()
+        feed = _memory['feed']
+    return filter_visible(feed)
+
+
+def clear_memory():
+    with _lock:
+        _memory['feed'] = None
+        _memory['loaded'] = 0
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+from framework.celery_tasks import app as celery_app
+
+from website.discovery import feed
+
+
+@celery_app.task(name='website.discovery.tasks.refresh_discovery_feed', ignore_result=True)
+def refresh_discovery_feed():
+    feed.refresh_feed()
@@ -0,0 +1,5 @@
+import blinker
+
+signals = blinker.Namespace()
+# Sent with the target node after file nodes were copied in bulk, without save signals
+file_nodes_copied = signals.signal('file-nodes-copied')
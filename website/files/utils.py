@@ -1,11 +1,24 @@
+import bson
+import collections
+
+from modularodm import Q
 from modularodm.exceptions import ValidationValueError
 
+from framework.mongo import database
+
+from website import settings
+from website.files import signals
 
-def copy_files(src, target_node, parent=None, name=None):
+
+def copy_files(src, target_node, parent=None, name=None, batch_size=None, on_progress=None):
     """Copy the files from src to the target node
+    The clone of src is saved through the ODM, so that it is validated against its new siblings.
+    Everything below src is copied in bulk by copy_descendants.
     :param Folder src: The source to copy children from
     :param Node target_node: The node settings of the project to copy files to
     :param Folder parent: The parent of to attach the clone of src to, if applicable
+    :param int batch_size: Number of file nodes inserted per write, defaults to FILE_COPY_BATCH_SIZE
+    :param callable on_progress: Called with the number of file nodes copied below src and their total after each write
     """
     assert not parent or not parent.is_file, 'Parent must be a folder'
 
@@ -21,12 +34,85 @@ def copy_files(src, target_node, parent=None, name=None):
     cloned.save()
 
     if not src.is_file:
-        for child in src.children:
-            copy_files(child, target_node, parent=cloned)
+        copy_descendants(src, cloned, target_node, batch_size=batch_size, on_progress=on_progress)
 
     return cloned
 
 
+def get_descendants(src):
+    """Return the storage documents of the file nodes below src, every folder before its children.
+    The whole tree of src's node and provider is read in one query and walked in memory; the
+    materialized paths of osfstorage are not stored, so they can not be used to narrow the query.
+    """
+    children = collections.defaultdict(list)
+    for each in database['storedfilenode'].find({'node': src.node._id, 'provider': src.provider}):
+        children[each['parent']].append(each)
+
+    descendants = []
+    queue = collections.deque([src._id])
+    while queue:
+        for child in children.pop(queue.popleft(), []):
+            descendants.append(child)
+            if not child['is_file']:
+                queue.append(child['_id'])
+    return descendants
+
+
+def copy_descendants(src, cloned, target_node, batch_size=None, on_progress=None):
+    """Copy the file nodes below src under its clone with bulk inserts, bypassing the ODM.
+    Parents are inserted before their children and the clones of files share the FileVersions of
+    the originals. Like StoredObject.clone, neither tags nor checkouts are copied. As the inserts
+    send no save signals, file_nodes_copied is sent with the target node afterwards, and the
+    OSF Storage files copied to a public node are indexed for search in bulk.
+    :return int: The number of file nodes copied
+    """
+    batch_size = batch_size or settings.FILE_COPY_BATCH_SIZE
+    descendants = get_descendants(src)
+    collection = database['storedfilenode']
+    # Ids of the clones by the id of the file node they were cloned from
+    clone_ids = {src._id: cloned._id}
+    # Ids of the clones of OSF Storage files, which OsfStorageFile.save would have indexed
+    file_ids = []
+
+    for start in range(0, len(descendants), batch_size):
+        batch = []
+        for each in descendants[start:start + batch_size]:
+            clone = dict(
+                each,
+                _id=str(bson.ObjectId()),
+                node=target_node._id,
+                parent=clone_ids[each['parent']],
+                copied_from=each['_id'],
+                versions=each.get('versions', []) if each['is_file'] else [],
+                tags=[],
+                checkout=None,
+            )
+            clone.pop('__backrefs', None)
+            clone_ids[each['_id']] = clone['_id']
+            if each['is_file'] and each['provider'] == 'osfstorage':
+                file_ids.append(clone['_id'])
+            batch.append(clone)
+        collection.insert(batch)
+        if on_progress:
+            on_progress(start + len(batch), len(descendants))
+
+    if descendants:
+        signals.file_nodes_copied.send(target_node)
+    if file_ids and target_node.is_public:
+        update_search_files(file_ids, batch_size=batch_size)
+    return len(descendants)
+
+
+def update_search_files(file_ids, batch_size=None):
+    """Index the OSF Storage files of the given ids for search, loading them batch_size at a time."""
+    from website.search import search
+    from website.files.models.osfstorage import OsfStorageFile
+
+    batch_size = batch_size or settings.FILE_COPY_BATCH_SIZE
+    for start in range(0, len(file_ids), batch_size):
+        search.update_files(OsfStorageFile.find(Q('_id', 'in', file_ids[start:start + batch_size])))
+
+
 class GenWrapper(object):
     """A Wrapper for MongoQuerySets
     Overrides __iter__ so for loops will always
@@ -91,9 +91,18 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     .. note:
          Uses celery if available
     """
+    kwargs = render_mail(
+        to_addr, mail, mimetype=mimetype, from_addr=from_addr,
+        username=username, password=password, **context
+    )
+    return send_rendered_mail(kwargs, mailer=mailer, callback=callback)
+
 
+def render_mail(to_addr, mail, mimetype='plain', from_addr=None, username=None, password=None, **context):
+    """Render an email from the OSF into the keyword arguments of its mailer. Templates may query
+    the database, so render on a thread that may use the ODM; see `send_mail` for the parameters.
+    """
     from_addr = from_addr or settings.FROM_EMAIL
-    mailer = mailer or tasks.send_email
     subject = mail.subject(**context)
     message = mail.text(**context) if mimetype in ('plain', 'txt') else mail.html(**context)
     # Don't use ttls and login in DEBUG_MODE
@@ -101,7 +110,7 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     logger.debug('Sending email...')
     logger.debug(u'To: {to_addr}\nFrom: {from_addr}\nSubject: {subject}\nMessage: {message}'.format(**locals()))
 
-    kwargs = dict(
+    return dict(
         from_addr=from_addr,
         to_addr=to_addr,
         subject=subject,
@@ -114,6 +123,10 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
         categories=mail.categories,
     )
 
+
+def send_rendered_mail(kwargs, mailer=None, callback=None):
+    """Send an email rendered by `render_mail`. Touches no models, so it may run on any thread."""
+    mailer = mailer or tasks.send_email
     if settings.USE_EMAIL:
         if settings.USE_CELERY:
             return mailer.apply_async(kwargs=kwargs, link=callback)
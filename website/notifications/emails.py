@@ -1,4 +1,5 @@
 from babel import dates, core, Locale
+from modularodm import Q
 
 from website import mails
 from website import models as website_models
@@ -6,6 +7,7 @@ from website.notifications import constants
 from website.notifications import utils
 from website.notifications.model import NotificationDigest
 from website.notifications.model import NotificationSubscription
+from website.notifications.model import get_compiled_subscriptions_cache
 from website.util import web_url_for
 
 
@@ -97,34 +99,80 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
         digest.save()
 
 
-def compile_subscriptions(node, event_type, event=None, level=0):
-    """Recurse through node and parents for subscriptions.
+def compile_subscriptions(node, event_type, event=None):
+    """Resolve the subscriptions of a node and its parents for an event.
+
+    The lineage is walked once and every relevant subscription is fetched in a single query.
+    Subscriptions closer to the node take precedence over those of its parents, and an
+    event-specific subscription (e.g. a file's) takes precedence over the node's ``event_type``
+    subscription. Fetched subscriptions are cached for the duration of the request; permissions
+    are always checked against the current state of the nodes.
 
     :param node: current node
     :param event_type: Generally node_subscriptions_available
     :param event: Particular event such a file_updated that has specific file subs
-    :param level: How deep the recursion is
     :return: a dict of notification types with lists of users.
     """
-    subscriptions = check_node(node, event_type)
-    if event:
-        subscriptions = check_node(node, event)  # Gets particular event subscriptions
-        parent_subscriptions = compile_subscriptions(node, event_type, level=level + 1)  # get node and parent subs
-    elif node.parent_id:
-        parent_subscriptions = \
-            compile_subscriptions(website_models.Node.load(node.parent_id), event_type, level=level + 1)
+    cache = get_compiled_subscriptions_cache()
+    cache_key = (node._id, event_type, event)
+    if cache is not None and cache_key in cache:
+        lineage, levels = cache[cache_key]
     else:
-        parent_subscriptions = check_node(None, event_type)
-    for notification_type in parent_subscriptions:
-        p_sub_n = parent_subscriptions[notification_type]
-        p_sub_n.extend(subscriptions[notification_type])
-        for nt in subscriptions:
-            if notification_type != nt:
-                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
-        if level == 0:
-            p_sub_n, removed = utils.separate_users(node, p_sub_n)
-        parent_subscriptions[notification_type] = p_sub_n
-    return parent_subscriptions
+        lineage, levels = load_subscription_levels(node, event_type, event)
+        if cache is not None:
+            cache[cache_key] = (lineage, levels)
+
+    readers = get_readers(lineage)
+    compiled = {notification_type: set() for notification_type in constants.NOTIFICATION_TYPES}
+    for node_id, subscribed in levels:
+        level_subscriptions = {
+            notification_type: users & readers[node_id]
+            for notification_type, users in subscribed.iteritems()
+        }
+        for notification_type, users in level_subscriptions.iteritems():
+            overridden = set().union(*[
+                other for other_type, other in level_subscriptions.iteritems() if other_type != notification_type
+            ])
+            compiled[notification_type] = (compiled[notification_type] | users) - overridden
+
+    return {notification_type: list(users & readers[node._id]) for notification_type, users in compiled.iteritems()}
+
+
+def load_subscription_levels(node, event_type, event=None):
+    """Fetch the subscriptions that apply to a node with a single query.
+
+    :return: the node's lineage, top most project first, and a list of (node id, dict of notification
+        type to set of user ids) pairs in order of increasing precedence
+    """
+    lineage = get_node_lineage_nodes(node)
+    keys = [(each._id, utils.to_subscription_key(each._id, event_type)) for each in lineage]
+    if event:
+        keys.append((node._id, utils.to_subscription_key(node._id, event)))
+    subscriptions = {
+        subscription._id: subscription.to_storage()
+        for subscription in NotificationSubscription.find(Q('_id', 'in', [key for _, key in keys]))
+    }
+    levels = [
+        (node_id, {
+            notification_type: set(subscriptions[key].get(notification_type) or [])
+            for notification_type in constants.NOTIFICATION_TYPES
+        })
+        for node_id, key in keys
+        if key in subscriptions
+    ]
+    return lineage, levels
+
+
+def get_readers(lineage):
+    """Return a dict of node id to the ids of users with read permission on that node, matching
+    `Node.has_permission(user, 'read')`, for a lineage ordered from the top most project down.
+    """
+    readers = {}
+    admins = set()
+    for node in lineage:
+        admins |= {user_id for user_id, perms in node.permissions.iteritems() if 'admin' in perms}
+        readers[node._id] = admins | {user_id for user_id, perms in node.permissions.iteritems() if 'read' in perms}
+    return readers
 
 
 def check_node(node, event):
@@ -149,11 +197,18 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
+    return [each._id for each in get_node_lineage_nodes(node)]
+
+
+def get_node_lineage_nodes(node):
+    """ Get a list of nodes in order from the top most project to the node
+        e.g. [parent, node]
+    """
+    lineage = [node]
 
     while node.parent_id:
         node = website_models.Node.load(node.parent_id)
-        lineage = [node._id] + lineage
+        lineage = [node] + lineage
 
     return lineage
 
@@ -1,6 +1,6 @@
 from modularodm import fields
 
-from framework.mongo import StoredObject, ObjectId
+from framework.mongo import StoredObject, ObjectId, get_cache_key, dummy_request
 from modularodm.exceptions import ValidationValueError
 
 from website.project.model import Node
@@ -12,6 +12,24 @@ def validate_subscription_type(value):
         raise ValidationValueError
 
 
+def get_compiled_subscriptions_cache():
+    """Return the per-request cache of compiled subscriptions, keyed on (node id, event type, event).
+    Returns None outside of a request, where nothing is cached.
+    """
+    request = get_cache_key()
+    if request is dummy_request:
+        return None
+    if not hasattr(request, '_compiled_subscriptions'):
+        request._compiled_subscriptions = {}
+    return request._compiled_subscriptions
+
+
+def clear_compiled_subscriptions_cache():
+    cache = get_compiled_subscriptions_cache()
+    if cache:
+        cache.clear()
+
+
 class NotificationSubscription(StoredObject):
     _id = fields.StringField(primary=True)  # pxyz_wiki_updated, uabc_comment_replies
 
@@ -58,8 +76,21 @@ class NotificationSubscription(StoredObject):
         if save:
             self.save()
 
+    def save(self, *args, **kwargs):
+        ret = super(NotificationSubscription, self).save(*args, **kwargs)
+        clear_compiled_subscriptions_cache()
+        return ret
+
 
 class NotificationDigest(StoredObject):
+    __indices__ = [{
+        'key_or_list': [
+            ('send_type', 1),
+            ('user_id', 1),
+            ('_id', 1),
+        ],
+    }]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
     user_id = fields.StringField(index=True)
     timestamp = fields.DateTimeField()
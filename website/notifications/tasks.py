@@ -1,7 +1,9 @@
 """
 Tasks for making even transactional emails consolidated.
 """
-from bson.code import Code
+import itertools
+from multiprocessing.pool import ThreadPool
+
 from modularodm import Q
 
 from framework.celery_tasks import app as celery_app
@@ -9,47 +11,83 @@ from framework.mongo import database as db
 from framework.auth.core import User
 from framework.sentry import log_exception
 
-from framework.transactions.context import TokuTransaction
-
 from website.notifications.utils import NotificationsDict
 from website.notifications.model import NotificationDigest
 from website import mails
+from website import settings
 
 
 @celery_app.task(name='website.notifications.tasks.send_users_email', max_retries=0)
 def send_users_email(send_type):
     """Find pending Emails and amalgamates them into a single Email.
 
+    Digests are streamed a batch of users at a time. Emails are rendered on this thread, as the
+    templates load nodes, and only sent concurrently. The digests of a batch are deleted once
+    their email is sent, or if there is nothing to send; the digests of failed emails are kept
+    for the next time the task is scheduled.
+
     :param send_type
     :return:
     """
-    grouped_emails = get_users_emails(send_type)
-    if not grouped_emails:
-        return
-    for group in grouped_emails:
-        user = User.load(group['user_id'])
-        if not user:
-            log_exception()
-            continue
-        info = group['info']
-        notification_ids = [message['_id'] for message in info]
-        sorted_messages = group_by_node(info)
-        if sorted_messages:
-            mails.send_mail(
-                to_addr=user.username,
-                mimetype='html',
-                mail=mails.DIGEST,
-                name=user.fullname,
-                message=sorted_messages,
-                callback=remove_notifications(email_notification_ids=notification_ids)
-            )
+    pool = ThreadPool(settings.NOTIFICATION_DIGEST_CONCURRENCY)
+    try:
+        for groups in iter_users_emails_batches(send_type, settings.NOTIFICATION_DIGEST_BATCH_SIZE):
+            users = {
+                user._id: user
+                for user in User.find(Q('_id', 'in', [group['user_id'] for group in groups]))
+            }
+            done_ids, jobs = [], []
+            for group in groups:
+                digest_ids = [message['_id'] for message in group['info']]
+                user = users.get(group['user_id'])
+                if not user:
+                    log_exception()
+                    done_ids.extend(digest_ids)
+                    continue
+                sorted_messages = group_by_node(group['info'])
+                if not sorted_messages:
+                    done_ids.extend(digest_ids)
+                    continue
+                try:
+                    rendered = mails.render_mail(
+                        to_addr=user.username,
+                        mimetype='html',
+                        mail=mails.DIGEST,
+                        name=user.fullname,
+                        message=sorted_messages,
+                    )
+                except Exception:
+                    log_exception()
+                    continue
+                jobs.append((rendered, digest_ids))
+            sent = pool.map(_send_user_email, [rendered for rendered, _ in jobs])
+            for (_, digest_ids), success in zip(jobs, sent):
+                if success:
+                    done_ids.extend(digest_ids)
+            remove_notifications(email_notification_ids=done_ids)
+    finally:
+        pool.close()
+        pool.join()
 
 
-def get_users_emails(send_type):
-    """Get all emails that need to be sent.
+def _send_user_email(rendered):
+    """Send a digest rendered by `mails.render_mail`. Returns whether it was sent."""
+    try:
+        mails.send_rendered_mail(rendered)
+    except Exception:
+        log_exception()
+        return False
+    return True
+
+
+def iter_users_emails(send_type):
+    """Stream the emails that need to be sent, one user at a time.
+
+    Digests are read from a cursor sorted by user, so no single query result holds more than
+    one batch of digests.
 
     :param send_type: from NOTIFICATION_TYPES
-    :return: [{
+    :return: iterator of {
                 'user_id': 'se8ea',
                 'info': [{
                     'message': {
@@ -60,31 +98,41 @@ def get_users_emails(send_type):
                     '_id': NotificationDigest._id
                 }, ...
                 }]
-              },
-              {
-                'user_id': ...
-              }]
+              }
     """
-    with TokuTransaction():
-        emails = db['notificationdigest'].group(
-            key={'user_id': 1},
-            condition={
-                'send_type': send_type
-            },
-            initial={'info': []},
-            reduce=Code(
-                """
-                function(curr, result) {
-                    result.info.push({
-                        'message': curr.message,
-                        'node_lineage': curr.node_lineage,
-                        '_id': curr._id
-                    });
-                };
-                """
-            )
-        )
-    return emails
+    cursor = db['notificationdigest'].find(
+        {'send_type': send_type},
+        fields=['user_id', 'message', 'node_lineage'],
+        sort=[('user_id', 1), ('_id', 1)],
+    )
+    for user_id, digests in itertools.groupby(cursor, key=lambda digest: digest['user_id']):
+        yield {
+            'user_id': user_id,
+            'info': [{
+                'message': digest['message'],
+                'node_lineage': digest['node_lineage'],
+                '_id': digest['_id'],
+            } for digest in digests]
+        }
+
+
+def iter_users_emails_batches(send_type, batch_size):
+    """Group the output of `iter_users_emails` into lists of at most `batch_size` users."""
+    users_emails = iter_users_emails(send_type)
+    while True:
+        batch = list(itertools.islice(users_emails, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def get_users_emails(send_type):
+    """Get all emails that need to be sent. See `iter_users_emails`.
+
+    :param send_type: from NOTIFICATION_TYPES
+    :return: list of {'user_id': ..., 'info': [...]}, ordered by user id
+    """
+    return list(iter_users_emails(send_type))
 
 
 def group_by_node(notifications):
@@ -100,10 +148,10 @@ def group_by_node(notifications):
 
 
 def remove_notifications(email_notification_ids=None):
-    """Remove sent emails.
+    """Remove sent emails with a single query.
 
     :param email_notification_ids:
     :return:
     """
-    for email_id in email_notification_ids:
-        NotificationDigest.remove(Q('_id', 'eq', email_id))
+    if email_notification_ids:
+        NotificationDigest.remove(Q('_id', 'in', email_notification_ids))
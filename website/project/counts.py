@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Counters and flags shown on project pages, cached per node in the `nodecounts` collection.
+
+Cached entries are dropped by the save listeners at the bottom of `website.project.model` whenever
+a change could affect them, and are recomputed after `NODE_COUNTS_TTL` seconds in case an
+invalidation was missed (e.g. a direct database update).
+"""
+import time
+import logging
+import datetime
+import threading
+
+from framework.mongo import database
+from framework.mongo.handlers import CLIENT_POOL
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+COUNT_FIELDS = (
+    'registration_count',
+    'fork_count',
+    'templated_count',
+    'watched_count',
+    'points',
+    'has_comments',
+)
+
+
+def _count_related_nodes(node_id):
+    """Count the registrations, forks and nodes templated from a node with a single aggregation."""
+    result = database['node'].aggregate([
+        {'$match': {'$or': [
+            {'registered_from': node_id},
+            {'forked_from': node_id, 'is_deleted': False, 'is_registration': {'$ne': True}},
+            {'template_node': node_id, 'is_deleted': {'$ne': True}},
+        ]}},
+        {'$group': {
+            '_id': None,
+            'registration_count': {'$sum': {'$cond': [{'$eq': ['$registered_from', node_id]}, 1, 0]}},
+            'fork_count': {'$sum': {'$cond': [{'$and': [
+                {'$eq': ['$forked_from', node_id]},
+                {'$eq': ['$is_deleted', False]},
+                {'$ne': ['$is_registration', True]},
+            ]}, 1, 0]}},
+            'templated_count': {'$sum': {'$cond': [{'$and': [
+                {'$eq': ['$template_node', node_id]},
+                {'$ne': ['$is_deleted', True]},
+            ]}, 1, 0]}},
+        }},
+    ])['result']
+    counts = result[0] if result else {}
+    return {
+        field: counts.get(field, 0)
+        for field in ('registration_count', 'fork_count', 'templated_count')
+    }
+
+
+def _count_points(node_id):
+    """Count the pointers to a node from nodes that are neither deleted nor collections,
+    as `len(Node.get_points())` does, without loading any of them.
+    """
+    pointers = database['pointer'].find({'node': node_id}, {'__backrefs.parent.node.nodes': 1})
+    parent_ids = [
+        (pointer.get('__backrefs', {}).get('parent', {}).get('node', {}).get('nodes') or [None])[0]
+        for pointer in pointers
+    ]
+    if not parent_ids:
+        return 0
+    counted = set(
+        each['_id'] for each in database['node'].find(
+            {
+                '_id': {'$in': list(set(parent_ids))},
+                'is_collection': {'$ne': True},
+                'is_deleted': {'$ne': True},
+            },
+            {'_id': 1},
+        )
+    )
+    return len([parent_id for parent_id in parent_ids if parent_id in counted])
+
+
+def compute_node_counts(node_id, timings=None):
+    """Compute the project page counters of a node.
+
+    :param str node_id: Primary key of the node
+    :param dict timings: If given, filled with the seconds spent on each query
+    :return: dict of `COUNT_FIELDS` to values
+    """
+    timings = timings if timings is not None else {}
+    counts = {}
+
+    def timed(name, func):
+        start = time.time()
+        value = func()
+        timings[name] = time.time() - start
+        return value
+
+    counts.update(timed('related_nodes', lambda: _count_related_nodes(node_id)))
+    counts['watched_count'] = timed(
+        'watched_count', lambda: database['watchconfig'].find({'node': node_id}).count()
+    )
+    counts['points'] = timed('points', lambda: _count_points(node_id))
+    counts['has_comments'] = timed(
+        'has_comments', lambda: database['comment'].find_one({'node': node_id}, {'_id': 1}) is not None
+    )
+    return counts
+
+
+def get_node_counts(node_id):
+    """Return the project page counters of a node, from the cache if they are fresh enough."""
+    now = datetime.datetime.utcnow()
+    cached = database['nodecounts'].find_one({'_id': node_id})
+    if cached and cached['date_computed'] > now - datetime.timedelta(seconds=settings.NODE_COUNTS_TTL):
+        return {field: cached[field] for field in COUNT_FIELDS}
+
+    timings = {}
+    counts = compute_node_counts(node_id, timings=timings)
+    logger.debug('Computed counts of node {} in {}'.format(
+        node_id,
+        ', '.join('{}: {:.4f}s'.format(name, seconds) for name, seconds in sorted(timings.items())),
+    ))
+    _store_node_counts(node_id, dict(counts, date_computed=now))
+    return counts
+
+
+def _store_node_counts(node_id, stored):
+    """Cache the counters of a node on a client of its own, so that the write is not part of the
+    transaction of the request reading them, and never fails that request.
+    """
+    client_id = ('nodecounts', threading.current_thread().ident)
+    client = CLIENT_POOL.acquire(client_id)
+    try:
+        client[database.name]['nodecounts'].update({'_id': node_id}, {'$set': stored}, upsert=True)
+    except Exception:
+        logger.exception('Could not cache the counts of node {}'.format(node_id))
+    finally:
+        CLIENT_POOL.release(client_id)
+
+
+def invalidate_node_counts(*node_ids):
+    """Drop the cached counters of the given nodes."""
+    node_ids = [node_id for node_id in node_ids if node_id]
+    if node_ids:
+        database['nodecounts'].remove({'_id': {'$in': node_ids}})
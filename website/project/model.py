@@ -22,6 +22,7 @@ from modularodm.exceptions import ValidationValueError
 
 from framework import status
 from framework.mongo import ObjectId
+from framework.mongo import database
 from framework.mongo import StoredObject
 from framework.mongo import validators
 from framework.addons import AddonModelMixin
@@ -61,6 +62,7 @@ from website.project.licenses import (
     NodeLicenseRecord,
 )
 from website.project import signals as project_signals
+from website.project.counts import invalidate_node_counts
 from website.project.spam.model import SpamMixin
 from website.project.sanctions import (
     DraftRegistrationApproval,
@@ -450,6 +452,18 @@ class NodeLog(StoredObject):
             ('should_hide', 1),
             ('date', -1)
         ]
+    }, {
+        'key_or_list': [
+            ('lineage', 1),
+            ('should_hide', 1),
+            ('date', -1)
+        ]
+    }, {
+        # Logs of watched nodes, see `User.get_recent_log_ids`
+        'key_or_list': [
+            ('node', 1),
+            ('_id', -1)
+        ]
     }]
 
     date = fields.DateTimeField(default=datetime.datetime.utcnow, index=True)
@@ -461,6 +475,10 @@ class NodeLog(StoredObject):
 
     was_connected_to = fields.ForeignField('node', list=True)
 
+    # Primary keys of `node` and each of its parents, so that the logs of a node and all of its
+    # descendants can be fetched with a single indexed query. See `Node.get_aggregate_logs_query`.
+    lineage = fields.StringField(list=True)
+
     user = fields.ForeignField('user', index=True)
     foreign_user = fields.StringField()
 
@@ -568,6 +586,40 @@ class NodeLog(StoredObject):
     def pk(self):
         return self._id
 
+    def save(self, *args, **kwargs):
+        if not self.lineage and self.node:
+            self.lineage = self.node.get_lineage_ids()
+        return super(NodeLog, self).save(*args, **kwargs)
+
+    @classmethod
+    def clone_logs(cls, original, node, batch_size=None):
+        """Clone all logs of `original` onto `node`, e.g. a fork or registration of it, by
+        copying their documents with batched inserts rather than saving each clone.
+
+        :return: Number of logs cloned
+        """
+        batch_size = batch_size or settings.NODE_LOG_CLONE_BATCH_SIZE
+        collection = database[cls._name]
+        lineage = node.get_lineage_ids()
+        count = 0
+        batch = []
+        for data in collection.find({'node': original._id}).sort('date', pymongo.ASCENDING):
+            data.pop('__backrefs', None)
+            data.update({
+                '_id': str(ObjectId()),
+                'node': node._id,
+                'lineage': lineage,
+            })
+            batch.append(data)
+            if len(batch) >= batch_size:
+                collection.insert(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            collection.insert(batch)
+            count += len(batch)
+        return count
+
     def clone_node_log(self, node_id):
         """
         When a node is forked or registered, all logs on the node need to be cloned for the fork or registration.
@@ -578,6 +630,7 @@ class NodeLog(StoredObject):
         node = Node.find(Q('_id', 'eq', node_id))[0]
         log_clone = original_log.clone()
         log_clone.node = node
+        log_clone.lineage = node.get_lineage_ids()
         log_clone.original_node = original_log.original_node
         log_clone.user = original_log.user
         log_clone.save()
@@ -832,6 +885,16 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         '_affiliated_institutions',
     }
 
+    # Node fields that are part of the search documents of the node's files
+    SEARCH_FILE_UPDATE_FIELDS = {
+        'title',
+        'is_registration',
+        'retraction',
+        'is_public',
+        'is_deleted',
+        'is_retracted',
+    }
+
     # Fields that are writable by Node.update
     WRITABLE_WHITELIST = [
         'title',
@@ -1684,7 +1747,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         if self.is_collection or self.archiving:
             need_update = False
         if need_update:
-            self.update_search()
+            self.update_search(
+                update_files=first_save or bool(self.SEARCH_FILE_UPDATE_FIELDS.intersection(saved_fields))
+            )
 
         if 'node_license' in saved_fields:
             children = [c for c in self.get_descendants_recursive(
@@ -1797,6 +1862,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         ]
 
         new.save()
+
+        # Templated children were created before being attached to their parents
+        if top_level:
+            for templated_node in new.nodes_primary:
+                templated_node.update_log_lineage()
+
         return new
 
     ############
@@ -1873,6 +1944,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         # Remove `Pointer` object; will also remove self from `nodes` list of
         # parent node
         Pointer.remove_one(pointer)
+        invalidate_node_counts(pointer.node._id)
 
         # Add log
         self.add_log(
@@ -1942,11 +2014,50 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
                     if include(descendant):
                         yield descendant
 
+    def get_lineage_ids(self):
+        """Return the primary keys of this node and each of its parents, nearest first."""
+        ids = [self._id]
+        parents = self.node__parent
+        # Deleted parents are included, as `get_descendants_recursive` also walks through them
+        while parents and parents[0]._id not in ids:
+            ids.append(parents[0]._id)
+            parents = parents[0].node__parent
+        return ids
+
+    def update_log_lineage(self):
+        """Restamp `NodeLog.lineage` on the logs of this node and all of its primary descendants.
+        Must be called whenever this node is attached to a new parent.
+        """
+        for node in self.node_and_primary_descendants():
+            NodeLog.update(Q('node', 'eq', node._id), data={'lineage': node.get_lineage_ids()})
+
+    def get_descendants_batched(self):
+        """Yield all primary descendants of this node, loading each level of the tree with a single
+        query rather than one query per node.
+        """
+        seen = {self._id}
+        level = [self]
+        while level:
+            child_ids = []
+            for node in level:
+                for child_id, collection in node.nodes._to_data():
+                    if collection == Node._name and child_id not in seen:
+                        seen.add(child_id)
+                        child_ids.append(child_id)
+            level = list(Node.find(Q('_id', 'in', child_ids))) if child_ids else []
+            for node in level:
+                yield node
+
     def get_aggregate_logs_query(self, auth):
-        ids = [self._id] + [n._id
-                            for n in self.get_descendants_recursive()
-                            if n.can_view(auth)]
-        query = Q('node', 'in', ids) & Q('should_hide', 'ne', True)
+        # Logs are stamped with the lineage of their node, so the logs of the whole subtree match one
+        # indexed query; only descendants that the user cannot see need to be excluded explicitly.
+        hidden_ids = [
+            node._id for node in self.get_descendants_batched()
+            if not node.is_public and not node.can_view(auth)
+        ]
+        query = Q('lineage', 'eq', self._id) & Q('should_hide', 'ne', True)
+        if hidden_ids:
+            query = query & Q('node', 'nin', hidden_ids)
         return query
 
     def get_aggregate_logs_queryset(self, auth):
@@ -2126,10 +2237,10 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
             self.save()
         return None
 
-    def update_search(self):
+    def update_search(self, update_files=True):
         from website import search
         try:
-            search.search.update_node(self, bulk=False, async=True)
+            search.search.update_node(self, bulk=False, async=True, update_files=update_files)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
@@ -2323,9 +2434,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         )
 
         # Clone each log from the original node for this fork.
-        logs = original.logs
-        for log in logs:
-            log.clone_node_log(forked._id)
+        NodeLog.clone_logs(original, forked)
+
+        # Child forks were created before being attached to this fork
+        for forked_node in forked.nodes_primary:
+            forked_node.update_log_lineage()
 
         forked.reload()
 
@@ -2389,9 +2502,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
         registered.save()
 
         # Clone each log from the original node for this registration.
-        logs = original.logs
-        for log in logs:
-            log.clone_node_log(registered._id)
+        NodeLog.clone_logs(original, registered)
 
         registered.is_public = False
         for node in registered.get_descendants_recursive():
@@ -2698,6 +2809,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin, Commentable):
     def _parent_node(self, parent):
         parent.nodes.append(self)
         parent.save()
+        self.update_log_lineage()
 
     @property
     def _root(self):
@@ -3863,6 +3975,36 @@ class WatchConfig(StoredObject):
         return '<WatchConfig(node="{self.node}")>'.format(self=self)
 
 
+NODE_COUNTS_FIELDS = {
+    'registered_from', 'forked_from', 'template_node', 'is_deleted', 'is_registration', 'is_collection',
+}
+
+
+@Node.subscribe('save')
+def invalidate_related_node_counts(schema, instance, fields_changed, cached_data):
+    """Drop the cached counts of the nodes a saved node is a registration, fork or template of,
+    and, if it was deleted or turned into a collection, of the nodes it points to.
+    """
+    if not fields_changed & NODE_COUNTS_FIELDS:
+        return
+    stored = instance.to_storage()
+    node_ids = set()
+    for field in ('registered_from', 'forked_from', 'template_node'):
+        node_ids.update([stored.get(field), cached_data.get(field)])
+    if fields_changed & {'is_deleted', 'is_collection'}:
+        node_ids.update(pointer.node._id for pointer in instance.nodes_pointer if pointer.node)
+    invalidate_node_counts(*node_ids)
+
+
+@Comment.subscribe('save')
+@Pointer.subscribe('save')
+@WatchConfig.subscribe('save')
+def invalidate_target_node_counts(schema, instance, fields_changed, cached_data):
+    """Drop the cached counts of the node a comment, pointer or watch config refers to."""
+    if 'node' in fields_changed:
+        invalidate_node_counts(instance.to_storage().get('node'), cached_data.get('node'))
+
+
 class PrivateLink(StoredObject):
 
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
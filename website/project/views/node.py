@@ -32,10 +32,11 @@ from website.project.decorators import (
 from website.tokens import process_token_or_pass
 from website.util.permissions import ADMIN, READ, WRITE, CREATOR_PERMISSIONS
 from website.util.rubeus import collect_addon_js
+from website.project.counts import get_node_counts
 from website.project.model import has_anonymous_link, get_pointer_parent, NodeUpdateError, validate_title
 from website.project.forms import NewNodeForm
 from website.project.metadata.utils import serialize_meta_schemas
-from website.models import Node, Pointer, WatchConfig, PrivateLink, Comment
+from website.models import Node, Pointer, WatchConfig, PrivateLink, User, Institution
 from website import settings
 from website.views import _render_nodes, find_bookmark_collection, validate_page_num
 from website.profile import utils
@@ -652,13 +653,20 @@ def _view_project(node, auth, primary=False):
     if user:
         bookmark_collection = find_bookmark_collection(user)
         bookmark_collection_id = bookmark_collection._id
-        in_bookmark_collection = bookmark_collection.pointing_at(node._primary_key) is not None
+        bookmark_pointer_ids = [
+            pointer_id for pointer_id, collection in bookmark_collection.nodes._to_data()
+            if collection == Pointer._name
+        ]
+        in_bookmark_collection = bool(bookmark_pointer_ids) and Pointer.find(
+            Q('_id', 'in', bookmark_pointer_ids) & Q('node', 'eq', node._primary_key)
+        ).count() > 0
     else:
         in_bookmark_collection = False
         bookmark_collection_id = ''
     view_only_link = auth.private_key or request.args.get('view_only', '').strip('/')
     anonymous = has_anonymous_link(node, auth)
     widgets, configs, js, css = _render_addon(node)
+    counts = get_node_counts(node._primary_key)
     redirect_url = node.url + '?view_only=None'
 
     disapproval_link = ''
@@ -714,22 +722,22 @@ def _view_project(node, auth, primary=False):
             'root_id': node.root._id if node.root else None,
             'registered_meta': node.registered_meta,
             'registered_schemas': serialize_meta_schemas(node.registered_schema),
-            'registration_count': node.registrations_all.count(),
+            'registration_count': counts['registration_count'],
             'is_fork': node.is_fork,
             'forked_from_id': node.forked_from._primary_key if node.is_fork else '',
             'forked_from_display_absolute_url': node.forked_from.display_absolute_url if node.is_fork else '',
             'forked_date': iso8601format(node.forked_date) if node.is_fork else '',
-            'fork_count': node.forks.count(),
-            'templated_count': node.templated_list.count(),
-            'watched_count': node.watches.count(),
+            'fork_count': counts['fork_count'],
+            'templated_count': counts['templated_count'],
+            'watched_count': counts['watched_count'],
             'private_links': [x.to_json() for x in node.private_links_active],
             'link': view_only_link,
             'anonymous': anonymous,
-            'points': len(node.get_points(deleted=False, folders=False)),
+            'points': counts['points'],
             'piwik_site_id': node.piwik_site_id,
             'comment_level': node.comment_level,
-            'has_comments': bool(Comment.find(Q('node', 'eq', node))),
-            'has_children': bool(Comment.find(Q('node', 'eq', node))),
+            'has_comments': counts['has_comments'],
+            'has_children': counts['has_comments'],
             'identifiers': {
                 'doi': node.get_identifier_value('doi'),
                 'ark': node.get_identifier_value('ark'),
@@ -941,68 +949,152 @@ def get_readable_descendants(auth, node, **kwargs):
                 descendants.append(descendant)
     return _render_nodes(descendants, auth)
 
+def _get_primary_children(node):
+    """Map the ids of `node` and of each of its non-deleted primary descendants to the list of their
+    non-deleted primary children, in order, and return the nodes of the tree in breadth-first order.
+
+    When `node` is a root, its whole tree is fetched with a single query on the indexed `root` field;
+    descendants whose `root` is out of date, as are all those of a component, are loaded one tree
+    level per query.
+    """
+    loaded = {node._id: node}
+    if node.root is None or node.root._id == node._id:
+        loaded.update((each._id, each) for each in Node.find(Q('root', 'eq', node._id)))
+
+    children = {}
+    ordered = [node]
+    level = [node]
+    while level:
+        child_ids = {
+            parent._id: [
+                child_id for child_id, collection in parent.nodes._to_data()
+                if collection == Node._name
+            ]
+            for parent in level
+        }
+        missing = [
+            child_id for ids in child_ids.values() for child_id in ids if child_id not in loaded
+        ]
+        if missing:
+            loaded.update((each._id, each) for each in Node.find(Q('_id', 'in', missing)))
+        next_level = []
+        for parent in level:
+            children[parent._id] = []
+            for child_id in child_ids[parent._id]:
+                child = loaded.get(child_id)
+                # Skip cycles as well as deleted children
+                if child is None or child.is_deleted or child_id in children:
+                    continue
+                children[parent._id].append(child)
+                children[child_id] = None
+                next_level.append(child)
+        ordered.extend(next_level)
+        level = next_level
+    return children, ordered
+
+
 def node_child_tree(user, node_ids):
     """ Format data to test for node privacy settings for use in treebeard.
+
+    Each tree is loaded in bulk; permissions are then resolved from the top down for admins of
+    parent nodes, and from the leaves up for readable children, so that the cost grows linearly
+    with the size of the tree.
     """
     items = []
+    user_id = user._id if user else None
 
     for node_id in node_ids:
         node = Node.load(node_id)
         assert node, '{} is not a valid Node.'.format(node_id)
 
-        can_read = node.has_permission(user, READ)
-        can_read_children = node.has_permission_on_children(user, 'read')
-        if not can_read and not can_read_children:
-            continue
+        children, ordered = _get_primary_children(node)
 
-        contributors = []
-        for contributor in node.contributors:
-            contributors.append({
-                'id': contributor._id,
-                'is_admin': node.has_permission(contributor, ADMIN),
-                'is_confirmed': contributor.is_confirmed
-            })
+        parent_ids = {
+            child._id: each._id for each in ordered for child in children[each._id]
+        }
 
-        affiliated_institutions = [{
-            'id': affiliated_institution.pk,
-            'name': affiliated_institution.name
-        } for affiliated_institution in node.affiliated_institutions]
-
-        children = []
-        # List project/node if user has at least 'read' permissions (contributor or admin viewer) or if
-        # user is contributor on a component of the project/node
-        children.extend(node_child_tree(
-            user,
-            [
-                n._id
-                for n in node.nodes
-                if n.primary and
-                not n.is_deleted
-            ]
-        ))
-        item = {
-            'node': {
-                'id': node_id,
-                'url': node.url if can_read else '',
-                'title': node.title if can_read else 'Private Project',
-                'is_public': node.is_public,
-                'contributors': contributors,
-                'visible_contributors': node.visible_contributor_ids,
-                'is_admin': node.has_permission(user, ADMIN),
-                'affiliated_institutions': affiliated_institutions
-            },
-            'user_id': user._id,
-            'children': children,
-            'kind': 'folder' if not node.node__parent or not node.parent_node.has_permission(user, 'read') else 'node',
-            'nodeType': node.project_or_component,
-            'category': node.category,
-            'permissions': {
-                'view': can_read,
-                'is_admin': node.has_permission(user, 'read')
+        # Admins of a node can read all of its descendants
+        is_admin_parent = {node._id: node.is_admin_parent(user)}
+        can_read = {}
+        for each in ordered:
+            permissions = each.permissions.get(user_id, [])
+            if each._id != node._id:
+                is_admin_parent[each._id] = (
+                    ADMIN in permissions or is_admin_parent[parent_ids[each._id]]
+                )
+            can_read[each._id] = READ in permissions or is_admin_parent[each._id]
+
+        can_read_children = {}
+        for each in reversed(ordered):
+            can_read_children[each._id] = can_read[each._id] or any(
+                can_read_children[child._id] for child in children[each._id]
+            )
+        listed = [each for each in ordered if can_read_children[each._id]]
+
+        contributor_ids = set()
+        institution_ids = set()
+        for each in listed:
+            contributor_ids.update(each.contributors._to_primary_keys())
+            institution_ids.update(each._affiliated_institutions._to_primary_keys())
+        users = {
+            contributor._id: contributor
+            for contributor in User.find(Q('_id', 'in', list(contributor_ids)))
+        } if contributor_ids else {}
+        institutions = {
+            institution._id: Institution(institution)
+            for institution in Node.find(Q('_id', 'in', list(institution_ids)), allow_institution=True)
+        } if institution_ids else {}
+
+        serialized = {}
+        for each in reversed(listed):
+            contributors = []
+            for contributor_id in each.contributors._to_primary_keys():
+                contributors.append({
+                    'id': contributor_id,
+                    'is_admin': ADMIN in each.permissions.get(contributor_id, []),
+                    'is_confirmed': users[contributor_id].is_confirmed
+                })
+
+            affiliated_institutions = [{
+                'id': institutions[institution_id].pk,
+                'name': institutions[institution_id].name
+            } for institution_id in each._affiliated_institutions._to_primary_keys()]
+
+            if each._id == node._id:
+                kind = 'folder' if not node.node__parent or not node.parent_node.has_permission(user, 'read') else 'node'
+                node_type = node.project_or_component
+            else:
+                kind = 'node' if can_read[parent_ids[each._id]] else 'folder'
+                node_type = 'component'
+
+            # List project/node if user has at least 'read' permissions (contributor or admin viewer) or if
+            # user is contributor on a component of the project/node
+            serialized[each._id] = {
+                'node': {
+                    'id': each._id,
+                    'url': each.url if can_read[each._id] else '',
+                    'title': each.title if can_read[each._id] else 'Private Project',
+                    'is_public': each.is_public,
+                    'contributors': contributors,
+                    'visible_contributors': each.visible_contributor_ids,
+                    'is_admin': ADMIN in each.permissions.get(user_id, []),
+                    'affiliated_institutions': affiliated_institutions
+                },
+                'user_id': user_id,
+                'children': [
+                    serialized[child._id] for child in children[each._id] if child._id in serialized
+                ],
+                'kind': kind,
+                'nodeType': node_type,
+                'category': each.category,
+                'permissions': {
+                    'view': can_read[each._id],
+                    'is_admin': can_read[each._id]
+                }
             }
-        }
 
-        items.append(item)
+        if node._id in serialized:
+            items.append(serialized[node._id])
 
     return items
 
@@ -2,12 +2,17 @@
 
 from __future__ import division
 
+import contextlib
 import copy
 import functools
+import itertools
 import logging
 import math
 import re
+import threading
+import time
 import unicodedata
+from collections import OrderedDict
 
 from elasticsearch import (
     ConnectionError,
@@ -18,10 +23,12 @@ from elasticsearch import (
     helpers,
 )
 from modularodm import Q
+from pymongo.errors import DuplicateKeyError
 import six
 
 from framework import sentry
 from framework.celery_tasks import app as celery_app
+from framework.mongo import database
 from framework.mongo.utils import paginated
 
 from website import settings
@@ -79,6 +86,90 @@ except ConnectionError as e:
     es = None
 
 
+class IndexBuffer(object):
+    """Collects index and delete actions for search documents and sends them to elasticsearch with
+    as few bulk requests as possible. Actions are keyed by document, so queueing the same document
+    twice only sends the latest version.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.ELASTIC_BULK_CHUNK_SIZE
+        self.actions = OrderedDict()
+
+    def __len__(self):
+        return len(self.actions)
+
+    def index(self, index, doc_type, id_, body):
+        self.actions[(index, doc_type, id_)] = {
+            '_op_type': 'index',
+            '_index': index,
+            '_type': doc_type,
+            '_id': id_,
+            '_source': body,
+        }
+
+    def delete(self, index, doc_type, id_):
+        self.actions[(index, doc_type, id_)] = {
+            '_op_type': 'delete',
+            '_index': index,
+            '_type': doc_type,
+            '_id': id_,
+        }
+
+    def flush(self):
+        """Send all queued actions, refreshing the affected indices once rather than per document.
+
+        :raises: exceptions.SearchException if any document failed to update, so that the tasks
+            indexing in the background retry
+        """
+        if not self.actions:
+            return
+        actions = self.actions.values()
+        self.actions = OrderedDict()
+        start = time.time()
+        _, errors = helpers.bulk(es, actions, chunk_size=self.chunk_size, refresh=True, raise_on_error=False)
+        elapsed = time.time() - start
+        bulk_stats['flushes'] += 1
+        bulk_stats['documents'] += len(actions)
+        bulk_stats['seconds'] += elapsed
+        bulk_stats['max_batch_size'] = max(bulk_stats['max_batch_size'], len(actions))
+        logger.debug('Flushed {} search documents in {:.3f}s'.format(len(actions), elapsed))
+        # Deleting a document that was never indexed is not an error
+        errors = [error for error in errors if error.get('delete', {}).get('status') != 404]
+        if errors:
+            for error in errors:
+                logger.error('Failed to update search document: {}'.format(error))
+            raise exceptions.SearchException('Failed to update {} search documents'.format(len(errors)))
+
+
+# Running totals of bulk flushes, for monitoring batch sizes and flush latency
+bulk_stats = {
+    'flushes': 0,
+    'documents': 0,
+    'seconds': 0.0,
+    'max_batch_size': 0,
+}
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def index_buffer():
+    """Provide the `IndexBuffer` for the current thread. Nested uses share the outermost buffer,
+    which is flushed when the outermost block exits without an error.
+    """
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        yield buffer
+        return
+    buffer = _local.buffer = IndexBuffer()
+    try:
+        yield buffer
+    finally:
+        _local.buffer = None
+    buffer.flush()
+
+
 def requires_search(func):
     def wrapped(*args, **kwargs):
         if es is not None:
@@ -282,15 +373,24 @@ def get_doctype_from_node(node):
         return node.category
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_node_async(self, node_id, index=None, bulk=False):
+def update_node_async(self, node_id, index=None, bulk=False, update_files=True):
     node = Node.load(node_id)
     try:
-        update_node(node=node, index=index, bulk=bulk)
+        update_node(node=node, index=index, bulk=bulk, update_files=update_files)
     except Exception as exc:
         self.retry(exc=exc)
 
 @requires_search
-def update_node(node, index=None, bulk=False):
+def update_node(node, index=None, bulk=False, update_files=True):
+    """Index (or remove from the index) a node and, if `update_files`, the OSF Storage files of the node.
+
+    All documents are sent in bulk when the outermost `index_buffer` exits. If `bulk`, the node
+    document is returned instead of being indexed.
+    """
+    with index_buffer():
+        return _update_node(node, index=index, bulk=bulk, update_files=update_files)
+
+def _update_node(node, index=None, bulk=False, update_files=True):
     index = index or INDEX
     from website.addons.wiki.model import NodeWikiPage
 
@@ -299,9 +399,10 @@ def update_node(node, index=None, bulk=False):
     elastic_document_id = node._id
     parent_id = node.parent_id
 
-    from website.files.models.osfstorage import OsfStorageFile
-    for file_ in paginated(OsfStorageFile, Q('node', 'eq', node)):
-        update_file(file_, index=index)
+    if update_files:
+        from website.files.models.osfstorage import OsfStorageFile
+        for file_ in paginated(OsfStorageFile, Q('node', 'eq', node)):
+            update_file(file_, index=index)
 
     if node.is_deleted or not node.is_public or node.archiving:
         delete_doc(elastic_document_id, node, index=index)
@@ -353,7 +454,8 @@ def update_node(node, index=None, bulk=False):
         if bulk:
             return elastic_document
         else:
-            es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+            with index_buffer() as buffer:
+                buffer.index(index, category, elastic_document_id, elastic_document)
 
 def bulk_update_nodes(serialize, nodes, index=None):
     """Updates the list of input projects
@@ -365,17 +467,19 @@ def bulk_update_nodes(serialize, nodes, index=None):
     """
     index = index or INDEX
     actions = []
-    for node in nodes:
-        serialized = serialize(node)
-        if serialized:
-            actions.append({
-                '_op_type': 'update',
-                '_index': index,
-                '_id': node._id,
-                '_type': get_doctype_from_node(node),
-                'doc': serialized,
-                'doc_as_upsert': True,
-            })
+    # File documents of all the nodes are sent together
+    with index_buffer():
+        for node in nodes:
+            serialized = serialize(node)
+            if serialized:
+                actions.append({
+                    '_op_type': 'update',
+                    '_index': index,
+                    '_id': node._id,
+                    '_type': get_doctype_from_node(node),
+                    'doc': serialized,
+                    'doc_as_upsert': True,
+                })
     if actions:
         return helpers.bulk(es, actions)
 
@@ -394,6 +498,56 @@ def serialize_contributors(node):
 bulk_update_contributors = functools.partial(bulk_update_nodes, serialize_contributors)
 
 
+def mark_update_pending(doc_type, doc_id):
+    """Record that a deferred update of a document is scheduled. Returns False if one is already
+    pending, so that repeated changes coalesce into a single update. Marks expire after
+    `SEARCH_UPDATE_PENDING_TIMEOUT` seconds, in case the scheduled update never runs.
+    """
+    now = time.time()
+    try:
+        database['searchupdate'].update(
+            {
+                '_id': '{}:{}'.format(doc_type, doc_id),
+                'date': {'$lt': now - settings.SEARCH_UPDATE_PENDING_TIMEOUT},
+            },
+            {'$set': {'date': now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def clear_update_pending(doc_type, doc_id):
+    database['searchupdate'].remove({'_id': '{}:{}'.format(doc_type, doc_id)})
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
+def update_user_async(self, user_id, index=None):
+    """Index a user and the contributor lists of the nodes they are a visible contributor to."""
+    # Cleared first, so that changes made from now on schedule another update
+    clear_update_pending('user', user_id)
+    user = User.load(user_id)
+    try:
+        update_user(user, index=index)
+        update_user_contributions(user, index=index)
+    except Exception as exc:
+        self.retry(exc=exc)
+
+
+@requires_search
+def update_user_contributions(user, index=None):
+    """Update the contributor lists of the nodes a user is a visible contributor to, one bulk
+    request per `SEARCH_UPDATE_BATCH_SIZE` nodes, so that only one batch is held at a time.
+    """
+    nodes = iter(user.visible_contributor_to)
+    while True:
+        batch = list(itertools.islice(nodes, settings.SEARCH_UPDATE_BATCH_SIZE))
+        if not batch:
+            break
+        bulk_update_contributors(batch, index=index)
+
+
 @requires_search
 def update_user(user, index=None):
 
@@ -447,13 +601,8 @@ def update_file(file_, index=None, delete=False):
     index = index or INDEX
 
     if not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving:
-        es.delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
+        with index_buffer() as buffer:
+            buffer.delete(index, 'file', file_._id)
         return
 
     # We build URLs manually here so that this function can be
@@ -478,13 +627,15 @@ def update_file(file_, index=None, delete=False):
         'is_retracted': file_.node.is_retracted
     }
 
-    es.index(
-        index=index,
-        doc_type='file',
-        body=file_doc,
-        id=file_._id,
-        refresh=True
-    )
+    with index_buffer() as buffer:
+        buffer.index(index, 'file', file_._id, file_doc)
+
+@requires_search
+def update_files(files, index=None):
+    """Index (or remove from the index) many files, sending their documents in bulk."""
+    with index_buffer():
+        for file_ in files:
+            update_file(file_, index=index)
 
 @requires_search
 def update_institution(institution, index=None):
@@ -567,7 +718,8 @@ def create_index(index=None):
 def delete_doc(elastic_document_id, node, index=None, category=None):
     index = index or INDEX
     category = category or 'registration' if node.is_registration else node.project_or_component
-    es.delete(index=index, doc_type=category, id=elastic_document_id, refresh=True, ignore=[404])
+    with index_buffer() as buffer:
+        buffer.delete(index, category, elastic_document_id)
 
 
 @requires_search
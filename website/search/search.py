@@ -26,7 +26,7 @@ def search(query, index=None, doc_type=None):
     return search_engine.search(query, index=index, doc_type=doc_type)
 
 @requires_search
-def update_node(node, index=None, bulk=False, async=True):
+def update_node(node, index=None, bulk=False, async=True, update_files=True):
     if async:
         node_id = node._id
         # We need the transaction to be committed before trying to run celery tasks.
@@ -34,12 +34,12 @@ def update_node(node, index=None, bulk=False, async=True):
         # database in order for method that updates the Node's elastic search document
         # to run correctly.
         if settings.USE_CELERY:
-            enqueue_task(search_engine.update_node_async.s(node_id=node_id, index=index, bulk=bulk))
+            enqueue_task(search_engine.update_node_async.s(node_id=node_id, index=index, bulk=bulk, update_files=update_files))
         else:
-            search_engine.update_node_async(node_id=node_id, index=index, bulk=bulk)
+            search_engine.update_node_async(node_id=node_id, index=index, bulk=bulk, update_files=update_files)
     else:
         index = index or settings.ELASTIC_INDEX
-        return search_engine.update_node(node, index=index, bulk=bulk)
+        return search_engine.update_node(node, index=index, bulk=bulk, update_files=update_files)
 
 @requires_search
 def bulk_update_nodes(serialize, nodes, index=None):
@@ -63,11 +63,32 @@ def update_user(user, index=None):
     index = index or settings.ELASTIC_INDEX
     search_engine.update_user(user, index=index)
 
+@requires_search
+def schedule_user_update(user, index=None):
+    """Update a user, and the contributor lists of the nodes they are a visible contributor to,
+    in the background after `SEARCH_UPDATE_DELAY` seconds. Further calls until then are coalesced
+    into the same update.
+    """
+    if settings.USE_CELERY:
+        if search_engine.mark_update_pending('user', user._id):
+            enqueue_task(
+                search_engine.update_user_async.s(user_id=user._id, index=index).set(
+                    countdown=settings.SEARCH_UPDATE_DELAY
+                )
+            )
+    else:
+        search_engine.update_user_async(user_id=user._id, index=index)
+
 @requires_search
 def update_file(file_, index=None, delete=False):
     index = index or settings.ELASTIC_INDEX
     search_engine.update_file(file_, index=index, delete=delete)
 
+@requires_search
+def update_files(files, index=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.update_files(files, index=index)
+
 @requires_search
 def update_institution(institution, index=None):
     index = index or settings.ELASTIC_INDEX
@@ -75,6 +75,14 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Maximum number of documents sent to elasticsearch in one bulk request
+ELASTIC_BULK_CHUNK_SIZE = 500
+# Changes to users are indexed SEARCH_UPDATE_DELAY seconds later, with those made in the meantime;
+# a scheduled update that has not run after SEARCH_UPDATE_PENDING_TIMEOUT seconds is given up on.
+# The contributor lists of their nodes are updated SEARCH_UPDATE_BATCH_SIZE nodes at a time.
+SEARCH_UPDATE_DELAY = 10
+SEARCH_UPDATE_PENDING_TIMEOUT = 5 * 60
+SEARCH_UPDATE_BATCH_SIZE = 100
 SHARE_ELASTIC_URI = ELASTIC_URI
 SHARE_ELASTIC_INDEX = 'share'
 # For old indices
@@ -90,6 +98,18 @@ OSF_SESSION_TIMEOUT = 30 * 24 * 60 * 60  # 30 days in seconds
 SECRET_KEY = 'CHANGEME'
 SESSION_COOKIE_SECURE = SECURE_MODE
 SESSION_COOKIE_HTTPONLY = True
+# Sessions are cached in process for SESSION_CACHE_TTL seconds; see framework.sessions.store
+SESSION_CACHE_TTL = 60
+SESSION_CACHE_MAX_SIZE = 10000
+# Maximum delay (in seconds) before a process evicts sessions that another process removed
+SESSION_REVOCATION_CHECK_INTERVAL = 1
+# Minimum delay (in seconds) between two writes of a user's date_last_login
+DATE_LAST_LOGIN_THROTTLE = 5 * 60
+
+# GUIDs are reserved in batches of GUID_POOL_BATCH_SIZE, in the background once fewer than
+# GUID_POOL_LOW_WATER are left in process; see framework.guid.pool
+GUID_POOL_BATCH_SIZE = 100
+GUID_POOL_LOW_WATER = 20
 
 # local path to private key and cert for local development using https, overwrite in local.py
 OSF_SERVER_KEY = None
@@ -119,6 +139,10 @@ MAILCHIMP_WEBHOOK_SECRET_KEY = 'CHANGEME'  # OSF secret key to ensure webhook is
 ENABLE_EMAIL_SUBSCRIPTIONS = True
 MAILCHIMP_GENERAL_LIST = 'Open Science Framework General'
 
+# Notification digests: number of users whose digests are sent per batch, and how many are rendered at once
+NOTIFICATION_DIGEST_BATCH_SIZE = 100
+NOTIFICATION_DIGEST_CONCURRENCY = 4
+
 #Triggered emails
 OSF_HELP_LIST = 'Open Science Framework Help'
 WAIT_BETWEEN_MAILS = timedelta(days=7)
@@ -251,6 +275,13 @@ SYSTEM_ADDED_ADDONS = {
 PIWIK_HOST = None
 PIWIK_ADMIN_TOKEN = None
 PIWIK_SITE_ID = None
+# Seconds to wait for each Piwik API call made in the background
+PIWIK_TIMEOUT = 10
+
+# Seconds after which the discovery feed is recomputed in the background when it is served,
+# and seconds each process serves it from memory before reading it again
+DISCOVERY_FEED_MAX_AGE = 60 * 60
+DISCOVERY_FEED_MEMORY_TTL = 60
 
 KEEN = {
     'public': {
@@ -291,6 +322,18 @@ DISK_SAVING_MODE = False
 # Seconds before another notification email can be sent to a contributor when added to a project
 CONTRIBUTOR_ADDED_EMAIL_THROTTLE = 24 * 3600
 
+# Page and user activity counters are buffered in process and written out every
+# ANALYTICS_FLUSH_INTERVAL seconds, or once ANALYTICS_FLUSH_MAX_KEYS documents have pending increments
+ANALYTICS_FLUSH_INTERVAL = 10
+ANALYTICS_FLUSH_MAX_KEYS = 1000
+
+# Seconds for which the fork, registration, watch, link and comment counts of project pages are
+# cached; the cache is also dropped when they change, see website.project.counts
+NODE_COUNTS_TTL = 5 * 60
+
+# Number of logs inserted per batch when cloning the logs of a forked or registered node
+NODE_LOG_CLONE_BATCH_SIZE = 1000
+
 # Google Analytics
 GOOGLE_ANALYTICS_ID = None
 GOOGLE_SITE_VERIFICATION = None
@@ -320,6 +363,9 @@ SHARE_API_DOCS_URL = ''
 CAS_SERVER_URL = 'http://localhost:8080'
 MFR_SERVER_URL = 'http://localhost:7778'
 
+# Number of file nodes inserted per bulk write when copying a file tree, e.g. to fork a project
+FILE_COPY_BATCH_SIZE = 1000
+
 ###### ARCHIVER ###########
 ARCHIVE_PROVIDER = 'osfstorage'
 
@@ -328,6 +374,17 @@ MAX_FILE_SIZE = MAX_ARCHIVE_SIZE  # TODO limit file size?
 
 ARCHIVE_TIMEOUT_TIMEDELTA = timedelta(1)  # 24 hours
 
+# Number of folders listed concurrently when collecting the file tree of an addon to archive
+ARCHIVE_STAT_CONCURRENCY = 4
+# Requests per second made to WaterButler while collecting a file tree, before backing off on 429/503
+ARCHIVE_STAT_RATE = 20
+# Times a listing throttled by WaterButler is retried
+ARCHIVE_STAT_MAX_RETRIES = 5
+# Times stat_addon is retried, ARCHIVE_STAT_RETRY_DELAY seconds apart, if WaterButler still throttles
+# its listings; retries resume the walk from the folders already listed
+ARCHIVE_STAT_TASK_RETRIES = 3
+ARCHIVE_STAT_RETRY_DELAY = 60
+
 ENABLE_ARCHIVER = True
 
 JWT_SECRET = 'changeme'
@@ -404,6 +461,8 @@ CELERY_IMPORTS = (
     'framework.analytics.tasks',
     'website.mailchimp_utils',
     'website.notifications.tasks',
+    'website.conferences.tasks',
+    'website.discovery.tasks',
     'website.archiver.tasks',
     'website.search.search',
     'scripts.populate_new_and_noteworthy_projects',
@@ -479,6 +538,19 @@ else:
             'schedule': crontab(minute=0, hour=12),  # Daily 12 p.m.
             'kwargs': {'dry_run': False},
         },
+        'refresh_conferences': {
+            'task': 'website.conferences.tasks.refresh_conferences',
+            'schedule': crontab(minute='*/10'),
+        },
+        'rebuild_conference_submissions': {
+            'task': 'website.conferences.tasks.refresh_conferences',
+            'schedule': crontab(minute=30, hour=3),  # Daily 3:30 a.m.
+            'kwargs': {'rebuild': True},
+        },
+        'refresh_discovery_feed': {
+            'task': 'website.discovery.tasks.refresh_discovery_feed',
+            'schedule': crontab(minute='*/30'),
+        },
         'new-and-noteworthy': {
             'task': 'scripts.populate_new_and_noteworthy_projects',
             'schedule': crontab(minute=0, hour=2, day_of_week=6),  # Saturday 2:00 a.m.
@@ -542,6 +614,8 @@ WATERBUTLER_JWE_SECRET = 'CirclesAre4Squares'
 WATERBUTLER_JWT_SECRET = 'ILiekTrianglesALot'
 WATERBUTLER_JWT_ALGORITHM = 'HS256'
 WATERBUTLER_JWT_EXPIRATION = 15
+# Seconds `get_auth` reuses a payload for; must be below WATERBUTLER_JWT_EXPIRATION. 0 disables
+WATERBUTLER_AUTH_CACHE_TTL = 10
 
 DRAFT_REGISTRATION_APPROVAL_PERIOD = datetime.timedelta(days=10)
 assert (DRAFT_REGISTRATION_APPROVAL_PERIOD > EMBARGO_END_DATE_MIN), 'The draft registration approval period should be more than the minimum embargo end date.'
@@ -6,6 +6,7 @@ import logging
 import datetime
 
 import hurry.filesize
+from modularodm import Q
 
 from framework import sentry
 from framework.auth.decorators import Auth
@@ -153,37 +154,89 @@ class NodeFileCollector(object):
         self.node = node
         self.auth = auth
         self.extra = kwargs
-        self.can_view = node.can_view(auth)
-        self.can_edit = node.can_edit(auth) and not node.is_registration
+        self._permissions = {}
+        self.can_view = self._can_view(node)
+        self.can_edit = self._can_edit(node)
 
     def to_hgrid(self):
         """Return the Rubeus.JS representation of the node's file data, including
         addons and components
         """
+        self._prefetch_components(self.node)
         root = self._serialize_node(self.node)
         return [root]
 
+    def _get_permissions(self, node):
+        """Return the view and edit permissions of the current user on a node, computed once
+        per node. Pointers share the permissions of the node they point to.
+        """
+        key = node.resolve()._id
+        if key not in self._permissions:
+            can_view = node.can_view(self.auth)
+            self._permissions[key] = {
+                'view': can_view,
+                'edit': node.can_edit(self.auth) and not node.is_registration,
+            }
+        return self._permissions[key]
+
+    def _can_view(self, node):
+        return self._get_permissions(node)['view']
+
+    def _can_edit(self, node):
+        return self._get_permissions(node)['edit']
+
+    def _prefetch_components(self, node):
+        """Load the component tree below `node` with one query per level and per kind of child,
+        so that walking `node.nodes` afterwards is served from the ODM cache. Objects that are
+        already cached are not reloaded, which would discard unsaved changes to them.
+        """
+        from website.project.model import Node, Pointer
+
+        seen = {node._id}
+        level = [node]
+        while level:
+            to_load = {Node: set(), Pointer: set()}
+            for parent in level:
+                for child_id, collection in parent.nodes._to_data():
+                    for schema in to_load:
+                        if collection == schema._name and child_id not in seen:
+                            seen.add(child_id)
+                            to_load[schema].add(child_id)
+            self._load_uncached(Pointer, to_load[Pointer])
+            pointers = [Pointer.load(pointer_id) for pointer_id in to_load[Pointer]]
+            targets = set(pointer.to_storage()['node'] for pointer in pointers if pointer) - seen
+            seen.update(targets)
+            node_ids = to_load[Node] | targets
+            self._load_uncached(Node, node_ids)
+            level = [Node.load(node_id) for node_id in node_ids]
+            level = [each for each in level if each and not each.is_deleted]
+
+    def _load_uncached(self, schema, ids):
+        ids = [each for each in ids if each and not schema._is_cached(each)]
+        if ids:
+            list(schema.find(Q('_id', 'in', ids)))
+
     def _collect_components(self, node, visited):
         rv = []
-        if not node.can_view(self.auth):
+        if not self._can_view(node):
             return rv
         for child in node.nodes:
             if child.is_deleted:
                 continue
-            elif not child.can_view(self.auth):
+            elif not self._can_view(child):
                 if child.primary:
                     for desc in child.find_readable_descendants(self.auth):
-                        visited.append(desc.resolve()._id)
+                        visited.add(desc.resolve()._id)
                         rv.append(self._serialize_node(desc, visited=visited))
             elif child.resolve()._id not in visited:
-                visited.append(child.resolve()._id)
+                visited.add(child.resolve()._id)
                 rv.append(self._serialize_node(child, visited=visited))
         return rv
 
     def _get_node_name(self, node):
         """Input node object, return the project name to be display.
         """
-        can_view = node.can_view(auth=self.auth)
+        can_view = self._can_view(node)
 
         if can_view:
             node_name = sanitize.unescape_entities(node.title)
@@ -201,9 +254,9 @@ class NodeFileCollector(object):
     def _serialize_node(self, node, visited=None):
         """Returns the rubeus representation of a node folder.
         """
-        visited = visited or []
-        visited.append(node.resolve()._id)
-        can_view = node.can_view(auth=self.auth)
+        visited = visited if visited is not None else set()
+        visited.add(node.resolve()._id)
+        can_view = self._can_view(node)
         if can_view:
             children = self._collect_addons(node) + self._collect_components(node, visited)
         else:
@@ -215,7 +268,7 @@ class NodeFileCollector(object):
             'category': node.category,
             'kind': FOLDER,
             'permissions': {
-                'edit': node.can_edit(self.auth) and not node.is_registration,
+                'edit': self._can_edit(node),
                 'view': can_view,
             },
             'urls': {